@@ -131,6 +131,7 @@ BRIEF ANSWER:`
             const reader = response.body?.getReader()
             const decoder = new TextDecoder()
             let assistantMessage = ''
+            let pending = ''
 
             if (reader) {
                 // Add empty assistant message for streaming
@@ -145,8 +146,10 @@ BRIEF ANSWER:`
                         const { done, value } = await reader.read()
                         if (done) break
 
-                        const chunk = decoder.decode(value, { stream: true })
-                        const lines = chunk.split('\n')
+                        // Chunks arrive as soon as they are generated and may end mid-line
+                        pending += decoder.decode(value, { stream: true })
+                        const lines = pending.split('\n')
+                        pending = lines.pop() ?? ''
 
                         for (const line of lines) {
                             if (line.trim()) {
@@ -100,6 +100,25 @@ export default function ImageUpload({ onResult }: ImageUploadProps) {
         }
     }
 
+    const waitForJob = async (statusUrl: string) => {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, 1000))
+            const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}${statusUrl}?include_mask=base64`, {
+                credentials: 'include',
+            })
+            if (!response.ok) {
+                throw new Error(`Could not check classification status (${response.status}).`)
+            }
+            const job = await response.json()
+            if (job.status === 'done') {
+                return job.result
+            }
+            if (job.status === 'failed') {
+                throw new Error(job.error || 'Classification failed. Please try again.')
+            }
+        }
+    }
+
     const handleUpload = async () => {
         if (!selectedFile) {
             setError('Please select an image file')
@@ -113,6 +132,7 @@ export default function ImageUpload({ onResult }: ImageUploadProps) {
         try {
             const formData = new FormData()
             formData.append('ImageFile', selectedFile)
+            formData.append('include_mask', 'base64')
 
             // Simulate upload progress
             const progressInterval = setInterval(() => {
@@ -155,7 +175,12 @@ export default function ImageUpload({ onResult }: ImageUploadProps) {
                 }
             }
 
-            const data = await response.json()
+            let data = await response.json()
+
+            // Uploads are classified in the background, poll the job until it finishes
+            if (response.status === 202 && data.status_url) {
+                data = await waitForJob(data.status_url)
+            }
 
             // Check if the response has the expected structure
             if (data.success && data.predicted_class && data.result !== undefined) {
@@ -222,7 +247,7 @@ export default function ImageUpload({ onResult }: ImageUploadProps) {
                 <input
                     ref={fileInputRef}
                     type="file"
-                    accept="image/*"
+                    accept="image/*,.dcm,application/dicom"
                     onChange={handleFileChange}
                     className="hidden"
                 />
@@ -10,6 +10,10 @@ interface ImageData {
         ImageFile: {
             url: string
         }
+        Derivatives: {
+            thumbnail: string
+            preview: string
+        }
         UploadDateTime: string
         FileSize: number
         ImageFormat: string
@@ -21,7 +25,7 @@ interface ImageData {
         ProcessedDateTime: string
         ProcessingTime: number
         HasMask: boolean
-        MaskImageBase64: string | null
+        MaskURL: string | null
     } | null
 }
 
@@ -32,6 +36,9 @@ export default function ImagesPage() {
     const [error, setError] = useState<string | null>(null)
     const [selectedImage, setSelectedImage] = useState<ImageData | null>(null)
     const [showMaskMode, setShowMaskMode] = useState<{ [key: number]: boolean }>({})
+    const [nextCursor, setNextCursor] = useState<string | null>(null)
+    const [isLoadingMore, setIsLoadingMore] = useState(false)
+    const [stats, setStats] = useState<{ total_images: number, processed_images: number, total_file_size: number } | null>(null)
 
     const toggleMaskMode = (imageId: number) => {
         setShowMaskMode(prev => ({
@@ -44,10 +51,11 @@ export default function ImagesPage() {
         fetchImages()
     }, [])
 
-    const fetchImages = async () => {
+    const fetchImages = async (cursor: string | null = null) => {
         try {
             setError(null)
-            const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/images/`, {
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+            const response = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/images/${query}`, {
                 method: 'GET',
                 headers: {
                     'Content-Type': 'application/json',
@@ -72,7 +80,19 @@ export default function ImagesPage() {
             }
 
             const data = await response.json()
-            setImages(data.combined_data || [])
+            const page = data.combined_data || []
+            setImages(prev => (cursor ? [...prev, ...page] : page))
+            setNextCursor(data.next_cursor || null)
+
+            // Totals cover the whole history, not just the loaded pages
+            if (!cursor) {
+                const statsResponse = await fetch(`${process.env.NEXT_PUBLIC_BACKEND_URL}/stats/`, {
+                    credentials: 'include'
+                })
+                if (statsResponse.ok) {
+                    setStats(await statsResponse.json())
+                }
+            }
         } catch (error) {
             console.error('Failed to fetch images:', error)
             const errorMessage = error instanceof Error ? error.message : 'Failed to load images.'
@@ -236,19 +256,19 @@ export default function ImagesPage() {
                         <div className="grid grid-cols-1 md:grid-cols-3 gap-6 mb-8">
                             <div className="bg-white/80 backdrop-blur-md border border-gray-200/50 rounded-xl shadow-lg p-6 text-center">
                                 <div className="text-3xl font-bold bg-gradient-to-r from-blue-600 to-cyan-600 bg-clip-text text-transparent mb-1">
-                                    {images.length}
+                                    {stats ? stats.total_images : images.length}
                                 </div>
                                 <div className="text-gray-600">Total Images</div>
                             </div>
                             <div className="bg-white/80 backdrop-blur-md border border-gray-200/50 rounded-xl shadow-lg p-6 text-center">
                                 <div className="text-3xl font-bold bg-gradient-to-r from-green-600 to-emerald-600 bg-clip-text text-transparent mb-1">
-                                    {images.filter(img => img.recognition_result).length}
+                                    {stats ? stats.processed_images : images.filter(img => img.recognition_result).length}
                                 </div>
                                 <div className="text-gray-600">Analyzed</div>
                             </div>
                             <div className="bg-white/80 backdrop-blur-md border border-gray-200/50 rounded-xl shadow-lg p-6 text-center">
                                 <div className="text-3xl font-bold bg-gradient-to-r from-purple-600 to-indigo-600 bg-clip-text text-transparent mb-1">
-                                    {formatFileSize(images.reduce((total, img) => total + (img.image.FileSize || 0), 0))}
+                                    {formatFileSize(stats ? stats.total_file_size : images.reduce((total, img) => total + (img.image.FileSize || 0), 0))}
                                 </div>
                                 <div className="text-gray-600">Total Size</div>
                             </div>
@@ -263,16 +283,17 @@ export default function ImagesPage() {
                                         onClick={() => setSelectedImage(data)}
                                     >
                                         <div className="aspect-square overflow-hidden">
-                                            {showMaskMode[data.image.ImageID] && data.recognition_result?.MaskImageBase64 ? (
+                                            {showMaskMode[data.image.ImageID] && data.recognition_result?.MaskURL ? (
                                                 <img
-                                                    src={`data:image/png;base64,${data.recognition_result.MaskImageBase64}`}
+                                                    src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${data.recognition_result.MaskURL}`}
                                                     alt="Segmentation Mask"
                                                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-300"
                                                 />
                                             ) : (
                                                 <img
-                                                    src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${data.image.ImageFile.url}`}
+                                                    src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${data.image.Derivatives.thumbnail}`}
                                                     alt={data.image.FileName}
+                                                    loading="lazy"
                                                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-300"
                                                 />
                                             )}
@@ -281,7 +302,7 @@ export default function ImagesPage() {
                                         {/* Top overlay buttons */}
                                         <div className="absolute top-2 left-2 right-2 flex justify-between items-start">
                                             {/* Mask toggle button */}
-                                            {data.recognition_result?.MaskImageBase64 && (
+                                            {data.recognition_result?.MaskURL && (
                                                 <button
                                                     onClick={(e) => {
                                                         e.stopPropagation()
@@ -392,6 +413,23 @@ export default function ImagesPage() {
                             ))}
                         </div>
 
+                        {/* Load More */}
+                        {nextCursor && (
+                            <div className="text-center mb-8">
+                                <button
+                                    onClick={async () => {
+                                        setIsLoadingMore(true)
+                                        await fetchImages(nextCursor)
+                                        setIsLoadingMore(false)
+                                    }}
+                                    disabled={isLoadingMore}
+                                    className="bg-white/80 border border-gray-200/50 text-gray-700 px-6 py-3 rounded-xl font-medium hover:bg-white transition-colors disabled:opacity-50"
+                                >
+                                    {isLoadingMore ? 'Loading...' : 'Load More'}
+                                </button>
+                            </div>
+                        )}
+
                         {/* Upload Button */}
                         <div className="text-center">
                             <Link
@@ -430,20 +468,27 @@ export default function ImagesPage() {
                             {/* Image Display */}
                             <div className="space-y-4">
                                 <div className="flex items-center justify-center bg-gray-50/80 backdrop-blur-sm rounded-lg min-h-96 border border-gray-200/50">
-                                    <img
-                                        src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${selectedImage.image.ImageFile.url}`}
-                                        alt={selectedImage.image.FileName}
-                                        className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
-                                    />
+                                    <a
+                                        href={`${process.env.NEXT_PUBLIC_BACKEND_URL}${selectedImage.image.ImageFile.url}`}
+                                        target="_blank"
+                                        rel="noopener noreferrer"
+                                        title="Open original"
+                                    >
+                                        <img
+                                            src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${selectedImage.image.Derivatives.preview}`}
+                                            alt={selectedImage.image.FileName}
+                                            className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
+                                        />
+                                    </a>
                                 </div>
 
                                 {/* Mask Image Display */}
-                                {selectedImage.recognition_result?.MaskImageBase64 && (
+                                {selectedImage.recognition_result?.MaskURL && (
                                     <div>
                                         <h5 className="font-semibold text-gray-800 mb-2">Segmentation Mask</h5>
                                         <div className="flex items-center justify-center bg-gray-50/80 backdrop-blur-sm rounded-lg min-h-64 border border-gray-200/50">
                                             <img
-                                                src={`data:image/png;base64,${selectedImage.recognition_result.MaskImageBase64}`}
+                                                src={`${process.env.NEXT_PUBLIC_BACKEND_URL}${selectedImage.recognition_result.MaskURL}`}
                                                 alt="Segmentation Mask"
                                                 className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
                                             />
@@ -5,48 +5,102 @@ import matplotlib.pyplot as plt
 import io
 import base64
 
+import numpy as np
+
+from inference.image import DecodedImage
+from inference.metrics import timed_stage
+from inference.registry import estimate_model_bytes, registry
+from inference.tiling import (
+    iter_tile_batches,
+    non_max_suppression,
+    tiling_config,
+    use_tiling,
+)
+
 
 class YOLOModel:
     def __init__(self, model_path="models/bone_fracture_segmentation.pt"):
         self.model = YOLO(model_path)
-    
 
-    def predict(self, image_path, conf_threshold=0.01):
-        # Load the image
-        image = cv2.imread(image_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)  # Convert BGR to RGB for visualization
+    def memory_bytes(self):
+        return estimate_model_bytes(self.model.model)
+
+    def detect(self, image):
+        """(box, confidence) of each detection, boxes in pixels of the whole image"""
+        config = tiling_config("bone_fracture_yolo")
+        if not use_tiling(config, image.size):
+            # Run inference on the decoded BGR pixels instead of re-reading the file
+            with timed_stage("segmentation", "bone_fracture_yolo"):
+                results = self.model(image.bgr_array())
+            return [
+                (tuple(map(float, box.xyxy[0])), box.conf[0].item())
+                for result in results
+                for box in result.boxes
+            ]
+
+        # Overlapping tiles at full resolution, so small fractures are not
+        # lost to the detector's downscaling
+        detections = []
+        with timed_stage("segmentation", "bone_fracture_yolo"):
+            for boxes, crops in iter_tile_batches(image, config):
+                results = self.model(
+                    [np.ascontiguousarray(crop[:, :, ::-1]) for crop in crops],
+                    imgsz=config["tile_size"],
+                )
+                for (left, top, _, _), result in zip(boxes, results):
+                    for box in result.boxes:
+                        x1, y1, x2, y2 = map(float, box.xyxy[0])
+                        detections.append(
+                            ((x1 + left, y1 + top, x2 + left, y2 + top), box.conf[0].item())
+                        )
+        keep = non_max_suppression(
+            [box for box, _ in detections],
+            [conf for _, conf in detections],
+            config["nms_iou"],
+        )
+        return [detections[i] for i in keep]
+
+    def predict(self, image, conf_threshold=0.01):
+        if isinstance(image, str):
+            image = DecodedImage.from_path(image)
 
-        # Run inference
-        results = self.model(image_path)
+        detections = self.detect(image)
+
+        # RGB copy for visualization
+        image = image.rgb_array().copy()
 
         max_conf = 0
         best_box = None
 
-        # Loop through detected objects to find the highest confidence box
-        for result in results:
-            for box in result.boxes:
-                conf = box.conf[0].item()
-                if conf > max_conf:
-                    max_conf = conf
-                    best_box = box
+        # Find the highest confidence box
+        for box, conf in detections:
+            if conf > max_conf:
+                max_conf = conf
+                best_box = box
 
         # Draw only the highest confidence bounding box
         if best_box is not None:
-            x1, y1, x2, y2 = map(int, best_box.xyxy[0])
+            x1, y1, x2, y2 = map(int, best_box)
             cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
             cv2.putText(image, f"Fracture: {max_conf:.2f}", (x1, y1 - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
         # Convert image to base64
-        _, buffer = cv2.imencode('.png', cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
-        image_base64 = base64.b64encode(buffer).decode('utf-8')
+        with timed_stage("mask_encoding"):
+            _, buffer = cv2.imencode('.png', cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+            image_base64 = base64.b64encode(buffer).decode('utf-8')
 
         return image_base64
 
-yolo_model = YOLOModel()
+registry.register("bone_fracture_yolo", YOLOModel)
+
+
+def get_yolo_model():
+    return registry.get("bone_fracture_yolo")
+
 
 def bone_fracture_segment(image_path):
-    return yolo_model.predict(image_path)
+    return get_yolo_model().predict(image_path)
 
 
 
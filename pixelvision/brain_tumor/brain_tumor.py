@@ -1,18 +1,85 @@
 import base64
 import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import tensorflow as tf
 import torch
+from django.conf import settings
 from PIL import Image
 from torchvision import transforms
 
-from brain_tumor.model import tumor_model
+from brain_tumor.model import TumorDetectionModel
+from inference.backends import ModelSpec, load_backend, register_spec
+from inference.image import DecodedImage
+from inference.metrics import record_stage, timed_stage
+from inference.registry import estimate_model_bytes, registry
 
 # Define the model paths
 CLASSIFICATION_MODEL_PATH = "models/brain_tumor/tumor_model_statedict_f.pth"
 SEGMENTATION_MODEL_PATH = "models/brain_tumor/unet_model.h5"
 
+CLASS_NAMES = {
+    0: "Glioma Tumor",
+    1: "Meningioma Tumor",
+    2: "No Tumor",
+    3: "Pituitary Tumor",
+}
+
+
+def load_classification_model(path):
+    tumor_model = TumorDetectionModel()
+    tumor_model.load_state_dict(torch.load(path, map_location=torch.device("cpu")))
+    tumor_model.eval()
+    return tumor_model
+
+
+def load_segmentation_model(path):
+    return tf.keras.models.load_model(
+        path, custom_objects={"conv2d_transpose": tf.keras.layers.Conv2DTranspose}
+    )
+
+
+classification_transform = transforms.Compose(
+    [transforms.Resize((224, 224)), transforms.ToTensor()]
+)
+
+
+def classification_input(image):
+    return image.cached(
+        "brain_tumor_classifier_input",
+        lambda: classification_transform(image.pil).unsqueeze(0).numpy(),
+    )
+
+
+def segmentation_input(image):
+    # PIL's default bicubic resize to 128x128
+    return image.tensor((128, 128), resample=Image.Resampling.BICUBIC)
+
+
+classification_spec = register_spec(
+    ModelSpec(
+        "brain_tumor_classifier",
+        "torch",
+        CLASSIFICATION_MODEL_PATH,
+        (3, 224, 224),
+        loader=load_classification_model,
+        preprocess=classification_input,
+    )
+)
+segmentation_spec = register_spec(
+    ModelSpec(
+        "brain_tumor_segmentation",
+        "keras",
+        SEGMENTATION_MODEL_PATH,
+        (128, 128, 3),
+        loader=load_segmentation_model,
+        preprocess=segmentation_input,
+    )
+)
+
 
 class MultiTaskModelWrapper:
     def __init__(self):
@@ -21,74 +88,105 @@ class MultiTaskModelWrapper:
 
     def load_segmentation_model(self):
         # Load the pre-trained U-Net model
-        model = tf.keras.models.load_model(
-            SEGMENTATION_MODEL_PATH,
-            custom_objects={"conv2d_transpose": tf.keras.layers.Conv2DTranspose},
-        )
-        return model
+        return load_backend(segmentation_spec)
 
     def load_classification_model(self):
         # Load the pre-trained Classification model
-        tumor_model.load_state_dict(
-            torch.load(CLASSIFICATION_MODEL_PATH, map_location=torch.device("cpu"))
-        )
-        tumor_model.eval()
-        return tumor_model
+        return load_backend(classification_spec)
 
-    def predict(self, image):
-        # Classification prediction
-        transform = transforms.Compose(
-            [transforms.Resize((224, 224)), transforms.ToTensor()]
+    def memory_bytes(self):
+        return estimate_model_bytes(self.segmentation_model) + estimate_model_bytes(
+            self.classification_model
         )
-        img_tensor = transform(image).unsqueeze(0)
-
-        with torch.no_grad():
-            classification_output = self.classification_model(img_tensor)
 
+    def classify(self, image):
+        """Tumor class name and its probability"""
+        classification_output = torch.from_numpy(
+            self.classification_model.predict(classification_input(image))
+        )
         class_probabilities = torch.nn.functional.softmax(classification_output, dim=1)
         class_label = torch.argmax(class_probabilities).item()
         probability = class_probabilities[0, class_label].item()
+        return CLASS_NAMES[class_label], probability
+
+    def segment(self, image):
+        """Binary tumor mask as a uint8 array"""
+        segmentation_output = self.segmentation_model.predict(segmentation_input(image))
+        return (segmentation_output > 0.5).astype(np.uint8)[0, :, :, 0] * 255
+
+    def predict(self, image, gate=None):
+        """Classify and segment an image, returning the mask, class name and probability.
+
+        The two models are independent, so without a ``gate`` segmentation
+        runs on the shared pool while classification runs on the calling
+        thread. With a ``gate``, classification runs first and segmentation
+        only runs when ``gate(class_name, probability)`` returns true,
+        otherwise the mask is None.
+        """
+        if not isinstance(image, DecodedImage):
+            image = DecodedImage(image.convert("RGB"))
+
+        segmentation = None
+        if gate is None:
+            segmentation = segmentation_pool().submit(timed_call, self.segment, image)
+
+        with timed_stage("specialist", classification_spec.name):
+            class_name, probability = self.classify(image)
+
+        if segmentation is None:
+            if not gate(class_name, probability):
+                return None, class_name, probability
+            with timed_stage("segmentation", segmentation_spec.name):
+                segmentation_mask = self.segment(image)
+        else:
+            # Stage timings are collected per thread, the pool's are added here
+            segmentation_mask, seconds = segmentation.result()
+            record_stage("segmentation", seconds, segmentation_spec.name)
+
+        with timed_stage("mask_encoding"):
+            mask_image_base64 = self.encode_mask(segmentation_mask)
+
+        return mask_image_base64, class_name, probability
+
+    def encode_mask(self, segmentation_mask):
+        mask_image = Image.fromarray(segmentation_mask.astype(np.uint8))
+        buffer = io.BytesIO()
+        mask_image.save(buffer, format="PNG")
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
-        class_names = {
-            0: "Glioma Tumor",
-            1: "Meningioma Tumor",
-            2: "No Tumor",
-            3: "Pituitary Tumor",
-        }
 
-        # Segmentation prediction
-        img_array = np.array(image.resize((128, 128)))
-        img_array = np.expand_dims(img_array, axis=0) / 255.0
+def timed_call(function, *args):
+    start = time.perf_counter()
+    return function(*args), time.perf_counter() - start
 
-        segmentation_output = self.segmentation_model.predict(img_array)
-        segmentation_mask = (segmentation_output > 0.5).astype(np.uint8)[
-            0, :, :, 0
-        ] * 255
 
-        # Convert segmentation mask to base64
-        mask_image = Image.fromarray(segmentation_mask.astype(np.uint8))
-        buffer = io.BytesIO()
-        mask_image.save(buffer, format="PNG")
-        mask_image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+_pool = None
+_pool_lock = threading.Lock()
 
-        # Convert input image to base64
-        input_image_buffer = io.BytesIO()
-        image.save(input_image_buffer, format="PNG")
-        input_image_base64 = base64.b64encode(input_image_buffer.getvalue()).decode(
-            "utf-8"
-        )
 
-        return (
-            input_image_base64,
-            mask_image_base64,
-            class_names[class_label],
-            probability,
-        )
+def segmentation_pool():
+    """Threads running brain segmentations next to classification.
+
+    Bounded by ``BRAIN_TUMOR_SEGMENTATION_THREADS``, further studies wait for
+    a free thread.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, "BRAIN_TUMOR_SEGMENTATION_THREADS", 2),
+                thread_name_prefix="brain-segmentation",
+            )
+        return _pool
+
+
+# Both models are built on first use and shared through the model registry
+registry.register("brain_tumor_multitask", MultiTaskModelWrapper)
 
 
-# Initialize the model wrapper
-model_wrapper = MultiTaskModelWrapper()
+def get_model_wrapper():
+    return registry.get("brain_tumor_multitask")
 
 
-def predict(image):
-    return model_wrapper.predict(image)
+def predict(image, gate=None):
+    return get_model_wrapper().predict(image, gate)
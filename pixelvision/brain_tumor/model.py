@@ -81,4 +81,3 @@ class TumorDetectionModel(Base):
 
         return x
     
-tumor_model = TumorDetectionModel()
\ No newline at end of file
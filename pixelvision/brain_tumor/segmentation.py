@@ -6,11 +6,27 @@ import numpy as np
 import tensorflow as tf
 from PIL import Image
 
+from inference.backends import ModelSpec, load_backend, register_spec
+from inference.registry import registry
+
 # Define model path
 MODEL_PATH = "models/brain_tumor/unet_brain_mri_seg.hdf5"
 
-# Load model once globally
-unet_model = tf.keras.models.load_model(MODEL_PATH, compile=False)
+spec = register_spec(
+    ModelSpec(
+        "brain_tumor_unet",
+        "keras",
+        MODEL_PATH,
+        (256, 256, 3),
+        loader=lambda path: tf.keras.models.load_model(path, compile=False),
+        preprocess=lambda decoded: decoded.tensor(
+            (256, 256), resample=Image.Resampling.BICUBIC
+        ),
+    )
+)
+
+# Loaded on first use and shared through the model registry
+registry.register(spec.name, lambda: load_backend(spec))
 
 
 def mask_to_base64(mask_array):
@@ -30,11 +46,11 @@ def run_unet(image, output_format="base64"):
 
     # Preprocess image
     resized_image = image.resize((256, 256))
-    img_array = np.array(resized_image) / 255.0
+    img_array = np.array(resized_image, dtype=np.float32) / 255.0
     img_array = np.expand_dims(img_array, axis=0)
 
     # Predict
-    prediction = unet_model.predict(img_array)[0, :, :, 0]
+    prediction = registry.get(spec.name).predict(img_array)[0, :, :, 0]
 
     if output_format == "raw":
         return prediction
@@ -1,24 +1,97 @@
 import base64
-import sys
+import os
+from collections import Counter
+from functools import partial
 
 import numpy as np
-from keras.models import load_model
-from PIL import Image
-from tensorflow.keras.preprocessing import image
+from django.conf import settings
 
-from bone_fracture.bone_fracture import bone_fracture_segment
-from brain_tumor.brain_tumor import predict
-from lung_cancer.lung_cancer2 import segment_lung
+from inference.backends import ModelSpec, load_backend, register_spec
+from inference.batching import get_scheduler
+from inference.cascade import (
+    ALWAYS,
+    NO_MASK,
+    cascade_policy,
+    cascade_report,
+    should_segment,
+)
+from inference.dicom import is_dicom_file, load_series, series_frames, series_paths
+from inference.image import DecodedImage
+from inference.metrics import record_stage, timed_stage
+from inference.registry import registry
+
+# TensorFlow, Torch and Ultralytics are imported on first use by the stage
+# modules, so importing this module stays cheap until a model is needed.
 
 class_names = ["bone_fracture", "brain_tumor", "invalid", "lung_cancer"]
-items = {"brain_tumor": "./models/brain_tumor_vgg16.h5"}
+model_paths = {
+    "router": "./models/vgg16_medical_image_classifier.h5",
+    "brain_tumor": "./models/brain_tumor_vgg16.h5",
+    "lung_cancer": "./models/lung_cancer_vgg16.h5",
+    "bone_fracture": "./models/bone_fracture_vgg16.h5",
+    "breast_cancer": "./models/breast_cancer_vgg16.h5",
+}
+
+
+def load_keras_model(model_path):
+    from keras.models import load_model
+
+    return load_model(model_path)
+
+
+def vgg16_input(decoded):
+    """Router and specialist input, matching keras load_img(target_size=(224, 224))"""
+    return decoded.tensor((224, 224))
+
+
+for name, model_path in model_paths.items():
+    spec = register_spec(
+        ModelSpec(
+            name,
+            "keras",
+            model_path,
+            (224, 224, 3),
+            loader=load_keras_model,
+            preprocess=vgg16_input,
+        )
+    )
+    registry.register(name, partial(load_backend, spec), pinned=name == "router")
+
+
+def get_lung_segmenter():
+    from lung_cancer.lung_cancer2 import DEFAULT_MODEL_PATH, get_segmentation_engine
+
+    return get_segmentation_engine(
+        getattr(settings, "LUNG_SEGMENTATION_MODEL_PATH", DEFAULT_MODEL_PATH)
+    )
+
+
+def warmup():
+    """Load and warm every model used by classify_image."""
+    from bone_fracture.bone_fracture import get_yolo_model
+    from brain_tumor.brain_tumor import get_model_wrapper
+
+    # The router serves every request, then lung cases are the most common
+    registry.get("router")
+    get_lung_segmenter().warmup()
+    registry.get("lung_cancer")
+    registry.get("bone_fracture")
+    get_model_wrapper()
+    get_yolo_model()
 
-model = load_model("./models/vgg16_medical_image_classifier.h5")
 
 threshold = 0.005
 
 
+def model_predict(name, img):
+    """Predict with a registered model, batched with concurrent requests."""
+    scheduler = get_scheduler(name, lambda batch: registry.get(name).predict(batch))
+    return scheduler.submit(img)
+
+
 def resize_image(image_path):
+    from tensorflow.keras.preprocessing import image
+
     img = image.load_img(image_path, target_size=(200, 200))
     img = image.img_to_array(img)
     img = np.expand_dims(img, axis=0)
@@ -32,65 +105,190 @@ def convert_to_base64(image_path):
         return base64.b64encode(img_file.read()).decode("utf-8")
 
 
-def classify_image(image_path):
-    image_path = "." + image_path
-    # Load and preprocess the image
-    try:
-        img = image.load_img(image_path, target_size=(224, 224))
-    except:
-        img = image.load_img("./_internal/" + image_path, target_size=(224, 224))
+def media_path(image_url):
+    """Local path of an uploaded file from its media URL."""
+    image_path = "." + image_url
+    if os.path.exists(image_path):
+        return image_path
+    return "./_internal/" + image_path
 
-    img = image.img_to_array(img)
-    img = np.expand_dims(img, axis=0)
-    img = img / 255.0  # Normalize pixel values to [0, 1]
 
-    predictions = model.predict(img)
-    predicted_index = np.argmax(predictions)
-    predicted_class = class_names[predicted_index]
+def load_image(image_path):
+    """Decode an uploaded image from its media URL."""
+    return DecodedImage.from_path(media_path(image_path))
 
-    mask_img = convert_to_base64(image_path)
 
-    print(predicted_class)
-    if predicted_class == "brain_tumor":
-        img = Image.open(image_path).convert("RGB")
-        input_image_base64, mask_img, predicted_class, result = predict(img)
-    elif predicted_class == "lung_cancer":
-        result = detect_lung_cancer(img)
-        mask_img = segment_lung(image_path)
-    elif predicted_class == "bone_fracture":
-        result = detect_bone_fracture(img)
-        print(result)
-        if result > 0.6:
-            mask_img = bone_fracture_segment(image_path)
+def classify_image(decoded):
+    """Classify a ``DecodedImage``, or an image given by its media URL."""
+    return classify_batch([decoded])[0]
+
+
+def classify_batch(images):
+    """Classify several images, running the router and specialists on whole batches.
+
+    Takes ``DecodedImage`` objects or media URLs and returns one
+    ``(predicted_class, result, mask_img, cascade)`` tuple per image, in order.
+    DICOM uploads are classified per series. Segmentation still runs image by
+    image.
+    """
+    outputs = {}
+    decoded_images = {}
+    for index, image in enumerate(images):
+        if isinstance(image, str):
+            path = media_path(image)
+            if is_dicom_file(path):
+                outputs[index] = classify_dicom(path)
+                continue
+            image = DecodedImage.from_path(path)
+        decoded_images[index] = image
+
+    if decoded_images:
+        indices = list(decoded_images)
+        routed = route_batch([decoded_images[i] for i in indices])
+        for index, (decoded, predicted_class, result) in zip(indices, routed):
+            outputs[index] = finish_classification(decoded, predicted_class, result)
+    return [outputs[index] for index in range(len(images))]
+
+
+def route_batch(images):
+    """Run the router and specialists on whole batches of decoded images.
+
+    Returns ``(decoded, predicted_class, score)`` per image. The score is the
+    specialist's, or the router's confidence for classes whose specialist
+    runs later or is skipped by their cascade policy.
+    """
+    for decoded in images:
+        if decoded.decode_seconds is not None:
+            record_stage("decode", decoded.decode_seconds)
+
+    with timed_stage("preprocess"):
+        inputs = [vgg16_input(decoded) for decoded in images]
+
+    with timed_stage("router", "router"):
+        predictions = model_predict("router", np.concatenate(inputs))
+    routes = np.argmax(predictions, axis=1)
+    predicted_classes = [class_names[i] for i in routes]
+    scores = {i: float(predictions[i, route]) for i, route in enumerate(routes)}
+
+    # One specialist batch per class, brain tumors go through the multitask model
+    for name in ("lung_cancer", "bone_fracture"):
+        indices = [i for i, label in enumerate(predicted_classes) if label == name]
+        if not indices or not cascade_policy(name)["specialist"]:
+            continue
+        with timed_stage("specialist", name):
+            batch = np.concatenate([inputs[i] for i in indices])
+            scores.update(zip(indices, model_predict(name, batch)[:, 0]))
+
+    return [
+        (images[i], predicted_classes[i], scores.get(i)) for i in range(len(images))
+    ]
+
+
+def classify_series(frames):
+    """One result for the frames of a series.
+
+    All frames are routed in one batch. The class with most votes among the
+    valid frames wins, and only its highest scoring frame is segmented.
+    """
+    routed = route_batch(frames)
+    votes = Counter(label for _, label, _ in routed if label != "invalid")
+    if not votes:
+        return finish_classification(frames[len(frames) // 2], "invalid", None)
+
+    predicted_class = votes.most_common(1)[0][0]
+    candidates = [entry for entry in routed if entry[1] == predicted_class]
+    decoded, _, result = max(
+        candidates, key=lambda entry: -1 if entry[2] is None else entry[2]
+    )
+    return finish_classification(decoded, predicted_class, result)
+
+
+def classify_dicom(path):
+    """Classify the DICOM series stored alongside ``path``."""
+    with timed_stage("dicom_read"):
+        instances = load_series(series_paths(path))
+        frames = series_frames(instances)
+    return classify_series(frames)
+
+
+def skipped_mask(decoded, policy):
+    """Image returned in place of a mask that the cascade did not make."""
+    if policy is not None and policy["skipped_mask"] == NO_MASK:
+        return None
+    with timed_stage("mask_encoding"):
+        return base64.b64encode(decoded.data).decode("utf-8")
+
+
+def finish_classification(decoded, predicted_class, result):
+    """Segment and label one image once the router and specialist have run.
+
+    What else runs is decided by the class's cascade policy, which is
+    reported with the result.
+    """
+    if predicted_class not in ("brain_tumor", "lung_cancer", "bone_fracture"):
+        return "Invalid", 0.1, skipped_mask(decoded, None), None
+
+    policy = cascade_policy(predicted_class)
+    specialist = policy["specialist"]
+    mask_img = None
+    if predicted_class == "brain_tumor" and specialist:
+        from brain_tumor.brain_tumor import predict
+
+        gate = None
+        if policy["segment"] != ALWAYS:
+            gate = partial(gated_segmentation, policy)
+        mask_img, predicted_class, result = predict(decoded, gate)
+        segmented = mask_img is not None
     else:
-        return "Invalid", 0.1, mask_img
+        segmented = should_segment(policy, result)
+        if segmented:
+            mask_img = segment(predicted_class, decoded)
 
+    if not segmented:
+        mask_img = skipped_mask(decoded, policy)
     predicted_class = predicted_class.replace("_", " ")
     predicted_class = predicted_class.title()
     result = round(result, 3)
-    return predicted_class, result, mask_img
+    cascade = cascade_report(policy, specialist, segmented)
+    return predicted_class, result, mask_img, cascade
+
+
+def gated_segmentation(policy, label, score):
+    return should_segment(policy, score, label)
+
+
+def segment(predicted_class, decoded):
+    """Mask of the segmentation stage of a routed class, as base64 PNG."""
+    if predicted_class == "brain_tumor":
+        from brain_tumor.brain_tumor import get_model_wrapper
+
+        wrapper = get_model_wrapper()
+        with timed_stage("segmentation", "brain_tumor_segmentation"):
+            mask = wrapper.segment(decoded)
+        with timed_stage("mask_encoding"):
+            return wrapper.encode_mask(mask)
+    if predicted_class == "lung_cancer":
+        return get_lung_segmenter().segment(decoded)
+    from bone_fracture.bone_fracture import bone_fracture_segment
+
+    return bone_fracture_segment(decoded)
 
 
 def detect_brain_tumor(img):
-    model = load_model("./models/brain_tumor_vgg16.h5")
-    prediction = model.predict(img)
-    print("bt : ", prediction)
+    prediction = model_predict("brain_tumor", img)
     return prediction[0][0]
 
 
 def detect_lung_cancer(img):
-    model = load_model("./models/lung_cancer_vgg16.h5")
-    prediction = model.predict(img)
+    prediction = model_predict("lung_cancer", img)
     return prediction[0][0]
 
 
 def detect_bone_fracture(img):
-    model = load_model("./models/bone_fracture_vgg16.h5")
-    prediction = model.predict(img)
+    prediction = model_predict("bone_fracture", img)
     return prediction[0][0]
 
 
 def detect_breast_cancer(img):
-    model = load_model("./models/breast_cancer_vgg16.h5")
-    prediction = model.predict(img)
+    prediction = model_predict("breast_cancer", img)
     return prediction[0][0]
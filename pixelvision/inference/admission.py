@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from inference.metrics import metrics
+
+DEFAULT_ADMISSION = {
+    "max_in_flight": 4,
+    "max_queue": 32,
+    "max_per_user": 2,
+    "max_queued_per_user": 8,
+    "queue_timeout_seconds": 30,
+}
+
+admitted = metrics.counter(
+    "pixelvision_admission_admitted_total", "Inference requests admitted."
+)
+rejected = metrics.counter(
+    "pixelvision_admission_rejected_total", "Inference requests shed, by reason."
+)
+queue_wait_seconds = metrics.histogram(
+    "pixelvision_admission_queue_wait_seconds",
+    "Time admitted inference requests waited for a slot.",
+)
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed, ``retry_after`` is in whole seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Inference is overloaded ({reason}), retry later")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, user):
+        self.user = user
+        self.event = threading.Event()
+        self.admitted = False
+
+
+class AdmissionController:
+    """Bounds the inference running in this process.
+
+    At most ``max_in_flight`` requests run at once and ``max_per_user`` of
+    them for a single user. Up to ``max_queue`` more wait for a slot, no more
+    than ``max_queued_per_user`` per user, and free slots are handed out
+    round-robin across the waiting users, so one user with many requests
+    cannot starve the others. Requests beyond these limits, or that waited
+    ``queue_timeout_seconds`` without a slot, are rejected with ``Overloaded``.
+    """
+
+    def __init__(
+        self,
+        max_in_flight=4,
+        max_queue=32,
+        max_per_user=2,
+        max_queued_per_user=8,
+        queue_timeout_seconds=30,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.max_queued_per_user = max_queued_per_user
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = {}  # user -> requests in flight
+        self._queues = OrderedDict()  # user -> waiters, in round-robin order
+        self._queued = 0
+        self._service_seconds = None  # moving average of request duration
+
+    @contextmanager
+    def admit(self, user):
+        started = time.perf_counter()
+        waiter = None
+        with self._lock:
+            if user not in self._queues and self._has_slot(user):
+                self._start(user)
+            elif self._queued >= self.max_queue:
+                self._reject("queue_full")
+            elif len(self._queues.get(user, ())) >= self.max_queued_per_user:
+                self._reject("user_queue_full")
+            else:
+                waiter = _Waiter(user)
+                self._queues.setdefault(user, deque()).append(waiter)
+                self._queued += 1
+
+        if waiter is not None and not waiter.event.wait(self.queue_timeout_seconds):
+            with self._lock:
+                if not waiter.admitted:
+                    self._remove(waiter)
+                    self._reject("timeout")
+
+        admitted.inc()
+        queue_wait_seconds.observe(time.perf_counter() - started)
+        running = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._finish(user, time.perf_counter() - running)
+                self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "max_per_user": self.max_per_user,
+                "users_waiting": len(self._queues),
+                "average_service_seconds": (
+                    round(self._service_seconds, 4)
+                    if self._service_seconds is not None
+                    else None
+                ),
+            }
+
+    def _has_slot(self, user):
+        return (
+            self._in_flight < self.max_in_flight
+            and self._running.get(user, 0) < self.max_per_user
+        )
+
+    def _start(self, user):
+        self._in_flight += 1
+        self._running[user] = self._running.get(user, 0) + 1
+
+    def _finish(self, user, seconds):
+        self._in_flight -= 1
+        self._running[user] -= 1
+        if not self._running[user]:
+            del self._running[user]
+        if self._service_seconds is None:
+            self._service_seconds = seconds
+        else:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * seconds
+
+    def _dispatch(self):
+        # One pass over the waiting users, each gets at most one freed slot
+        # and then moves to the back of the rotation
+        for user in list(self._queues):
+            if self._in_flight >= self.max_in_flight:
+                break
+            if not self._has_slot(user):
+                continue
+            queue = self._queues[user]
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            self._start(user)
+            waiter.admitted = True
+            waiter.event.set()
+
+    def _remove(self, waiter):
+        queue = self._queues[waiter.user]
+        queue.remove(waiter)
+        self._queued -= 1
+        if not queue:
+            del self._queues[waiter.user]
+
+    def _reject(self, reason):
+        rejected.inc(reason=reason)
+        # Time for the requests ahead to drain through the available slots
+        service = self._service_seconds or 1.0
+        retry_after = math.ceil(service * (self._queued + 1) / self.max_in_flight)
+        raise Overloaded(reason, max(1, retry_after))
+
+
+inference_admission = AdmissionController(
+    **dict(DEFAULT_ADMISSION, **getattr(settings, "INFERENCE_ADMISSION", {}))
+)
+
+
+def admission_gauge():
+    stats = inference_admission.stats()
+    return [({"state": state}, stats[state]) for state in ("in_flight", "queued")]
+
+
+metrics.gauge(
+    "pixelvision_admission_requests",
+    "Inference requests running or waiting for a slot, by state.",
+    admission_gauge,
+)
@@ -0,0 +1,176 @@
+import os
+
+import numpy as np
+from django.conf import settings
+
+from inference.registry import estimate_model_bytes
+
+NATIVE = "native"
+ONNX = "onnx"
+
+FP32 = "fp32"
+INT8 = "int8"
+
+ONNX_MODELS_DIR = "models/onnx"
+
+
+class ModelSpec:
+    """How to load, feed and export one model.
+
+    ``loader`` builds the model in its own framework from ``path``, and
+    ``preprocess`` turns a ``DecodedImage`` into the model's (1, ...) input.
+    ``input_shape`` excludes the batch dimension.
+    """
+
+    def __init__(self, name, framework, path, input_shape, loader, preprocess=None):
+        self.name = name
+        self.framework = framework
+        self.path = path
+        self.input_shape = tuple(input_shape)
+        self.loader = loader
+        self.preprocess = preprocess
+
+    @property
+    def onnx_path(self):
+        return os.path.join(ONNX_MODELS_DIR, f"{self.name}.onnx")
+
+    @property
+    def int8_path(self):
+        return os.path.join(ONNX_MODELS_DIR, f"{self.name}.int8.onnx")
+
+    def dummy_input(self, batch_size=1):
+        return np.zeros((batch_size,) + self.input_shape, dtype=np.float32)
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, inputs):
+        return self.model.predict(inputs, verbose=0)
+
+    def memory_bytes(self):
+        return estimate_model_bytes(self.model)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, module):
+        self.module = module.eval()
+
+    def predict(self, inputs):
+        import torch
+
+        with torch.no_grad():
+            outputs = self.module(torch.from_numpy(np.asarray(inputs, dtype=np.float32)))
+        return outputs.numpy()
+
+    def memory_bytes(self):
+        return estimate_model_bytes(self.module)
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = getattr(settings, "ONNX_INTRA_OP_THREADS", 0)
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, inputs):
+        feed = {self.input_name: np.asarray(inputs, dtype=np.float32)}
+        return self.session.run(None, feed)[0]
+
+    def memory_bytes(self):
+        return os.path.getsize(self.path)
+
+
+NATIVE_BACKENDS = {"keras": KerasBackend, "torch": TorchBackend}
+
+specs = {}
+
+
+def register_spec(spec):
+    specs[spec.name] = spec
+    return spec
+
+
+def backend_for(name):
+    """Backend configured for a model in ``INFERENCE_BACKENDS``."""
+    configured = getattr(settings, "INFERENCE_BACKENDS", {})
+    return configured.get(name, configured.get("default", NATIVE))
+
+
+def precision_for(name):
+    """Precision configured for a model in ``INFERENCE_PRECISION``."""
+    configured = getattr(settings, "INFERENCE_PRECISION", {})
+    return configured.get(name, configured.get("default", FP32))
+
+
+def framework_threads(framework):
+    """Intra-op threads for a framework, ``FRAMEWORK_THREADS`` or half the cores"""
+    configured = getattr(settings, "FRAMEWORK_THREADS", {})
+    return configured.get(framework) or max(1, (os.cpu_count() or 1) // 2)
+
+
+_configured_frameworks = set()
+
+
+def configure_framework_threads(framework):
+    """Bound a framework's thread pool once, before its first model loads.
+
+    TensorFlow and Torch each default to a thread per core, which
+    oversubscribes the CPU when models of both run at the same time.
+    """
+    if framework in _configured_frameworks:
+        return
+    _configured_frameworks.add(framework)
+    threads = framework_threads(framework)
+    if framework == "keras":
+        import tensorflow as tf
+
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+        except RuntimeError:
+            pass  # the runtime already started with its own settings
+    elif framework == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def load_native(spec):
+    configure_framework_threads(spec.framework)
+    return NATIVE_BACKENDS[spec.framework](spec.loader(spec.path))
+
+
+def load_backend(spec):
+    """Load a model with the backend and precision selected for it in settings.
+
+    INT8 models always run on ONNX Runtime from the quantized export.
+    """
+    if precision_for(spec.name) == INT8:
+        if not os.path.exists(spec.int8_path):
+            raise FileNotFoundError(
+                f"{spec.int8_path} not found, run 'manage.py quantize_models {spec.name}'"
+            )
+        return OnnxBackend(spec.int8_path)
+    if backend_for(spec.name) == ONNX:
+        if not os.path.exists(spec.onnx_path):
+            raise FileNotFoundError(
+                f"{spec.onnx_path} not found, run 'manage.py export_onnx {spec.name}'"
+            )
+        return OnnxBackend(spec.onnx_path)
+    return load_native(spec)
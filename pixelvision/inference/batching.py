@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+DEFAULT_BATCHING = {"max_batch_size": 8, "max_wait_ms": 5}
+
+
+def batching_config(name):
+    """Batching limits for a model, settings overrides win over the defaults."""
+    configured = getattr(settings, "INFERENCE_BATCHING", {})
+    config = dict(DEFAULT_BATCHING)
+    config.update(configured.get("default", {}))
+    config.update(configured.get(name, {}))
+    return config
+
+
+class _Request:
+    __slots__ = ("inputs", "future", "enqueued")
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class BatchScheduler:
+    """Gathers concurrent predict calls for one model into batches.
+
+    Callers submit arrays with a leading batch dimension and block until their
+    own slice of the batched output is ready. A background thread waits for
+    the first request, then keeps collecting until either ``max_batch_size``
+    rows are queued or ``max_wait_ms`` has passed, and runs ``predict_fn``
+    once for the whole batch.
+    """
+
+    def __init__(self, name, predict_fn, max_batch_size=8, max_wait_ms=5):
+        self.name = name
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, inputs):
+        """Run ``inputs`` through the model as part of a batch and return the output."""
+        request = _Request(np.asarray(inputs))
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future.result()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "average_batch_size": (
+                    round(self._rows / self._batches, 2) if self._batches else 0.0
+                ),
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "average_queue_wait_ms": (
+                    round(self._wait_total / self._requests * 1000, 3)
+                    if self._requests
+                    else 0.0
+                ),
+                "max_queue_wait_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"batcher-{self.name}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0].inputs)
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while rows < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request.inputs)
+            self._dispatch(batch, rows)
+
+    def _dispatch(self, batch, rows):
+        started = time.perf_counter()
+        try:
+            if len(batch) == 1:
+                outputs = self.predict_fn(batch[0].inputs)
+            else:
+                outputs = self.predict_fn(np.concatenate([r.inputs for r in batch]))
+        except Exception as exc:
+            for request in batch:
+                request.future.set_exception(exc)
+        else:
+            offset = 0
+            for request in batch:
+                size = len(request.inputs)
+                request.future.set_result(outputs[offset : offset + size])
+                offset += size
+
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._rows += rows
+            self._batch_sizes[rows] = self._batch_sizes.get(rows, 0) + 1
+            for request in batch:
+                wait = started - request.enqueued
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(name, predict_fn):
+    """Shared scheduler for ``name``, created with its configured limits on first use."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None:
+            config = batching_config(name)
+            scheduler = BatchScheduler(
+                name,
+                predict_fn,
+                max_batch_size=config["max_batch_size"],
+                max_wait_ms=config["max_wait_ms"],
+            )
+            _schedulers[name] = scheduler
+        return scheduler
+
+
+def batching_stats():
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {scheduler.name: scheduler.stats() for scheduler in schedulers}
@@ -0,0 +1,256 @@
+import base64
+import io
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+from django.conf import settings
+
+from inference.image import DecodedImage
+from inference.onnx_export import TEST_IMAGES_DIR
+from inference.registry import registry
+from inference.versions import pipeline_version
+
+PERCENTILES = (50, 95, 99)
+BATCHED_MODELS = ("router", "lung_cancer", "bone_fracture", "brain_tumor")
+
+
+def load_test_images(images_dir=TEST_IMAGES_DIR):
+    """Raw bytes of every test image, keyed by file name."""
+    images = {}
+    for name in sorted(os.listdir(images_dir)):
+        with open(os.path.join(images_dir, name), "rb") as image_file:
+            images[name] = image_file.read()
+    return images
+
+
+def encode_mask(decoded):
+    """PNG and base64 encoding, as done for every mask returned to clients."""
+    buffer = io.BytesIO()
+    decoded.pil.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def pipeline_stages():
+    """Benchmarked stages, each called with a freshly decoded image.
+
+    ``classify_image`` comes last so the cold latency of every other stage
+    includes loading its model.
+    """
+    import image_classification as ic
+    from bone_fracture.bone_fracture import get_yolo_model
+    from brain_tumor.brain_tumor import get_model_wrapper
+
+    def specialist(name):
+        return lambda decoded: ic.model_predict(name, ic.vgg16_input(decoded))
+
+    return {
+        "router": specialist("router"),
+        "lung_cancer": specialist("lung_cancer"),
+        "bone_fracture": specialist("bone_fracture"),
+        "brain_tumor": specialist("brain_tumor"),
+        "brain_tumor_multitask": lambda decoded: get_model_wrapper().predict(decoded),
+        "lung_segmentation": lambda decoded: ic.get_lung_segmenter().segment(decoded),
+        "bone_fracture_yolo": lambda decoded: get_yolo_model().predict(decoded),
+        "mask_encoding": encode_mask,
+        "classify_image": ic.classify_image,
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(latencies_ms):
+    latencies = np.asarray(latencies_ms)
+    summary = {
+        "runs": len(latencies),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "max_ms": round(float(latencies.max()), 3),
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_ms"] = round(
+            float(np.percentile(latencies, percentile)), 3
+        )
+    return summary
+
+
+def benchmark_stage(stage, images, iterations):
+    """Latency of the first call, then warm percentiles over ``iterations`` passes."""
+    payloads = list(images.values())
+    cold_ms = timed(stage, DecodedImage.from_bytes(payloads[0]))
+
+    warm = []
+    for _ in range(iterations):
+        for data in payloads:
+            decoded = DecodedImage.from_bytes(data)
+            warm.append(timed(stage, decoded))
+    return {"cold_ms": round(cold_ms, 3), "warm": summarize(warm)}
+
+
+def benchmark_concurrency(stage, images, concurrency, iterations):
+    """Images per second with ``concurrency`` requests in flight."""
+    payloads = list(images.values()) * iterations
+
+    def run(data):
+        return timed(stage, DecodedImage.from_bytes(data))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(run, payloads))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "images_per_second": round(len(payloads) / elapsed, 3),
+        "latency": summarize(latencies),
+    }
+
+
+def benchmark_batch_size(name, images, batch_size, iterations):
+    """Images per second when ``batch_size`` inputs reach the model at once."""
+    import image_classification as ic
+
+    model = registry.get(name)
+    inputs = [
+        ic.vgg16_input(DecodedImage.from_bytes(data)) for data in images.values()
+    ]
+    batch = np.concatenate([inputs[i % len(inputs)] for i in range(batch_size)])
+    model.predict(batch)
+
+    latencies = [timed(model.predict, batch) for _ in range(iterations)]
+    return {
+        "batch_size": batch_size,
+        "images_per_second": round(batch_size * 1000 / np.mean(latencies), 3),
+        "latency": summarize(latencies),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def run_benchmark(
+    images_dir=TEST_IMAGES_DIR,
+    stages=None,
+    iterations=5,
+    concurrency_levels=(1, 2, 4, 8),
+    batch_sizes=(1, 4, 8, 16),
+    log=None,
+):
+    """Benchmark the pipeline stages and return a JSON serializable report."""
+    images = load_test_images(images_dir)
+    available = pipeline_stages()
+    stages = stages or list(available)
+    log = log or (lambda message: None)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "pipeline_version": pipeline_version(),
+        "backends": getattr(settings, "INFERENCE_BACKENDS", {}),
+        "precision": getattr(settings, "INFERENCE_PRECISION", {}),
+        "host": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "images": len(images),
+        "iterations": iterations,
+        "stages": {},
+        "concurrency": [],
+        "batch_sizes": {},
+    }
+
+    for name in stages:
+        log(f"stage {name}")
+        report["stages"][name] = benchmark_stage(available[name], images, iterations)
+
+    if "classify_image" in stages:
+        for concurrency in concurrency_levels:
+            log(f"classify_image at concurrency {concurrency}")
+            report["concurrency"].append(
+                benchmark_concurrency(
+                    available["classify_image"], images, concurrency, iterations
+                )
+            )
+
+    for name in BATCHED_MODELS:
+        if name not in stages:
+            continue
+        log(f"{name} batch sizes")
+        report["batch_sizes"][name] = [
+            benchmark_batch_size(name, images, batch_size, iterations)
+            for batch_size in batch_sizes
+        ]
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def find_regressions(report, baseline, threshold=0.1):
+    """Metrics that are more than ``threshold`` worse than in ``baseline``.
+
+    Metrics measured in only one of the two runs are not compared.
+    """
+    regressions = []
+
+    def check(metric, current, previous, higher_is_better=False):
+        if not previous:
+            return
+        change = (current - previous) / previous
+        if higher_is_better:
+            change = -change
+        if change > threshold:
+            regressions.append(
+                {
+                    "metric": metric,
+                    "baseline": previous,
+                    "current": current,
+                    "change": round(change, 3),
+                }
+            )
+
+    for name, stage in report.get("stages", {}).items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            check(f"{name}.warm.{key}", stage["warm"][key], previous["warm"][key])
+
+    previous_concurrency = {
+        run["concurrency"]: run for run in baseline.get("concurrency", [])
+    }
+    for run in report.get("concurrency", []):
+        previous = previous_concurrency.get(run["concurrency"])
+        if previous is not None:
+            check(
+                f"classify_image.concurrency_{run['concurrency']}.images_per_second",
+                run["images_per_second"],
+                previous["images_per_second"],
+                higher_is_better=True,
+            )
+
+    for name, runs in report.get("batch_sizes", {}).items():
+        baseline_runs = baseline.get("batch_sizes", {}).get(name, [])
+        previous_runs = {run["batch_size"]: run for run in baseline_runs}
+        for run in runs:
+            previous = previous_runs.get(run["batch_size"])
+            if previous is not None:
+                check(
+                    f"{name}.batch_{run['batch_size']}.images_per_second",
+                    run["images_per_second"],
+                    previous["images_per_second"],
+                    higher_is_better=True,
+                )
+
+    if "peak_rss_mb" in baseline and "peak_rss_mb" in report:
+        check("peak_rss_mb", report["peak_rss_mb"], baseline["peak_rss_mb"])
+    return regressions
@@ -0,0 +1,74 @@
+from django.conf import settings
+
+ALWAYS = "always"
+GATED = "gated"
+NEVER = "never"
+
+ORIGINAL = "original"
+NO_MASK = "none"
+
+# Without INFERENCE_CASCADE the pipeline runs as it always has: every
+# specialist and segmenter runs, except fracture detection below 0.6.
+#   specialist    run the class's specialist model, or keep the router's score
+#   segment       "always", "never" or "gated" on the two conditions below
+#   min_score     segment only when the score is above this
+#   skip_labels   specialist labels that never need a mask, e.g. "No Tumor"
+#   skipped_mask  "original" returns the input image when no mask is made,
+#                 "none" returns no image at all
+DEFAULT_CASCADE = {
+    "default": {
+        "specialist": True,
+        "segment": ALWAYS,
+        "min_score": 0.0,
+        "skip_labels": [],
+        "skipped_mask": ORIGINAL,
+    },
+    "bone_fracture": {"segment": GATED, "min_score": 0.6},
+}
+
+
+def cascade_policy(predicted_class):
+    """Cascade for a routed class, settings overrides win over the defaults."""
+    configured = getattr(settings, "INFERENCE_CASCADE", {})
+    policy = dict(DEFAULT_CASCADE["default"])
+    policy.update(DEFAULT_CASCADE.get(predicted_class, {}))
+    policy.update(configured.get("default", {}))
+    policy.update(configured.get(predicted_class, {}))
+    return policy
+
+
+def cascade_policies():
+    """Policy of every routed class, part of the pipeline version."""
+    configured = getattr(settings, "INFERENCE_CASCADE", {})
+    classes = (set(DEFAULT_CASCADE) | set(configured)) - {"default"}
+    return {name: cascade_policy(name) for name in sorted(classes)}
+
+
+def should_segment(policy, score, label=None):
+    """Whether segmentation runs for a specialist ``score`` and ``label``."""
+    if policy["segment"] == NEVER:
+        return False
+    if policy["segment"] == ALWAYS:
+        return True
+    if label is not None and label in policy["skip_labels"]:
+        return False
+    return score is not None and score > policy["min_score"]
+
+
+def cascade_report(policy, specialist, segmented):
+    """What ran for one image, returned with its result."""
+    return {
+        "policy": policy,
+        "stages": {
+            "specialist": "ran" if specialist else "skipped",
+            "segmentation": "ran" if segmented else "skipped",
+        },
+    }
+
+
+def made_mask(cascade):
+    """Whether the pipeline segmented the image, rather than returning a stand-in.
+
+    Images classified as invalid have no cascade and no mask.
+    """
+    return cascade is not None and cascade["stages"]["segmentation"] == "ran"
@@ -0,0 +1,67 @@
+import json
+import socket
+
+
+class InferenceServerError(Exception):
+    pass
+
+
+class InferenceClient:
+    """Thin client for the inference server's UNIX socket.
+
+    Opens one connection per call, which is cheap for a local socket and
+    keeps web workers free of any long-lived state.
+    """
+
+    def __init__(self, socket_path, timeout=120):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def call(self, op, **params):
+        request = dict(params, op=op)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                raise InferenceServerError(
+                    f"Inference server unavailable at {self.socket_path}: {e}"
+                ) from e
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+
+        if not line:
+            raise InferenceServerError("Inference server closed the connection")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise InferenceServerError(response.get("error", "Unknown error"))
+        return response["result"]
+
+    def classify_image(self, image_path):
+        """Returns the predicted class, score, mask, cascade and per-stage timings."""
+        result = self.call("classify", image_path=image_path)
+        return (
+            result["predicted_class"],
+            result["result"],
+            result["mask_img"],
+            result.get("cascade"),
+            result.get("timings", {}),
+        )
+
+    def classify_batch(self, image_paths):
+        """Returns (predicted class, score, mask, cascade) per image and the timings."""
+        result = self.call("classify_batch", image_paths=image_paths)
+        outputs = [
+            (
+                output["predicted_class"],
+                output["result"],
+                output["mask_img"],
+                output.get("cascade"),
+            )
+            for output in result["outputs"]
+        ]
+        return outputs, result.get("timings", {})
+
+    def status(self):
+        return self.call("status")
@@ -0,0 +1,212 @@
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+from inference.image import DecodedImage
+
+DEFAULT_DICOM_INGEST = {"max_slices": 16, "max_dimension": 1024}
+
+# Pixel data of these transfer syntaxes is stored raw and can be memory-mapped
+UNCOMPRESSED_LITTLE_ENDIAN = {"1.2.840.10008.1.2", "1.2.840.10008.1.2.1"}
+PIXEL_DATA = 0x7FE00010
+UNDEFINED_LENGTH = 0xFFFFFFFF
+
+
+def dicom_ingest_config():
+    return dict(DEFAULT_DICOM_INGEST, **getattr(settings, "DICOM_INGEST", {}))
+
+
+def is_dicom(head):
+    """DICOM Part 10 files carry "DICM" after a 128 byte preamble"""
+    return len(head) >= 132 and head[128:132] == b"DICM"
+
+
+def is_dicom_file(path):
+    try:
+        with open(path, "rb") as dicom_file:
+            return is_dicom(dicom_file.read(132))
+    except OSError:
+        return False
+
+
+def _first(value, default=None):
+    """First item of a multi-valued header such as WindowCenter"""
+    if value is None:
+        return default
+    try:
+        return value[0]
+    except (TypeError, IndexError):
+        return value
+
+
+def read_header(source):
+    """Headers of a DICOM file or file object, without its pixel data"""
+    import pydicom
+
+    return pydicom.dcmread(source, stop_before_pixels=True)
+
+
+def dataset_metadata(dataset):
+    file_meta = getattr(dataset, "file_meta", None) or {}
+    return {
+        "modality": str(dataset.get("Modality", "")),
+        "series_uid": str(dataset.get("SeriesInstanceUID", "")),
+        "study_uid": str(dataset.get("StudyInstanceUID", "")),
+        "rows": int(dataset.get("Rows", 0)),
+        "columns": int(dataset.get("Columns", 0)),
+        "frames": int(dataset.get("NumberOfFrames", 1) or 1),
+        "transfer_syntax": str(file_meta.get("TransferSyntaxUID", "")),
+    }
+
+
+class DicomInstance:
+    """One DICOM file whose headers are read and whose pixels stay on disk.
+
+    Values larger than a few kilobytes, the pixel data above all, are not
+    read with the headers. Uncompressed pixel data is memory-mapped, so only
+    the rows of the frames that are used are ever read from disk.
+    """
+
+    def __init__(self, path):
+        import pydicom
+
+        self.path = path
+        self.dataset = pydicom.dcmread(path, defer_size="4 KB")
+        self._pixels = None
+
+    @property
+    def series_uid(self):
+        return str(self.dataset.get("SeriesInstanceUID", ""))
+
+    @property
+    def frames(self):
+        return int(self.dataset.get("NumberOfFrames", 1) or 1)
+
+    @property
+    def position(self):
+        """Sort key placing the slices of a series in anatomical order"""
+        position = self.dataset.get("ImagePositionPatient")
+        if position is not None and len(position) == 3:
+            return float(position[2])
+        location = self.dataset.get("SliceLocation")
+        if location is not None:
+            return float(location)
+        return float(self.dataset.get("InstanceNumber", 0) or 0)
+
+    def metadata(self):
+        return dataset_metadata(self.dataset)
+
+    def pixels(self):
+        """(frames, rows, columns[, samples]) array, memory-mapped when possible"""
+        if self._pixels is None:
+            self._pixels = self._memmap()
+            if self._pixels is None:
+                # Compressed pixel data has to be decoded by pydicom's handlers
+                import pydicom
+
+                array = pydicom.dcmread(self.path).pixel_array
+                self._pixels = array.reshape((self.frames,) + array.shape[-self._ndim():])
+        return self._pixels
+
+    def _ndim(self):
+        return 3 if int(self.dataset.get("SamplesPerPixel", 1)) > 1 else 2
+
+    def _memmap(self):
+        dataset = self.dataset
+        transfer_syntax = str(dataset.file_meta.get("TransferSyntaxUID", ""))
+        if transfer_syntax not in UNCOMPRESSED_LITTLE_ENDIAN:
+            return None
+        raw = dataset.get_item(PIXEL_DATA)
+        if raw is None or getattr(raw, "value_tell", None) is None:
+            return None
+        if raw.length == UNDEFINED_LENGTH:
+            return None
+
+        bits = int(dataset.BitsAllocated)
+        if bits not in (8, 16, 32):
+            return None
+        signed = int(dataset.get("PixelRepresentation", 0)) == 1
+        dtype = np.dtype(f"<{'i' if signed else 'u'}{bits // 8}")
+        samples = int(dataset.get("SamplesPerPixel", 1))
+        shape = (self.frames, int(dataset.Rows), int(dataset.Columns))
+        if samples > 1:
+            shape += (samples,)
+        return np.memmap(
+            self.path, dtype=dtype, mode="r", offset=raw.value_tell, shape=shape
+        )
+
+    def frame(self, index, max_dimension):
+        """One frame, windowed to 8 bits and decimated to at most ``max_dimension``.
+
+        Decimation happens on the memory-mapped array, so large frames are
+        read at the reduced resolution only.
+        """
+        start = time.perf_counter()
+        pixels = self.pixels()[index]
+        step = max(1, int(np.ceil(max(pixels.shape[:2]) / max_dimension)))
+        array = np.asarray(pixels[::step, ::step], dtype=np.float32)
+
+        dataset = self.dataset
+        slope = float(dataset.get("RescaleSlope", 1) or 1)
+        intercept = float(dataset.get("RescaleIntercept", 0) or 0)
+        array = array * slope + intercept
+
+        center = _first(dataset.get("WindowCenter"))
+        width = _first(dataset.get("WindowWidth"))
+        if center is not None and width:
+            low = float(center) - float(width) / 2
+            high = float(center) + float(width) / 2
+        else:
+            low, high = float(array.min()), float(array.max())
+        array = np.clip((array - low) / max(high - low, 1e-6), 0, 1)
+        if str(dataset.get("PhotometricInterpretation", "")) == "MONOCHROME1":
+            array = 1 - array
+
+        image = Image.fromarray((array * 255).astype(np.uint8))
+        name = f"{os.path.basename(self.path)}[{index}]"
+        return DecodedImage.from_pil(
+            image, name=name, decode_seconds=time.perf_counter() - start
+        )
+
+
+def load_series(paths):
+    """Instances of the DICOM files in ``paths``, in slice order"""
+    instances = [DicomInstance(path) for path in paths if is_dicom_file(path)]
+    return sorted(instances, key=lambda instance: instance.position)
+
+
+def series_paths(path):
+    """Every file of the series stored in the same directory as ``path``"""
+    directory = os.path.dirname(path)
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def select_frames(instances, max_slices):
+    """Evenly spaced (instance, frame) pairs, at most ``max_slices`` of them"""
+    frames = [
+        (instance, index)
+        for instance in instances
+        for index in range(instance.frames)
+    ]
+    if len(frames) <= max_slices:
+        return frames
+    picks = np.linspace(0, len(frames) - 1, max_slices).round().astype(int)
+    return [frames[i] for i in sorted(set(picks))]
+
+
+def series_frames(instances, max_slices=None, max_dimension=None):
+    """Decoded frames of a series to classify, read lazily from the memory maps"""
+    config = dicom_ingest_config()
+    max_slices = max_slices or config["max_slices"]
+    max_dimension = max_dimension or config["max_dimension"]
+    return [
+        instance.frame(index, max_dimension)
+        for instance, index in select_frames(instances, max_slices)
+    ]
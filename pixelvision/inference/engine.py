@@ -0,0 +1,85 @@
+import threading
+
+from inference.backends import ModelSpec, load_backend, register_spec
+from inference.batching import get_scheduler
+from inference.registry import registry
+
+
+class SegmentationEngine:
+    """Base class for segmenters whose model is loaded once and pre-warmed.
+
+    The model lives in the shared model registry, so it is reported with the
+    other resident models and may be evicted under memory pressure. Every load
+    runs a dummy tensor through the network so that graph tracing happens at
+    load time rather than on the first real request. The backend that runs
+    it is chosen per engine name in ``INFERENCE_BACKENDS``.
+    """
+
+    name = "segmentation"
+    framework = "keras"
+    input_shape = (256, 256, 3)
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.spec = register_spec(
+            ModelSpec(
+                self.name,
+                self.framework,
+                model_path,
+                self.input_shape,
+                loader=lambda path: self.load_model(),
+                preprocess=self.preprocess,
+            )
+        )
+        self.registry_name = f"{self.name}:{model_path}"
+        registry.register(self.registry_name, self._load_and_warm)
+
+    def load_model(self):
+        """Build the model in its own framework from ``model_path``."""
+        raise NotImplementedError
+
+    def preprocess(self, image):
+        """Model input for a ``DecodedImage``, with a batch dimension of 1."""
+        raise NotImplementedError
+
+    def _load_and_warm(self):
+        backend = load_backend(self.spec)
+        backend.predict(self.spec.dummy_input())
+        return backend
+
+    @property
+    def model(self):
+        return registry.get(self.registry_name)
+
+    def predict(self, inputs):
+        """Run ``inputs`` through the model, batched with concurrent callers."""
+        scheduler = get_scheduler(
+            self.registry_name, lambda batch: self.model.predict(batch)
+        )
+        return scheduler.submit(inputs)
+
+    def warmup(self):
+        """Load and warm the model ahead of the first request."""
+        self.model
+        return self
+
+    def segment(self, image):
+        """Segment a ``DecodedImage`` and return the mask as base64 PNG."""
+        raise NotImplementedError
+
+
+class EngineCache:
+    """One engine instance per model path, created on first use."""
+
+    def __init__(self, engine_class):
+        self.engine_class = engine_class
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_path):
+        with self._lock:
+            engine = self._engines.get(model_path)
+            if engine is None:
+                engine = self.engine_class(model_path)
+                self._engines[model_path] = engine
+            return engine
@@ -0,0 +1,110 @@
+import threading
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+
+class DecodedImage:
+    """An uploaded image decoded once and shared by every pipeline stage.
+
+    Holds the encoded bytes and a single RGB decode. Resized copies and
+    float32 model inputs are derived from it on demand and memoised, so the
+    router, specialists and segmenters never go back to disk or decode again.
+    """
+
+    def __init__(
+        self, pil_image, data=None, name=None, image_format=None, decode_seconds=None
+    ):
+        self.data = data
+        self.name = name
+        self.format = image_format or pil_image.format
+        self.pil = pil_image if pil_image.mode == "RGB" else pil_image.convert("RGB")
+        self.decode_seconds = decode_seconds
+        self._views = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data, name=None):
+        start = time.perf_counter()
+        with Image.open(BytesIO(data)) as img:
+            image_format = img.format
+            img.load()
+            pil_image = img.convert("RGB")
+        return cls(
+            pil_image,
+            data=data,
+            name=name,
+            image_format=image_format,
+            decode_seconds=time.perf_counter() - start,
+        )
+
+    @classmethod
+    def from_pil(cls, pil_image, name=None, decode_seconds=0.0):
+        """Wrap an image decoded elsewhere, such as a DICOM frame.
+
+        Keeps a PNG encoding as ``data`` for the stages that return the
+        original image.
+        """
+        start = time.perf_counter()
+        buffer = BytesIO()
+        pil_image.save(buffer, format="PNG")
+        return cls(
+            pil_image,
+            data=buffer.getvalue(),
+            name=name,
+            image_format="PNG",
+            decode_seconds=decode_seconds + time.perf_counter() - start,
+        )
+
+    @classmethod
+    def from_path(cls, path):
+        with open(path, "rb") as image_file:
+            return cls.from_bytes(image_file.read(), name=path)
+
+    @property
+    def size(self):
+        """(width, height) of the original image"""
+        return self.pil.size
+
+    def cached(self, key, factory):
+        """Memoise a derived view of the image under ``key``."""
+        with self._lock:
+            if key in self._views:
+                return self._views[key]
+        value = factory()
+        with self._lock:
+            return self._views.setdefault(key, value)
+
+    def rgb_array(self):
+        """uint8 (height, width, 3) array in RGB order"""
+        return self.cached("rgb", lambda: np.asarray(self.pil))
+
+    def bgr_array(self):
+        """uint8 (height, width, 3) array in BGR order, as OpenCV reads files"""
+        return self.cached(
+            "bgr", lambda: np.ascontiguousarray(self.rgb_array()[:, :, ::-1])
+        )
+
+    def resized(self, size, mode="RGB", resample=Image.Resampling.NEAREST):
+        """PIL copy resized to ``size`` (width, height) in ``mode``"""
+
+        def resize():
+            source = self.pil
+            if mode != "RGB":
+                source = self.cached(mode, lambda: self.pil.convert(mode))
+            return source.resize(size, resample)
+
+        return self.cached(("resized", size, mode, resample), resize)
+
+    def tensor(self, size, mode="RGB", resample=Image.Resampling.NEAREST):
+        """float32 (1, height, width, channels) model input scaled to [0, 1]"""
+
+        def build():
+            array = np.asarray(self.resized(size, mode, resample), dtype=np.float32)
+            if array.ndim == 2:
+                array = array[:, :, np.newaxis]
+            return np.expand_dims(array / np.float32(255.0), axis=0)
+
+        return self.cached(("tensor", size, mode, resample), build)
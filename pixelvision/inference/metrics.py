@@ -0,0 +1,262 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference.batching import batching_stats
+from inference.registry import registry
+
+# Seconds, from a few milliseconds for encoding up to slow cold loads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    "buckets": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(key, [("le", bound)])
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(key, [("le", "+Inf")])
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                labels = _format_labels(key)
+                lines.append(f"{self.name}_sum{labels} {series['sum']}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Gauge:
+    """Gauge read at scrape time from ``collect()``, a list of (labels, value)."""
+
+    def __init__(self, name, documentation, collect):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(_label_key(labels))} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation):
+        return self.add(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, documentation, buckets))
+
+    def gauge(self, name, documentation, collect):
+        return self.add(Gauge(name, documentation, collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+recognitions = metrics.counter(
+    "pixelvision_recognitions_total", "Images classified, by predicted class."
+)
+recognition_seconds = metrics.histogram(
+    "pixelvision_recognition_seconds",
+    "Wall-clock time of a recognition, by predicted class.",
+)
+stage_seconds = metrics.histogram(
+    "pixelvision_stage_seconds",
+    "Time spent in each pipeline stage, by stage, model and predicted class.",
+)
+model_loads = metrics.counter(
+    "pixelvision_model_loads_total", "Models loaded into the registry, by model."
+)
+model_load_seconds = metrics.histogram(
+    "pixelvision_model_load_seconds",
+    "Time taken to load a model, by model.",
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+model_evictions = metrics.counter(
+    "pixelvision_model_evictions_total", "Models evicted from the registry, by model."
+)
+chat_seconds = metrics.histogram(
+    "pixelvision_chat_seconds", "Duration of Ollama chat responses, by outcome."
+)
+chat_first_chunk_seconds = metrics.histogram(
+    "pixelvision_chat_first_chunk_seconds",
+    "Time until Ollama streamed its first chunk.",
+)
+
+metrics.gauge(
+    "pixelvision_batch_queue_depth",
+    "Inputs waiting in each model's batch scheduler.",
+    lambda: [
+        ({"model": name}, stats["queue_depth"])
+        for name, stats in batching_stats().items()
+    ],
+)
+metrics.gauge(
+    "pixelvision_model_resident_bytes",
+    "Estimated memory of each model resident in the registry.",
+    lambda: [
+        ({"model": entry["name"]}, entry["bytes"]) for entry in registry.resident()
+    ],
+)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def collect_timings():
+    """Collect the stages timed on this thread into a dict.
+
+    Each entry maps a stage to ``{"model": ..., "seconds": ...}``.
+    """
+    previous = getattr(_local, "timings", None)
+    timings = _local.timings = {}
+    try:
+        yield timings
+    finally:
+        _local.timings = previous
+
+
+def record_stage(stage, seconds, model=None):
+    """Add ``seconds`` to ``stage`` in the timings being collected, if any."""
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        return
+    entry = timings.setdefault(stage, {"model": model, "seconds": 0.0})
+    entry["seconds"] = round(entry["seconds"] + seconds, 6)
+
+
+@contextmanager
+def timed_stage(stage, model=None):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, model)
+
+
+def observe_recognition(predicted_class, seconds, timings):
+    """Publish a finished recognition and its stage timings."""
+    recognitions.inc(predicted_class=predicted_class)
+    recognition_seconds.observe(seconds, predicted_class=predicted_class)
+    for stage, entry in (timings or {}).items():
+        stage_seconds.observe(
+            entry["seconds"],
+            stage=stage,
+            model=entry.get("model") or "",
+            predicted_class=predicted_class,
+        )
+
+
+def observe_registry_event(event, name, seconds):
+    if event == "load":
+        model_loads.inc(model=name)
+        model_load_seconds.observe(seconds, model=name)
+    elif event == "evict":
+        model_evictions.inc(model=name)
+
+
+registry.subscribe(observe_registry_event)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Expose the metrics of a process that has no web views, like the job workers."""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
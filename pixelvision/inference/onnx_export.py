@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+
+from inference.backends import NATIVE_BACKENDS, OnnxBackend, specs
+from inference.image import DecodedImage
+
+TEST_IMAGES_DIR = "test_images"
+
+
+def load_all_specs():
+    """Import every module that declares a model spec and return them by name."""
+    import image_classification
+    from brain_tumor import brain_tumor, segmentation  # noqa: F401
+    from lung_cancer import lung_cancer
+
+    # Segmentation engines declare their spec when they are created
+    image_classification.get_lung_segmenter()
+    lung_cancer.get_segmentation_engine()
+    return specs
+
+
+def sample_inputs(spec, images_dir=TEST_IMAGES_DIR):
+    """Preprocessed inputs for ``spec`` built from every image in ``images_dir``."""
+    inputs = []
+    if spec.preprocess is not None and os.path.isdir(images_dir):
+        for name in sorted(os.listdir(images_dir)):
+            decoded = DecodedImage.from_path(os.path.join(images_dir, name))
+            inputs.append(np.asarray(spec.preprocess(decoded), dtype=np.float32))
+    if not inputs:
+        rng = np.random.default_rng(0)
+        inputs.append(rng.random((1,) + spec.input_shape, dtype=np.float32))
+    return inputs
+
+
+def export_model(spec, opset=17):
+    """Convert a model to ONNX at ``spec.onnx_path`` and return the native model."""
+    os.makedirs(os.path.dirname(spec.onnx_path), exist_ok=True)
+    model = spec.loader(spec.path)
+
+    if spec.framework == "keras":
+        import tensorflow as tf
+        import tf2onnx
+
+        signature = [
+            tf.TensorSpec((None,) + spec.input_shape, tf.float32, name="input")
+        ]
+        tf2onnx.convert.from_keras(
+            model, input_signature=signature, opset=opset, output_path=spec.onnx_path
+        )
+    elif spec.framework == "torch":
+        import torch
+
+        model.eval()
+        torch.onnx.export(
+            model,
+            torch.from_numpy(spec.dummy_input()),
+            spec.onnx_path,
+            input_names=["input"],
+            output_names=["output"],
+            dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+            opset_version=opset,
+        )
+    else:
+        raise ValueError(f"Cannot export {spec.framework} model '{spec.name}'")
+    return model
+
+
+def compare_outputs(spec, native_model, onnx_path, images_dir=TEST_IMAGES_DIR):
+    """Largest absolute difference between the native and ONNX outputs."""
+    native = NATIVE_BACKENDS[spec.framework](native_model)
+    exported = OnnxBackend(onnx_path)
+    return max(
+        float(np.max(np.abs(native.predict(x) - exported.predict(x))))
+        for x in sample_inputs(spec, images_dir)
+    )
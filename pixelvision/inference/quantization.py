@@ -0,0 +1,100 @@
+import os
+import time
+
+import numpy as np
+
+from inference.backends import OnnxBackend
+from inference.onnx_export import TEST_IMAGES_DIR, sample_inputs
+
+DYNAMIC = "dynamic"
+STATIC = "static"
+
+
+def calibration_reader(input_name, inputs):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class ImageCalibrationReader(CalibrationDataReader):
+        """Feeds the preprocessed test images to static quantization."""
+
+        def __init__(self):
+            self._feeds = iter([{input_name: x} for x in inputs])
+
+        def get_next(self):
+            return next(self._feeds, None)
+
+    return ImageCalibrationReader()
+
+
+def quantize_model(spec, mode=STATIC, images_dir=TEST_IMAGES_DIR):
+    """Write an INT8 copy of the model's ONNX export to ``spec.int8_path``.
+
+    Static quantization calibrates activation ranges on the test images,
+    dynamic quantization only quantizes weights ahead of time.
+    """
+    from onnxruntime.quantization import (
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    if mode == DYNAMIC:
+        quantize_dynamic(spec.onnx_path, spec.int8_path, weight_type=QuantType.QInt8)
+    else:
+        input_name = OnnxBackend(spec.onnx_path).input_name
+        quantize_static(
+            spec.onnx_path,
+            spec.int8_path,
+            calibration_reader(input_name, sample_inputs(spec, images_dir)),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    return spec.int8_path
+
+
+def agreement(reference, candidate):
+    """Share of identical decisions: argmax for multi-class outputs, 0.5 threshold otherwise."""
+    if reference.ndim == 2 and reference.shape[1] > 1:
+        return float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1)))
+    return float(np.mean((reference > 0.5) == (candidate > 0.5)))
+
+
+def mean_latency_ms(backend, inputs, runs):
+    backend.predict(inputs)
+    start = time.perf_counter()
+    for _ in range(runs):
+        backend.predict(inputs)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def quantization_report(spec, mode, images_dir=TEST_IMAGES_DIR, runs=20):
+    """Accuracy delta and speedup of the INT8 model against the FP32 export."""
+    fp32 = OnnxBackend(spec.onnx_path)
+    int8 = OnnxBackend(spec.int8_path)
+    inputs = sample_inputs(spec, images_dir)
+
+    differences = []
+    agreements = []
+    for x in inputs:
+        reference = fp32.predict(x)
+        candidate = int8.predict(x)
+        differences.append(float(np.max(np.abs(reference - candidate))))
+        agreements.append(agreement(reference, candidate))
+
+    fp32_ms = mean_latency_ms(fp32, inputs[0], runs)
+    int8_ms = mean_latency_ms(int8, inputs[0], runs)
+    return {
+        "model": spec.name,
+        "mode": mode,
+        "images": len(inputs),
+        "max_abs_diff": max(differences),
+        "mean_abs_diff": float(np.mean(differences)),
+        "agreement": float(np.mean(agreements)),
+        "fp32_ms": round(fp32_ms, 3),
+        "int8_ms": round(int8_ms, 3),
+        "speedup": round(fp32_ms / int8_ms, 2) if int8_ms else None,
+        "fp32_mb": round(os.path.getsize(spec.onnx_path) / (1024 * 1024), 2),
+        "int8_mb": round(os.path.getsize(spec.int8_path) / (1024 * 1024), 2),
+    }
@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from django.conf import settings
+
+
+def estimate_model_bytes(model):
+    """Best-effort size of a loaded model's weights in bytes."""
+    if hasattr(model, "memory_bytes"):
+        return int(model.memory_bytes())
+
+    # Keras models: read shapes instead of get_weights() to avoid copying tensors
+    if hasattr(model, "weights") and not callable(model.weights):
+        total = 0
+        for weight in model.weights:
+            itemsize = np.dtype(getattr(weight.dtype, "name", weight.dtype)).itemsize
+            total += math.prod(int(dim) for dim in weight.shape) * itemsize
+        return total
+
+    # Torch modules
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    return 0
+
+
+class _Entry:
+    def __init__(self, name, loader, pinned):
+        self.name = name
+        self.loader = loader
+        self.pinned = pinned
+        self.model = None
+        self.bytes = 0
+        self.loads = 0
+        self.load_seconds = None
+        self.last_used = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Loads each model once and shares it across requests.
+
+    Models are registered with a zero-argument loader and loaded on first
+    ``get()``. When the resident models exceed the memory budget, the least
+    recently used unpinned models are evicted until the budget is met again.
+
+    Listeners added with ``subscribe()`` are called with ``("load", name,
+    seconds)`` after a model is loaded and ``("evict", name, None)`` after
+    one is dropped.
+    """
+
+    def __init__(self, memory_budget_mb=None):
+        self.memory_budget_mb = memory_budget_mb
+        self._entries = {}
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, name, seconds=None):
+        for listener in self._listeners:
+            listener(event, name, seconds)
+
+    def register(self, name, loader, pinned=False):
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader, pinned)
+
+    def is_registered(self, name):
+        return name in self._entries
+
+    def get(self, name):
+        try:
+            entry = self._entries[name]
+        except KeyError:
+            raise KeyError(f"Model '{name}' is not registered") from None
+
+        with self._lock:
+            if entry.model is not None:
+                self._touch(entry)
+                return entry.model
+
+        # Load outside the registry lock so other models stay available,
+        # the per-entry lock makes concurrent callers wait for a single load.
+        evicted = []
+        with entry.lock:
+            loaded = entry.model is None
+            if loaded:
+                start = time.perf_counter()
+                model = entry.loader()
+                load_seconds = time.perf_counter() - start
+                with self._lock:
+                    entry.model = model
+                    entry.bytes = estimate_model_bytes(model)
+                    entry.loads += 1
+                    entry.load_seconds = load_seconds
+                    self._resident[name] = entry
+                    self._touch(entry)
+                    evicted = self._enforce_budget(keep=name)
+            model = entry.model
+
+        with self._lock:
+            self._touch(entry)
+        if loaded:
+            self._notify("load", name, entry.load_seconds)
+        for evicted_name in evicted:
+            self._notify("evict", evicted_name)
+        return model
+
+    def evict(self, name):
+        with self._lock:
+            entry = self._resident.pop(name, None)
+            if entry is not None:
+                entry.model = None
+                entry.bytes = 0
+        if entry is not None:
+            self._notify("evict", name)
+        return entry is not None
+
+    def resident(self):
+        """Resident models in least-recently-used order with their memory use."""
+        with self._lock:
+            return [
+                {
+                    "name": entry.name,
+                    "bytes": entry.bytes,
+                    "memory_mb": round(entry.bytes / (1024 * 1024), 2),
+                    "pinned": entry.pinned,
+                    "loads": entry.loads,
+                    "load_seconds": (
+                        round(entry.load_seconds, 4)
+                        if entry.load_seconds is not None
+                        else None
+                    ),
+                    "last_used": entry.last_used,
+                }
+                for entry in self._resident.values()
+            ]
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(entry.bytes for entry in self._resident.values())
+
+    def _touch(self, entry):
+        entry.last_used = time.time()
+        if entry.name in self._resident:
+            self._resident.move_to_end(entry.name)
+
+    def _enforce_budget(self, keep):
+        """Evict until the budget is met and return the evicted names."""
+        evicted = []
+        if not self.memory_budget_mb:
+            return evicted
+        budget = self.memory_budget_mb * 1024 * 1024
+        total = sum(entry.bytes for entry in self._resident.values())
+        for name in list(self._resident):
+            if total <= budget:
+                break
+            entry = self._resident[name]
+            if entry.pinned or name == keep:
+                continue
+            # Callers already holding the model keep their reference until done
+            del self._resident[name]
+            total -= entry.bytes
+            entry.model = None
+            entry.bytes = 0
+            evicted.append(name)
+        return evicted
+
+
+registry = ModelRegistry(
+    memory_budget_mb=getattr(settings, "MODEL_REGISTRY_MEMORY_BUDGET_MB", None)
+)
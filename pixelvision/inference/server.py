@@ -0,0 +1,142 @@
+import json
+import os
+import signal
+import socketserver
+
+from inference.batching import batching_stats
+from inference.metrics import collect_timings
+from inference.registry import registry
+from inference.warmup import readiness
+
+
+def handle_request(request):
+    """Dispatch one decoded request to the loaded pipeline."""
+    op = request.get("op")
+    if op == "classify":
+        # Imported here so the models are built after the worker is forked
+        from image_classification import classify_image
+
+        with collect_timings() as timings:
+            predicted_class, result, mask_img, cascade = classify_image(
+                request["image_path"]
+            )
+        return {
+            "predicted_class": predicted_class,
+            "result": float(result),
+            "mask_img": mask_img,
+            "cascade": cascade,
+            "timings": timings,
+        }
+    if op == "classify_batch":
+        from image_classification import classify_batch
+
+        with collect_timings() as timings:
+            outputs = classify_batch(request["image_paths"])
+        return {
+            "outputs": [
+                {
+                    "predicted_class": predicted_class,
+                    "result": float(result),
+                    "mask_img": mask_img,
+                    "cascade": cascade,
+                }
+                for predicted_class, result, mask_img, cascade in outputs
+            ],
+            "timings": timings,
+        }
+    if op == "status":
+        return {
+            "pid": os.getpid(),
+            "models": registry.resident(),
+            "resident_bytes": registry.resident_bytes(),
+            "batching": batching_stats(),
+            "readiness": readiness(),
+        }
+    raise ValueError(f"Unknown operation: {op}")
+
+
+class InferenceRequestHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON, one response line per request line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = {"ok": True, "result": handle_request(json.loads(line))}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Room for every web worker to queue up a request while the models are busy
+    request_queue_size = 128
+
+
+def cpu_sets(processes):
+    """Split the CPUs available to this process evenly across the workers."""
+    cpus = sorted(os.sched_getaffinity(0))
+    return [
+        set(cpus[index::processes]) or {cpus[index % len(cpus)]}
+        for index in range(processes)
+    ]
+
+
+def serve(socket_path, processes=1, pin_cpus=False, warmup=None):
+    """Bind the socket once and serve it from ``processes`` forked workers.
+
+    All workers accept on the same listening socket, so the kernel spreads
+    connections between them. Models are loaded in each worker after the fork
+    since TensorFlow and Torch do not survive being forked once initialised.
+    """
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = InferenceServer(socket_path, InferenceRequestHandler)
+    os.chmod(socket_path, 0o660)
+
+    if processes <= 1:
+        _serve_worker(server, None, warmup)
+        return
+
+    children = []
+    for cpus in cpu_sets(processes):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            _serve_worker(server, cpus if pin_cpus else None, warmup)
+            os._exit(0)
+        children.append(pid)
+
+    def stop_children(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    signal.signal(signal.SIGINT, stop_children)
+    try:
+        for pid in children:
+            while True:
+                try:
+                    os.waitpid(pid, 0)
+                    break
+                except InterruptedError:
+                    continue
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def _serve_worker(server, cpus, warmup):
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    if warmup is not None:
+        warmup()
+    server.serve_forever()
@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import ExitStack
+
+from django.test import SimpleTestCase
+
+from inference.admission import AdmissionController, Overloaded
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def wait_until_queued(self, controller, count):
+        deadline = time.monotonic() + 5
+        while controller.stats()["queued"] < count:
+            self.assertLess(time.monotonic(), deadline, "request was never queued")
+            time.sleep(0.001)
+
+    def test_admits_up_to_max_in_flight(self):
+        controller = AdmissionController(max_in_flight=2, max_queue=0, max_per_user=2)
+        with ExitStack() as stack:
+            stack.enter_context(controller.admit("a"))
+            stack.enter_context(controller.admit("b"))
+            self.assertEqual(controller.stats()["in_flight"], 2)
+
+            with self.assertRaises(Overloaded) as raised:
+                stack.enter_context(controller.admit("c"))
+        self.assertEqual(raised.exception.reason, "queue_full")
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+    def test_user_queue_limit(self):
+        controller = AdmissionController(
+            max_in_flight=4, max_queue=8, max_per_user=1, max_queued_per_user=1
+        )
+        with controller.admit("a"):
+            waiter = threading.Thread(target=self.admit_briefly, args=(controller, "a"))
+            waiter.start()
+            self.wait_until_queued(controller, 1)
+
+            with self.assertRaises(Overloaded) as raised:
+                with controller.admit("a"):
+                    pass
+            self.assertEqual(raised.exception.reason, "user_queue_full")
+            # Other users still have free slots
+            with controller.admit("b"):
+                pass
+        waiter.join()
+
+    def test_queue_timeout(self):
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=4, queue_timeout_seconds=0.01
+        )
+        with controller.admit("a"):
+            with self.assertRaises(Overloaded) as raised:
+                with controller.admit("b"):
+                    pass
+        self.assertEqual(raised.exception.reason, "timeout")
+        self.assertEqual(controller.stats()["queued"], 0)
+
+    def test_retry_after_follows_service_time(self):
+        controller = AdmissionController(max_in_flight=1, max_queue=0)
+        controller._service_seconds = 2.5
+        with controller.admit("a"):
+            with self.assertRaises(Overloaded) as raised:
+                with controller.admit("b"):
+                    pass
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertIsInstance(raised.exception.retry_after, int)
+
+    def test_free_slots_go_round_robin_across_users(self):
+        controller = AdmissionController(
+            max_in_flight=1, max_queue=8, max_per_user=1, max_queued_per_user=8
+        )
+        order = []
+        threads = []
+        with controller.admit("a"):
+            for user, name in (("a", "a2"), ("a", "a3"), ("b", "b1")):
+                thread = threading.Thread(
+                    target=self.admit_briefly, args=(controller, user, order, name)
+                )
+                thread.start()
+                threads.append(thread)
+                self.wait_until_queued(controller, len(threads))
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, ["a2", "b1", "a3"])
+
+    def admit_briefly(self, controller, user, order=None, name=None):
+        with controller.admit(user):
+            if order is not None:
+                order.append(name)
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from inference.batching import BatchScheduler
+
+WEIGHTS = np.arange(12, dtype=np.float32).reshape(3, 4) / 10
+
+
+def predict(inputs):
+    return inputs @ WEIGHTS
+
+
+class BatchSchedulerTests(SimpleTestCase):
+    def test_batched_outputs_match_single_predictions(self):
+        scheduler = BatchScheduler("test", predict, max_batch_size=4, max_wait_ms=1000)
+        inputs = [np.full((1, 3), value, dtype=np.float32) for value in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outputs = list(pool.map(scheduler.submit, inputs))
+
+        for single, batched in zip(inputs, outputs):
+            np.testing.assert_array_equal(batched, predict(single))
+        stats = scheduler.stats()
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["batch_sizes"], {4: 1})
+
+    def test_lone_request_runs_after_max_wait(self):
+        scheduler = BatchScheduler("test", predict, max_batch_size=8, max_wait_ms=1)
+        single = np.ones((2, 3), dtype=np.float32)
+
+        np.testing.assert_array_equal(scheduler.submit(single), predict(single))
+        self.assertEqual(scheduler.stats()["batch_sizes"], {2: 1})
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        def failing(inputs):
+            raise RuntimeError("model failed")
+
+        scheduler = BatchScheduler("test", failing, max_batch_size=2, max_wait_ms=1000)
+        inputs = [np.zeros((1, 3), dtype=np.float32)] * 2
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(scheduler.submit, array) for array in inputs]
+        for future in futures:
+            with self.assertRaisesMessage(RuntimeError, "model failed"):
+                future.result()
@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase
+
+from inference.benchmark import find_regressions
+
+
+def stage(p50_ms, p95_ms=None):
+    return {"warm": {"p50_ms": p50_ms, "p95_ms": p95_ms or p50_ms}}
+
+
+def run_report(router_ms=100, images_per_second=10, batch_per_second=40, rss=500):
+    return {
+        "stages": {"router": stage(router_ms)},
+        "concurrency": [{"concurrency": 4, "images_per_second": images_per_second}],
+        "batch_sizes": {
+            "router": [{"batch_size": 8, "images_per_second": batch_per_second}]
+        },
+        "peak_rss_mb": rss,
+    }
+
+
+class FindRegressionsTests(SimpleTestCase):
+    def metrics(self, report, baseline=None, threshold=0.1):
+        regressions = find_regressions(report, baseline or run_report(), threshold)
+        return [regression["metric"] for regression in regressions]
+
+    def test_unchanged_run(self):
+        self.assertEqual(self.metrics(run_report()), [])
+
+    def test_threshold_boundary(self):
+        self.assertEqual(self.metrics(run_report(router_ms=110)), [])
+        self.assertEqual(
+            self.metrics(run_report(router_ms=111)),
+            ["router.warm.p50_ms", "router.warm.p95_ms"],
+        )
+        self.assertEqual(self.metrics(run_report(router_ms=111), threshold=0.2), [])
+
+    def test_regression_details(self):
+        regression = find_regressions(run_report(rss=600), run_report())[0]
+
+        self.assertEqual(
+            regression,
+            {"metric": "peak_rss_mb", "baseline": 500, "current": 600, "change": 0.2},
+        )
+
+    def test_faster_latency_is_not_a_regression(self):
+        self.assertEqual(self.metrics(run_report(router_ms=50, rss=100)), [])
+
+    def test_throughput_is_higher_is_better(self):
+        self.assertEqual(self.metrics(run_report(images_per_second=20)), [])
+        self.assertEqual(
+            self.metrics(run_report(images_per_second=8, batch_per_second=30)),
+            [
+                "classify_image.concurrency_4.images_per_second",
+                "router.batch_8.images_per_second",
+            ],
+        )
+        self.assertEqual(self.metrics(run_report(images_per_second=9)), [])
+
+    def test_metrics_missing_from_the_baseline_are_skipped(self):
+        baseline = {"stages": {}, "batch_sizes": {"router": []}}
+
+        self.assertEqual(self.metrics(run_report(router_ms=500), baseline), [])
+
+    def test_metrics_missing_from_the_current_run_are_skipped(self):
+        report = {"stages": {}, "concurrency": [], "batch_sizes": {}}
+
+        self.assertEqual(self.metrics(report), [])
+
+    def test_zero_baseline_is_skipped(self):
+        self.assertEqual(self.metrics(run_report(rss=100), run_report(rss=0)), [])
@@ -0,0 +1,159 @@
+import base64
+import importlib.util
+import sys
+import threading
+from io import BytesIO
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image as PILImage
+
+from inference.cascade import (
+    ALWAYS,
+    GATED,
+    NEVER,
+    NO_MASK,
+    cascade_policy,
+    should_segment,
+)
+from inference.image import DecodedImage
+
+
+def decoded_image():
+    buffer = BytesIO()
+    PILImage.new("RGB", (32, 32), (10, 20, 30)).save(buffer, format="PNG")
+    return DecodedImage.from_bytes(buffer.getvalue())
+
+
+class CascadePolicyTests(SimpleTestCase):
+    @override_settings(INFERENCE_CASCADE={})
+    def test_defaults(self):
+        self.assertEqual(cascade_policy("lung_cancer")["segment"], ALWAYS)
+        bone = cascade_policy("bone_fracture")
+        self.assertEqual((bone["segment"], bone["min_score"]), (GATED, 0.6))
+
+    @override_settings(
+        INFERENCE_CASCADE={
+            "default": {"segment": GATED, "min_score": 0.3},
+            "lung_cancer": {"min_score": 0.5},
+        }
+    )
+    def test_class_settings_override_default_settings(self):
+        self.assertEqual(cascade_policy("lung_cancer")["min_score"], 0.5)
+        self.assertEqual(cascade_policy("brain_tumor")["min_score"], 0.3)
+        self.assertEqual(cascade_policy("bone_fracture")["min_score"], 0.3)
+
+    def test_should_segment(self):
+        policy = {"segment": GATED, "min_score": 0.5, "skip_labels": ["No Tumor"]}
+        self.assertTrue(should_segment(policy, 0.8))
+        self.assertFalse(should_segment(policy, 0.5))
+        self.assertFalse(should_segment(policy, None))
+        self.assertFalse(should_segment(policy, 0.9, "No Tumor"))
+        self.assertTrue(should_segment(policy, 0.9, "Glioma Tumor"))
+        self.assertTrue(should_segment(dict(policy, segment=ALWAYS), 0.1, "No Tumor"))
+        self.assertFalse(should_segment(dict(policy, segment=NEVER), 0.9))
+
+
+class FinishClassificationTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("image_classification.segment", return_value="mask")
+        self.segment = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.decoded = decoded_image()
+
+    def finish(self, predicted_class, score):
+        from image_classification import finish_classification
+
+        return finish_classification(self.decoded, predicted_class, score)
+
+    @override_settings(INFERENCE_CASCADE={"lung_cancer": {"segment": GATED}})
+    def test_low_score_skips_segmentation(self):
+        label, score, mask, cascade = self.finish("lung_cancer", 0.0)
+
+        self.segment.assert_not_called()
+        self.assertEqual((label, score), ("Lung Cancer", 0.0))
+        self.assertEqual(mask, base64.b64encode(self.decoded.data).decode("utf-8"))
+        self.assertEqual(cascade["stages"]["segmentation"], "skipped")
+
+    @override_settings(
+        INFERENCE_CASCADE={
+            "lung_cancer": {"segment": GATED, "min_score": 0.5},
+            "default": {"skipped_mask": NO_MASK},
+        }
+    )
+    def test_gate_and_skipped_mask_setting(self):
+        self.assertEqual(self.finish("lung_cancer", 0.9)[2], "mask")
+        self.assertIsNone(self.finish("lung_cancer", 0.2)[2])
+
+    @override_settings(INFERENCE_CASCADE={"lung_cancer": {"segment": GATED}})
+    def test_specialist_score_decides(self):
+        label, score, mask, cascade = self.finish("lung_cancer", 0.87654)
+
+        self.segment.assert_called_once()
+        self.assertEqual((score, mask), (0.877, "mask"))
+        self.assertEqual(cascade["stages"]["segmentation"], "ran")
+
+
+def import_brain_tumor():
+    """brain_tumor.brain_tumor, with stand-ins for the frameworks not installed"""
+    stubs = {
+        name: mock.MagicMock()
+        for name in ("tensorflow", "torch", "torchvision")
+        if importlib.util.find_spec(name) is None
+    }
+    if "torch" in stubs:
+        stubs["brain_tumor.model"] = mock.MagicMock()
+    with mock.patch.dict(sys.modules, stubs):
+        return importlib.import_module("brain_tumor.brain_tumor")
+
+
+class BrainTumorGateTests(SimpleTestCase):
+    """Gated brain segmentation only runs once the classifier passes the gate"""
+
+    def setUp(self):
+        brain_tumor = import_brain_tumor()
+        wrapper_class = brain_tumor.MultiTaskModelWrapper
+
+        self.wrapper = wrapper_class.__new__(wrapper_class)
+        self.segment_started = threading.Event()
+        self.segment = mock.Mock(side_effect=self.run_segment)
+        self.wrapper.segment = self.segment
+        self.wrapper.classify = self.classify
+        self.wrapper.encode_mask = lambda mask: "mask"
+        self.label = "Glioma Tumor"
+        self.concurrent = False
+
+    def run_segment(self, image):
+        self.segment_started.set()
+        return "segmentation"
+
+    def classify(self, image):
+        if self.concurrent:
+            # Only returns once segmentation is running on the pool
+            self.assertTrue(self.segment_started.wait(5))
+        else:
+            self.assertFalse(self.segment_started.is_set())
+        return self.label, 0.9
+
+    def gate(self, label, probability):
+        return label != "No Tumor"
+
+    def test_gate_passes(self):
+        mask, label, probability = self.wrapper.predict(decoded_image(), self.gate)
+
+        self.assertEqual((mask, label, probability), ("mask", "Glioma Tumor", 0.9))
+        self.segment.assert_called_once()
+
+    def test_gate_fails(self):
+        self.label = "No Tumor"
+
+        mask, label, _ = self.wrapper.predict(decoded_image(), self.gate)
+
+        self.assertIsNone(mask)
+        self.assertEqual(label, "No Tumor")
+        self.segment.assert_not_called()
+
+    def test_without_gate_segmentation_runs_alongside(self):
+        self.concurrent = True
+
+        self.assertEqual(self.wrapper.predict(decoded_image())[0], "mask")
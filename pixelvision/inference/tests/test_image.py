@@ -0,0 +1,88 @@
+from io import BytesIO
+
+import numpy as np
+from django.test import SimpleTestCase
+from PIL import Image
+
+from inference.image import DecodedImage
+
+
+def encode(image, image_format="PNG"):
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def keras_input(data, target_size):
+    """The former router input: load_img(target_size=...), img_to_array, / 255
+
+    Mirrors keras.utils.load_img, which converts to RGB and resizes with
+    nearest neighbour interpolation, and img_to_array's float32 array.
+    """
+    image = Image.open(BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    width_height = (target_size[1], target_size[0])
+    if image.size != width_height:
+        image = image.resize(width_height, Image.NEAREST)
+    array = np.asarray(image, dtype=np.float32)
+    return np.expand_dims(array, axis=0) / 255.0
+
+
+class DecodedImageTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, size=(300, 451, 4), dtype=np.uint8)
+        self.data = encode(Image.fromarray(pixels, "RGBA"))
+        self.decoded = DecodedImage.from_bytes(self.data, name="a.png")
+
+    def test_tensor_matches_the_keras_preprocessing(self):
+        tensor = self.decoded.tensor((224, 224))
+
+        self.assertEqual(tensor.shape, (1, 224, 224, 3))
+        self.assertEqual(tensor.dtype, np.float32)
+        np.testing.assert_allclose(
+            tensor, keras_input(self.data, (224, 224)), rtol=1e-6
+        )
+
+    def test_grayscale_tensor(self):
+        tensor = self.decoded.tensor((128, 96), mode="L")
+
+        self.assertEqual(tensor.shape, (1, 96, 128, 1))
+        self.assertLessEqual(float(tensor.max()), 1.0)
+
+    def test_views_are_memoised(self):
+        self.assertIs(self.decoded.tensor((224, 224)), self.decoded.tensor((224, 224)))
+        self.assertIs(self.decoded.resized((64, 64)), self.decoded.resized((64, 64)))
+        self.assertIs(self.decoded.rgb_array(), self.decoded.rgb_array())
+        self.assertIsNot(
+            self.decoded.tensor((224, 224)), self.decoded.tensor((128, 128))
+        )
+
+    def test_cached_builds_once(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        value = self.decoded.cached("key", factory)
+
+        self.assertIs(self.decoded.cached("key", factory), value)
+        self.assertEqual(len(calls), 1)
+
+    def test_from_bytes_keeps_the_upload(self):
+        self.assertEqual(self.decoded.data, self.data)
+        self.assertEqual((self.decoded.format, self.decoded.size), ("PNG", (451, 300)))
+        self.assertEqual(self.decoded.pil.mode, "RGB")
+        self.assertIsNotNone(self.decoded.decode_seconds)
+
+    def test_from_pil_keeps_a_png_encoding(self):
+        frame = Image.new("L", (40, 30), 128)
+
+        decoded = DecodedImage.from_pil(frame, name="frame")
+
+        self.assertEqual(decoded.format, "PNG")
+        with Image.open(BytesIO(decoded.data)) as image:
+            self.assertEqual((image.format, image.size), ("PNG", (40, 30)))
+        self.assertEqual(decoded.rgb_array()[0, 0].tolist(), [128, 128, 128])
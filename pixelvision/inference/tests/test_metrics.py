@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+
+from inference.metrics import (
+    MetricsRegistry,
+    collect_timings,
+    record_stage,
+    timed_stage,
+)
+
+
+class StageTimingTests(SimpleTestCase):
+    def test_stages_are_collected_per_block(self):
+        with collect_timings() as timings:
+            with timed_stage("router", "router"):
+                pass
+            record_stage("segmentation", 0.25, "lung_segmentation")
+            record_stage("segmentation", 0.5, "lung_segmentation")
+
+        self.assertEqual(set(timings), {"router", "segmentation"})
+        self.assertEqual(timings["router"]["model"], "router")
+        self.assertEqual(timings["segmentation"]["seconds"], 0.75)
+
+    def test_nested_collections_are_separate(self):
+        with collect_timings() as outer:
+            with collect_timings() as inner:
+                record_stage("inner", 1.0)
+            record_stage("outer", 1.0)
+
+        self.assertEqual(set(inner), {"inner"})
+        self.assertEqual(set(outer), {"outer"})
+
+    def test_stages_outside_a_collection_are_ignored(self):
+        record_stage("router", 1.0)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.")
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        registry.gauge("queue_depth", "Queue depth.", lambda: [({"state": "q"}, 3)])
+
+        requests.inc(model="router")
+        requests.inc(2, model="router")
+        latency.observe(0.5, stage="router")
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{model="router"} 3', lines)
+        self.assertIn('latency_seconds_bucket{stage="router",le="0.1"} 0', lines)
+        self.assertIn('latency_seconds_bucket{stage="router",le="1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{stage="router",le="+Inf"} 1', lines)
+        self.assertIn('latency_seconds_count{stage="router"} 1', lines)
+        self.assertIn('queue_depth{state="q"} 3', lines)
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors.").inc(reason='bad "input"')
+
+        self.assertIn('errors_total{reason="bad \\"input\\""} 1', registry.render())
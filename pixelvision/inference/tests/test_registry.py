@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase
+
+from inference.registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeModel:
+    def __init__(self, name, size_mb):
+        self.name = name
+        self.size_mb = size_mb
+
+    def memory_bytes(self):
+        return self.size_mb * MB
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.loads = []
+        self.events = []
+
+    def loader(self, name, size_mb):
+        def load():
+            self.loads.append(name)
+            return FakeModel(name, size_mb)
+
+        return load
+
+    def make_registry(self, budget_mb=None):
+        registry = ModelRegistry(memory_budget_mb=budget_mb)
+        registry.subscribe(
+            lambda event, name, seconds: self.events.append((event, name))
+        )
+        return registry
+
+    def test_loads_once_on_first_use(self):
+        registry = self.make_registry()
+        registry.register("router", self.loader("router", 10))
+        self.assertEqual(self.loads, [])
+
+        first = registry.get("router")
+        second = registry.get("router")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.loads, ["router"])
+        self.assertEqual(registry.resident_bytes(), 10 * MB)
+        self.assertEqual(self.events, [("load", "router")])
+
+    def test_unregistered_model(self):
+        with self.assertRaises(KeyError):
+            self.make_registry().get("missing")
+
+    def test_evicts_least_recently_used_over_budget(self):
+        registry = self.make_registry(budget_mb=25)
+        for name in ("a", "b", "c"):
+            registry.register(name, self.loader(name, 10))
+
+        registry.get("a")
+        registry.get("b")
+        registry.get("a")  # b is now the least recently used
+        registry.get("c")
+
+        resident = [entry["name"] for entry in registry.resident()]
+        self.assertEqual(resident, ["a", "c"])
+        self.assertIn(("evict", "b"), self.events)
+        self.assertLessEqual(registry.resident_bytes(), 25 * MB)
+
+    def test_pinned_models_are_kept(self):
+        registry = self.make_registry(budget_mb=25)
+        registry.register("router", self.loader("router", 10), pinned=True)
+        registry.register("a", self.loader("a", 10))
+        registry.register("b", self.loader("b", 10))
+
+        registry.get("router")
+        registry.get("a")
+        registry.get("b")
+
+        resident = {entry["name"] for entry in registry.resident()}
+        self.assertEqual(resident, {"router", "b"})
+
+    def test_model_being_loaded_is_never_evicted(self):
+        registry = self.make_registry(budget_mb=5)
+        registry.register("large", self.loader("large", 10))
+
+        registry.get("large")
+
+        self.assertEqual([entry["name"] for entry in registry.resident()], ["large"])
+
+    def test_evicted_model_is_reloaded(self):
+        registry = self.make_registry()
+        registry.register("a", self.loader("a", 10))
+        registry.get("a")
+
+        self.assertTrue(registry.evict("a"))
+        self.assertFalse(registry.evict("a"))
+        registry.get("a")
+
+        self.assertEqual(self.loads, ["a", "a"])
+        self.assertEqual(registry.resident()[0]["loads"], 2)
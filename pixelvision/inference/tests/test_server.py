@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from inference.client import InferenceClient, InferenceServerError
+from inference.metrics import record_stage
+from inference.server import InferenceRequestHandler, InferenceServer
+
+CASCADE = {"policy": {}, "stages": {"specialist": "ran", "segmentation": "ran"}}
+
+
+def classify_batch(image_paths):
+    record_stage("router", 0.5, "router")
+    if "/media/broken.png" in image_paths:
+        raise ValueError("Cannot decode /media/broken.png")
+    return [("Lung Cancer", 0.91, f"mask of {path}", CASCADE) for path in image_paths]
+
+
+def classify_image(image_path):
+    return classify_batch([image_path])[0]
+
+
+@mock.patch("image_classification.classify_batch", classify_batch)
+@mock.patch("image_classification.classify_image", classify_image)
+class InferenceServerTests(SimpleTestCase):
+    """Requests and responses over the server's UNIX socket"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.socket_path = os.path.join(directory, "inference.sock")
+
+        server = InferenceServer(self.socket_path, InferenceRequestHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.client = InferenceClient(self.socket_path, timeout=5)
+
+    def test_classify(self):
+        predicted_class, result, mask_img, cascade, timings = (
+            self.client.classify_image("/media/a.png")
+        )
+
+        self.assertEqual((predicted_class, result), ("Lung Cancer", 0.91))
+        self.assertEqual(mask_img, "mask of /media/a.png")
+        self.assertEqual(cascade, CASCADE)
+        self.assertEqual(timings, {"router": {"model": "router", "seconds": 0.5}})
+
+    def test_classify_batch(self):
+        outputs, timings = self.client.classify_batch(["/media/a.png", "/media/b.png"])
+
+        self.assertEqual(
+            [mask_img for _, _, mask_img, _ in outputs],
+            ["mask of /media/a.png", "mask of /media/b.png"],
+        )
+        self.assertEqual(outputs[0][:2], ("Lung Cancer", 0.91))
+        self.assertEqual(timings["router"]["seconds"], 0.5)
+
+    def test_status(self):
+        status = self.client.status()
+
+        self.assertEqual(status["pid"], os.getpid())
+        self.assertIn("ready", status["readiness"])
+
+    def test_pipeline_errors_reach_the_client(self):
+        with self.assertRaisesMessage(InferenceServerError, "Cannot decode"):
+            self.client.classify_image("/media/broken.png")
+
+    def test_unknown_operation(self):
+        with self.assertRaisesMessage(InferenceServerError, "Unknown operation"):
+            self.client.call("train")
+
+    def test_one_response_line_per_request_line(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(self.socket_path)
+            sock.sendall(b'{"op": "status"}\n\nnot json\n')
+            with sock.makefile("rb") as stream:
+                responses = [json.loads(stream.readline()) for _ in range(2)]
+
+        self.assertEqual([response["ok"] for response in responses], [True, False])
+
+    def test_unavailable_server(self):
+        client = InferenceClient(self.socket_path + ".missing", timeout=5)
+
+        with self.assertRaisesMessage(InferenceServerError, "unavailable"):
+            client.status()
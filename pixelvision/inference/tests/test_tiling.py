@@ -0,0 +1,60 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from inference.tiling import non_max_suppression, stitch, tile_boxes, use_tiling
+
+
+class TileBoxesTests(SimpleTestCase):
+    def test_tiles_cover_the_image_with_overlap(self):
+        boxes = tile_boxes((2500, 1100), tile_size=1024, overlap=128)
+
+        covered = np.zeros((1100, 2500), dtype=bool)
+        for left, top, right, bottom in boxes:
+            self.assertLessEqual(right - left, 1024)
+            self.assertLessEqual(bottom - top, 1024)
+            covered[top:bottom, left:right] = True
+        self.assertTrue(covered.all())
+        # The last tile on each axis is aligned on the edge, not padded
+        self.assertEqual(max(box[2] for box in boxes), 2500)
+        self.assertEqual(max(box[3] for box in boxes), 1100)
+
+    def test_small_image_is_a_single_tile(self):
+        self.assertEqual(tile_boxes((600, 400), 1024, 128), [(0, 0, 600, 400)])
+
+    def test_use_tiling(self):
+        config = {"mode": "auto", "tile_size": 1024, "min_dimension": 2048}
+        self.assertFalse(use_tiling(config, (2048, 1000)))
+        self.assertTrue(use_tiling(config, (3000, 1000)))
+        self.assertFalse(use_tiling(dict(config, mode="off"), (3000, 1000)))
+
+
+class StitchTests(SimpleTestCase):
+    def test_stitched_mask_matches_the_whole_image_mask(self):
+        size = (300, 200)
+        expected = (np.arange(200 * 300).reshape(200, 300) % 251).astype(np.uint8)
+        mask = np.zeros_like(expected)
+
+        for box in tile_boxes(size, tile_size=128, overlap=32):
+            left, top, right, bottom = box
+            stitch(mask, box, expected[top:bottom, left:right], overlap=32)
+
+        np.testing.assert_array_equal(mask, expected)
+
+
+class NonMaxSuppressionTests(SimpleTestCase):
+    def test_object_on_a_tile_seam_is_kept_once(self):
+        # The same fracture found by the tiles left and right of x = 1000
+        boxes = [(960, 400, 1060, 480), (962, 402, 1058, 478), (100, 100, 150, 150)]
+        scores = [0.7, 0.9, 0.8]
+
+        keep = non_max_suppression(boxes, scores, iou_threshold=0.5)
+
+        self.assertEqual(keep, [1, 2])
+
+    def test_separate_objects_are_kept(self):
+        boxes = [(0, 0, 10, 10), (20, 20, 30, 30)]
+
+        self.assertEqual(sorted(non_max_suppression(boxes, [0.5, 0.6])), [0, 1])
+
+    def test_no_detections(self):
+        self.assertEqual(non_max_suppression([], []), [])
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from inference import versions
+from inference.versions import model_versions, pipeline_version, selected_export
+
+
+class SelectedExportTests(SimpleTestCase):
+    @override_settings(INFERENCE_BACKENDS={}, INFERENCE_PRECISION={})
+    def test_native_models_use_no_export(self):
+        self.assertFalse(selected_export("router.onnx"))
+        self.assertFalse(selected_export("router.int8.onnx"))
+        self.assertFalse(selected_export("quantization_report.json"))
+
+    @override_settings(INFERENCE_BACKENDS={"router": "onnx"}, INFERENCE_PRECISION={})
+    def test_onnx_backend(self):
+        self.assertTrue(selected_export("router.onnx"))
+        self.assertFalse(selected_export("router.int8.onnx"))
+        self.assertFalse(selected_export("lung_cancer.onnx"))
+
+    @override_settings(INFERENCE_BACKENDS={}, INFERENCE_PRECISION={"default": "int8"})
+    def test_int8_precision(self):
+        self.assertTrue(selected_export("router.int8.onnx"))
+        self.assertFalse(selected_export("router.onnx"))
+
+
+@override_settings(INFERENCE_BACKENDS={}, INFERENCE_PRECISION={})
+class ModelVersionsTests(SimpleTestCase):
+    def setUp(self):
+        self.models_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.models_dir)
+        self.write("router.h5")
+        self.write("brain_tumor/unet_model.h5")
+
+    def write(self, name, data=b"weights"):
+        path = os.path.join(self.models_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as model_file:
+            model_file.write(data)
+
+    def test_unselected_exports_and_reports_are_ignored(self):
+        before = model_versions(self.models_dir)
+        self.write("onnx/router.onnx")
+        self.write("onnx/router.int8.onnx")
+        self.write("onnx/quantization_report.json", b"{}")
+
+        self.assertEqual(model_versions(self.models_dir), before)
+        self.assertEqual(
+            set(before), {"router.h5", os.path.join("brain_tumor", "unet_model.h5")}
+        )
+
+    def test_selected_export_is_included(self):
+        self.write("onnx/router.onnx")
+        with override_settings(INFERENCE_BACKENDS={"router": "onnx"}):
+            self.assertIn(
+                os.path.join("onnx", "router.onnx"), model_versions(self.models_dir)
+            )
+
+
+class PipelineVersionTests(SimpleTestCase):
+    def setUp(self):
+        versions._version = None
+        self.addCleanup(setattr, versions, "_version", None)
+
+    @override_settings(INFERENCE_PIPELINE_VERSION="pinned")
+    def test_configured_version(self):
+        self.assertEqual(pipeline_version(), "pinned")
+
+    @override_settings(INFERENCE_PIPELINE_VERSION=None)
+    def test_computed_once_per_process(self):
+        first = pipeline_version()
+        with mock.patch.object(versions, "model_versions") as walk:
+            self.assertEqual(pipeline_version(), first)
+        walk.assert_not_called()
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from inference.warmup import start_background_warmup, web_warmup_enabled
+
+
+@override_settings(INFERENCE_WARMUP="background", INFERENCE_SERVER_SOCKET=None)
+class WebWarmupTests(SimpleTestCase):
+    @override_settings(INFERENCE_ASYNC_UPLOADS=False)
+    def test_web_workers_classifying_uploads_warm_up(self):
+        self.assertTrue(web_warmup_enabled())
+
+    @override_settings(INFERENCE_ASYNC_UPLOADS=True)
+    def test_queued_uploads_keep_web_workers_lazy(self):
+        self.assertFalse(web_warmup_enabled())
+
+        with mock.patch("inference.warmup.run_warmup") as run_warmup:
+            self.assertIsNone(start_background_warmup())
+        run_warmup.assert_not_called()
+
+    @override_settings(
+        INFERENCE_ASYNC_UPLOADS=False, INFERENCE_SERVER_SOCKET="/tmp/inference.sock"
+    )
+    def test_inference_server_keeps_web_workers_lazy(self):
+        self.assertFalse(web_warmup_enabled())
+
+    @override_settings(INFERENCE_ASYNC_UPLOADS=False, INFERENCE_WARMUP="lazy")
+    def test_lazy_setting(self):
+        self.assertFalse(web_warmup_enabled())
+
+    @override_settings(INFERENCE_ASYNC_UPLOADS=True)
+    def test_lazy_web_workers_are_ready(self):
+        response = self.client.get(reverse("api_readiness_check"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ready")
+
+    @override_settings(INFERENCE_ASYNC_UPLOADS=False)
+    def test_warming_web_workers_wait_for_their_models(self):
+        state = {"ready": False, "warmup": {"status": "warming"}, "models": []}
+        with mock.patch("main.views.readiness", return_value=state):
+            response = self.client.get(reverse("api_readiness_check"))
+
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,123 @@
+import numpy as np
+from django.conf import settings
+
+# mode is "off", "on", or "auto" to tile only images whose longest side
+# exceeds min_dimension. nms_iou merges detections found in several tiles.
+DEFAULT_TILING = {
+    "mode": "off",
+    "tile_size": 1024,
+    "overlap": 128,
+    "min_dimension": 2048,
+    "batch_size": 4,
+    "nms_iou": 0.5,
+}
+
+
+def tiling_config(name):
+    """Tiling settings for a model, settings overrides win over the defaults."""
+    configured = getattr(settings, "TILED_INFERENCE", {})
+    config = dict(DEFAULT_TILING)
+    config.update(configured.get("default", {}))
+    config.update(configured.get(name, {}))
+    return config
+
+
+def use_tiling(config, size):
+    """Whether an image of ``size`` (width, height) is cut into tiles"""
+    if config["mode"] == "on":
+        return max(size) > config["tile_size"]
+    if config["mode"] == "auto":
+        return max(size) > config["min_dimension"]
+    return False
+
+
+def _starts(length, tile_size, stride):
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, stride))
+    # The last tile is aligned on the edge rather than padded
+    starts.append(length - tile_size)
+    return starts
+
+
+def tile_boxes(size, tile_size, overlap):
+    """``(left, top, right, bottom)`` of overlapping tiles covering ``size``"""
+    width, height = size
+    stride = max(1, tile_size - overlap)
+    return [
+        (left, top, min(left + tile_size, width), min(top + tile_size, height))
+        for top in _starts(height, tile_size, stride)
+        for left in _starts(width, tile_size, stride)
+    ]
+
+
+def iter_tile_batches(image, config, mode="RGB"):
+    """Yield ``(boxes, crops)`` batches of at most ``batch_size`` tiles.
+
+    Crops are uint8 arrays cut from the decoded image one batch at a time, so
+    the buffers held at once are bounded by the tile size and batch size
+    whatever the size of the image.
+    """
+    boxes = tile_boxes(image.size, config["tile_size"], config["overlap"])
+    batch_size = max(1, config["batch_size"])
+    source = image.pil if mode == "RGB" else image.pil.convert(mode)
+    for start in range(0, len(boxes), batch_size):
+        batch = boxes[start : start + batch_size]
+        yield batch, [np.asarray(source.crop(box)) for box in batch]
+
+
+def core_region(box, size, overlap):
+    """Part of a tile a stitched mask takes from it.
+
+    Half the overlap is trimmed on every side shared with a neighbouring
+    tile, where the model had the least context. Sides on the image border
+    are kept.
+    """
+    left, top, right, bottom = box
+    width, height = size
+    margin = overlap // 2
+    return (
+        left + margin if left > 0 else left,
+        top + margin if top > 0 else top,
+        right - margin if right < width else right,
+        bottom - margin if bottom < height else bottom,
+    )
+
+
+def stitch(mask, box, tile_mask, overlap):
+    """Copy the core region of ``tile_mask``, the mask of ``box``, into ``mask``"""
+    height, width = mask.shape[:2]
+    core = core_region(box, (width, height), overlap)
+    left, top = box[0], box[1]
+    mask[core[1] : core[3], core[0] : core[2]] = tile_mask[
+        core[1] - top : core[3] - top, core[0] - left : core[2] - left
+    ]
+
+
+def box_iou(box, boxes):
+    """IoU of one ``(x1, y1, x2, y2)`` box against an (n, 4) array of boxes"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.5):
+    """Indices of the boxes kept, highest score first.
+
+    Used to merge the detections of overlapping tiles, where an object near
+    a tile edge is found once per tile.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    order = np.argsort(np.asarray(scores, dtype=np.float32))[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(int(best))
+        overlaps = box_iou(boxes[best], boxes[order[1:]])
+        order = order[1:][overlaps <= iou_threshold]
+    return keep
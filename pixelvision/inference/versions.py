@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+
+from django.conf import settings
+
+from inference.backends import INT8, ONNX, ONNX_MODELS_DIR, backend_for, precision_for
+from inference.cascade import cascade_policies
+
+MODELS_DIR = "./models"
+
+_version = None
+
+
+def selected_export(file_name):
+    """Whether an ONNX export is the one its model runs from in settings.
+
+    ``<name>.onnx`` counts when the model runs on ONNX Runtime at full
+    precision and ``<name>.int8.onnx`` when it runs quantized. Exports that
+    are not selected, and reports, leave the pipeline as it is.
+    """
+    if file_name.endswith(".int8.onnx"):
+        return precision_for(file_name[: -len(".int8.onnx")]) == INT8
+    if file_name.endswith(".onnx"):
+        name = file_name[: -len(".onnx")]
+        return precision_for(name) != INT8 and backend_for(name) == ONNX
+    return False
+
+
+def model_versions(models_dir=MODELS_DIR):
+    """Identify every model file in use by its size and modification time.
+
+    Native models are always included, the ONNX exports derived from them
+    only when settings select them.
+    """
+    exports_dir = os.path.normpath(
+        os.path.join(models_dir, os.path.relpath(ONNX_MODELS_DIR, MODELS_DIR))
+    )
+    versions = {}
+    for root, _, files in os.walk(models_dir):
+        exports = os.path.normpath(root) == exports_dir
+        for name in files:
+            if exports and not selected_export(name):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            versions[os.path.relpath(path, models_dir)] = (
+                f"{stat.st_size}-{int(stat.st_mtime)}"
+            )
+    return versions
+
+
+def pipeline_version():
+    """Version of the models that produce results, changes whenever one is replaced.
+
+    The cascade policies are part of it, results made with other stages
+    skipped are not reused. ``INFERENCE_PIPELINE_VERSION`` pins the version
+    explicitly, for example when the models directory is not visible to the
+    web workers. Otherwise it is computed once per process, like the loaded
+    models themselves, so workers are restarted after models are replaced.
+    """
+    global _version
+    configured = getattr(settings, "INFERENCE_PIPELINE_VERSION", None)
+    if configured:
+        return configured
+    if _version is None:
+        identity = {"models": model_versions(), "cascade": cascade_policies()}
+        encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+        _version = hashlib.sha256(encoded).hexdigest()
+    return _version
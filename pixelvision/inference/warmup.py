@@ -0,0 +1,75 @@
+import threading
+import time
+
+from django.conf import settings
+
+from inference.registry import registry
+
+COLD = "cold"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+_state = {"status": COLD, "started": None, "finished": None, "error": None}
+_lock = threading.Lock()
+
+
+def run_warmup():
+    """Load and warm every pipeline model in this thread."""
+    with _lock:
+        if _state["status"] in (WARMING, READY):
+            return
+        _state.update(status=WARMING, started=time.time(), error=None)
+    try:
+        from image_classification import warmup
+
+        warmup()
+    except Exception as e:
+        with _lock:
+            _state.update(status=FAILED, finished=time.time(), error=str(e))
+        raise
+    with _lock:
+        _state.update(status=READY, finished=time.time())
+
+
+def web_warmup_enabled():
+    """Whether web workers load and warm the models when they start.
+
+    Only when they classify uploads themselves: not while uploads are queued
+    for ``inference_worker`` processes or sent to an inference server, and
+    only when ``INFERENCE_WARMUP`` is ``"background"``. Otherwise models are
+    loaded on first use.
+    """
+    if getattr(settings, "INFERENCE_SERVER_SOCKET", None):
+        return False
+    if getattr(settings, "INFERENCE_ASYNC_UPLOADS", False):
+        return False
+    return getattr(settings, "INFERENCE_WARMUP", "background") == "background"
+
+
+def start_background_warmup():
+    """Warm the models of a web worker without blocking startup, when enabled."""
+    if not web_warmup_enabled():
+        return None
+    thread = threading.Thread(target=_warmup_quietly, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _warmup_quietly():
+    try:
+        run_warmup()
+    except Exception:
+        # The failure is recorded in the readiness state
+        pass
+
+
+def readiness():
+    """Whether this process has its models loaded and warmed."""
+    with _lock:
+        state = dict(_state)
+    return {
+        "ready": state["status"] == READY,
+        "warmup": state,
+        "models": [model["name"] for model in registry.resident()],
+    }
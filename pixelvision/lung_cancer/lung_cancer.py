@@ -6,65 +6,89 @@ import tensorflow as tf
 from PIL import Image
 from tensorflow.keras.models import load_model
 
+from inference.engine import EngineCache, SegmentationEngine
+from inference.image import DecodedImage
 
-def segment_lung(
-    image_path, model_path="models/lung_cancer/lung_segmentation_unet.keras"
-):
-    # Enable unsafe deserialization to fix lambda loading error
-    tf.keras.config.enable_unsafe_deserialization()
-
-    def dice_coef(y_true, y_pred, smooth=1):
-        y_true_f = tf.keras.backend.flatten(y_true)
-        y_pred_f = tf.keras.backend.flatten(y_pred)
-        intersection = tf.keras.backend.sum(y_true_f * y_pred_f)
-        return (2.0 * intersection + smooth) / (
-            tf.keras.backend.sum(y_true_f) + tf.keras.backend.sum(y_pred_f) + smooth
-        )
+DEFAULT_MODEL_PATH = "models/lung_cancer/lung_segmentation_unet.keras"
 
-    def iou_coef(y_true, y_pred, smooth=1):
-        intersection = tf.keras.backend.sum(
-            tf.keras.backend.abs(y_true * y_pred), axis=[1, 2, 3]
-        )
-        union = (
-            tf.keras.backend.sum(y_true, [1, 2, 3])
-            + tf.keras.backend.sum(y_pred, [1, 2, 3])
-            - intersection
-        )
-        return tf.keras.backend.mean((intersection + smooth) / (union + smooth), axis=0)
-
-    def dice_loss(y_true, y_pred):
-        return 1 - dice_coef(y_true, y_pred)
-
-    # Pass safe_mode=False to load_model
-    model = load_model(
-        model_path,
-        custom_objects={
-            "dice_coef": dice_coef,
-            "iou_coef": iou_coef,
-            "dice_loss": dice_loss,
-        },
-        safe_mode=False,
-        compile=False,  # Add this to avoid optimizer warning
+
+# Custom metrics the model was trained with, needed for deserialization
+def dice_coef(y_true, y_pred, smooth=1):
+    y_true_f = tf.keras.backend.flatten(y_true)
+    y_pred_f = tf.keras.backend.flatten(y_pred)
+    intersection = tf.keras.backend.sum(y_true_f * y_pred_f)
+    return (2.0 * intersection + smooth) / (
+        tf.keras.backend.sum(y_true_f) + tf.keras.backend.sum(y_pred_f) + smooth
     )
 
-    # Open and resize image to 256x256 as required by the model
-    img = Image.open(image_path).convert("L")
-    img = img.resize((256, 256), Image.Resampling.LANCZOS)
-    img = np.array(img) / 255.0
-    img_input = np.expand_dims(img, axis=(0, -1))
 
-    pred_mask = model.predict(img_input)[0]
-    pred_mask = (pred_mask > 0.5).astype(np.uint8) * 255
+def iou_coef(y_true, y_pred, smooth=1):
+    intersection = tf.keras.backend.sum(
+        tf.keras.backend.abs(y_true * y_pred), axis=[1, 2, 3]
+    )
+    union = (
+        tf.keras.backend.sum(y_true, [1, 2, 3])
+        + tf.keras.backend.sum(y_pred, [1, 2, 3])
+        - intersection
+    )
+    return tf.keras.backend.mean((intersection + smooth) / (union + smooth), axis=0)
+
+
+def dice_loss(y_true, y_pred):
+    return 1 - dice_coef(y_true, y_pred)
+
+
+class LungSegmentationEngine(SegmentationEngine):
+    name = "lung_segmentation_unet"
+    input_shape = (256, 256, 1)
+
+    def load_model(self):
+        # Enable unsafe deserialization to fix lambda loading error
+        tf.keras.config.enable_unsafe_deserialization()
+
+        # Pass safe_mode=False to load_model
+        return load_model(
+            self.model_path,
+            custom_objects={
+                "dice_coef": dice_coef,
+                "iou_coef": iou_coef,
+                "dice_loss": dice_loss,
+            },
+            safe_mode=False,
+            compile=False,  # Add this to avoid optimizer warning
+        )
+
+    def preprocess(self, image):
+        # Grayscale, resized to 256x256 as required by the model
+        return image.tensor((256, 256), mode="L", resample=Image.Resampling.LANCZOS)
+
+    def segment(self, image):
+        if isinstance(image, str):
+            image = DecodedImage.from_path(image)
+
+        original_size = image.size  # (width, height)
+        img_input = self.preprocess(image)
+
+        pred_mask = self.predict(img_input)[0]
+        pred_mask = (pred_mask > 0.5).astype(np.uint8) * 255
+
+        # Resize mask back to original size if needed
+        mask_image = Image.fromarray(pred_mask.squeeze())
+        mask_image = mask_image.resize(original_size, Image.Resampling.NEAREST)
+
+        buffer = BytesIO()
+        mask_image.save(buffer, format="PNG")
+        buffer.seek(0)
+
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+engines = EngineCache(LungSegmentationEngine)
 
-    # Resize mask back to original size if needed
-    original_img = Image.open(image_path)
-    original_size = original_img.size  # (width, height)
 
-    mask_image = Image.fromarray(pred_mask.squeeze())
-    mask_image = mask_image.resize(original_size, Image.Resampling.NEAREST)
+def get_segmentation_engine(model_path=DEFAULT_MODEL_PATH):
+    return engines.get(model_path)
 
-    buffer = BytesIO()
-    mask_image.save(buffer, format="PNG")
-    buffer.seek(0)
 
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+def segment_lung(image_path, model_path=DEFAULT_MODEL_PATH):
+    return get_segmentation_engine(model_path).segment(image_path)
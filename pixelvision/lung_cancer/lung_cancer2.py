@@ -7,58 +7,120 @@ import tensorflow as tf
 from tensorflow.keras.models import load_model
 from tensorflow.keras.utils import CustomObjectScope
 
+from inference.engine import EngineCache, SegmentationEngine
+from inference.image import DecodedImage
+from inference.metrics import timed_stage
+from inference.tiling import iter_tile_batches, stitch, tiling_config, use_tiling
 
-def segment_lung(image_path, model_path="models/lung_cancer/ResUNet_model.keras"):
-    # Define custom metrics for model loading
-    def iou(y_true, y_pred, smooth=1):
-        y_true = tf.cast(y_true, tf.float32)
-        y_pred = tf.cast(y_pred > 0.5, tf.float32)
-        intersection = tf.reduce_sum(y_true * y_pred, axis=[1, 2, 3])
-        union = (
-            tf.reduce_sum(y_true, axis=[1, 2, 3])
-            + tf.reduce_sum(y_pred, axis=[1, 2, 3])
-            - intersection
-        )
-        iou_score = (intersection + smooth) / (union + smooth)
-        return tf.reduce_mean(iou_score)
-
-    def dice_coef(y_true, y_pred):
-        smooth = 1e-15
-        y_true = tf.keras.layers.Flatten()(y_true)
-        y_pred = tf.keras.layers.Flatten()(y_pred)
-        intersection = tf.reduce_sum(y_true * y_pred)
-        return (2.0 * intersection + smooth) / (
-            tf.reduce_sum(y_true) + tf.reduce_sum(y_pred) + smooth
+DEFAULT_MODEL_PATH = "models/lung_cancer/ResUNet_model.keras"
+
+
+# Custom metrics the model was trained with, needed for deserialization
+def iou(y_true, y_pred, smooth=1):
+    y_true = tf.cast(y_true, tf.float32)
+    y_pred = tf.cast(y_pred > 0.5, tf.float32)
+    intersection = tf.reduce_sum(y_true * y_pred, axis=[1, 2, 3])
+    union = (
+        tf.reduce_sum(y_true, axis=[1, 2, 3])
+        + tf.reduce_sum(y_pred, axis=[1, 2, 3])
+        - intersection
+    )
+    iou_score = (intersection + smooth) / (union + smooth)
+    return tf.reduce_mean(iou_score)
+
+
+def dice_coef(y_true, y_pred):
+    smooth = 1e-15
+    y_true = tf.keras.layers.Flatten()(y_true)
+    y_pred = tf.keras.layers.Flatten()(y_pred)
+    intersection = tf.reduce_sum(y_true * y_pred)
+    return (2.0 * intersection + smooth) / (
+        tf.reduce_sum(y_true) + tf.reduce_sum(y_pred) + smooth
+    )
+
+
+def dice_loss(y_true, y_pred):
+    return 1.0 - dice_coef(y_true, y_pred)
+
+
+class LungSegmentationEngine(SegmentationEngine):
+    name = "lung_segmentation"
+    input_shape = (256, 256, 3)
+
+    def load_model(self):
+        with CustomObjectScope(
+            {"iou": iou, "dice_coef": dice_coef, "dice_loss": dice_loss}
+        ):
+            return load_model(self.model_path, compile=False)
+
+    def preprocess(self, image):
+        # As in the training code: BGR, bilinear resize to 256x256
+        return image.cached(
+            "lung_segmentation_input",
+            lambda: np.expand_dims(
+                cv2.resize(image.bgr_array(), (256, 256)).astype(np.float32)
+                / np.float32(255.0),
+                axis=0,
+            ),
         )
 
-    def dice_loss(y_true, y_pred):
-        return 1.0 - dice_coef(y_true, y_pred)
+    def tile_input(self, crop):
+        # RGB crop to the BGR 256x256 input the model was trained on
+        tile = cv2.resize(crop, (256, 256))[:, :, ::-1]
+        return tile.astype(np.float32) / np.float32(255.0)
 
-    # Load the model
-    with CustomObjectScope(
-        {"iou": iou, "dice_coef": dice_coef, "dice_loss": dice_loss}
-    ):
-        model = load_model(model_path, compile=False)
+    def segment_tiles(self, image, config):
+        """Full resolution mask stitched from overlapping tiles.
 
-    # Read and preprocess the image (using cv2 as in the training code)
-    image = cv2.imread(image_path, cv2.IMREAD_COLOR)
-    original_size = image.shape[:2]  # (height, width)
+        Tiles are segmented a batch at a time, so apart from the output mask
+        memory grows with the tile size rather than the image size.
+        """
+        width, height = image.size
+        mask = np.zeros((height, width), dtype=np.uint8)
+        with timed_stage("segmentation", self.name):
+            for boxes, crops in iter_tile_batches(image, config):
+                predicted = self.predict(np.stack([self.tile_input(c) for c in crops]))
+                for box, tile_mask in zip(boxes, predicted):
+                    tile_mask = (np.squeeze(tile_mask, axis=-1) > 0.5).astype(np.uint8)
+                    tile_size = (box[2] - box[0], box[3] - box[1])
+                    tile_mask = cv2.resize(
+                        tile_mask * 255, tile_size, interpolation=cv2.INTER_NEAREST
+                    )
+                    stitch(mask, box, tile_mask, config["overlap"])
+        return mask
 
-    # Resize to model input size (256x256)
-    input_image = cv2.resize(image, (256, 256))
-    input_image = input_image / 255.0  # Normalize
-    input_image = np.expand_dims(input_image, axis=0)  # Add batch dimension
+    def segment(self, image):
+        if isinstance(image, str):
+            image = DecodedImage.from_path(image)
 
-    # Predict the mask
-    predicted_mask = model.predict(input_image)[0]
-    predicted_mask = np.squeeze(predicted_mask, axis=-1)
-    predicted_mask = (predicted_mask > 0.5).astype(np.uint8) * 255
+        config = tiling_config(self.name)
+        if use_tiling(config, image.size):
+            predicted_mask_resized = self.segment_tiles(image, config)
+        else:
+            original_size = image.size  # (width, height)
+            input_image = self.preprocess(image)
+
+            # Predict the mask
+            with timed_stage("segmentation", self.name):
+                predicted_mask = self.predict(input_image)[0]
+            predicted_mask = np.squeeze(predicted_mask, axis=-1)
+            predicted_mask = (predicted_mask > 0.5).astype(np.uint8) * 255
+
+            # Resize back to original size
+            predicted_mask_resized = cv2.resize(predicted_mask, original_size)
+
+        # Convert to base64
+        with timed_stage("mask_encoding"):
+            _, buffer = cv2.imencode(".png", predicted_mask_resized)
+            return base64.b64encode(buffer).decode("utf-8")
+
+
+engines = EngineCache(LungSegmentationEngine)
+
+
+def get_segmentation_engine(model_path=DEFAULT_MODEL_PATH):
+    return engines.get(model_path)
 
-    # Resize back to original size
-    predicted_mask_resized = cv2.resize(
-        predicted_mask, (original_size[1], original_size[0])
-    )
 
-    # Convert to base64
-    _, buffer = cv2.imencode(".png", predicted_mask_resized)
-    return base64.b64encode(buffer).decode("utf-8")
+def segment_lung(image_path, model_path=DEFAULT_MODEL_PATH):
+    return get_segmentation_engine(model_path).segment(image_path)
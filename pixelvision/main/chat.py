@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+from functools import partial
+
+import httpx
+from django.conf import settings
+
+from inference.metrics import chat_first_chunk_seconds, chat_seconds
+
+from .chat_cache import cache_key, chat_cache
+
+CHAT_MODEL = "phi"
+
+# Enhanced prompt for medical context
+PROMPT_TEMPLATE = """You are a helpful medical AI assistant. Provide clear, accurate, and supportive information about medical images and diagnoses. Always remind users to consult healthcare professionals for medical decisions.
+
+User question: {question}
+
+Response:"""
+
+
+class ChatUnavailable(Exception):
+    """Ollama could not take the request, ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=503, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def ollama_url():
+    return getattr(settings, "OLLAMA_URL", "http://localhost:11434/api/generate")
+
+
+def chat_payload(question):
+    return {
+        "model": CHAT_MODEL,
+        "prompt": PROMPT_TEMPLATE.format(question=question),
+        "max_tokens": 150,
+        "stream": True,
+        "temperature": 0.7,
+    }
+
+
+class ChatSlots:
+    """Limits generations toward Ollama across the whole process.
+
+    Under WSGI and runserver every request runs on an event loop of its own,
+    so an asyncio semaphore, which belongs to one loop, would not limit
+    anything. A thread semaphore is shared by all loops instead, and waiting
+    for it polls so the loop is never blocked.
+    """
+
+    poll_seconds = 0.05
+
+    def __init__(self, limit):
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    async def acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise asyncio.TimeoutError
+            await asyncio.sleep(self.poll_seconds)
+
+    def release(self):
+        self._semaphore.release()
+
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def chat_slots():
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = ChatSlots(getattr(settings, "OLLAMA_MAX_CONCURRENCY", 4))
+        return _slots
+
+
+# httpx clients belong to the event loop they were created on. Under ASGI
+# there is a single loop per worker, so connections to Ollama are kept alive
+# and reused across requests. Loops that only live for one request close
+# their client when they shut down, see _close_on_shutdown.
+_loop_clients = weakref.WeakKeyDictionary()
+
+
+async def _close_on_shutdown(client):
+    # Event loops close the async generators still open on them when they
+    # shut down, which is when this one closes the client
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def _client():
+    loop = asyncio.get_running_loop()
+    state = _loop_clients.get(loop)
+    if state is None:
+        max_concurrency = getattr(settings, "OLLAMA_MAX_CONCURRENCY", 4)
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                getattr(settings, "OLLAMA_TIMEOUT_SECONDS", 30), connect=5
+            ),
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=60,
+            ),
+        )
+        closer = _close_on_shutdown(client)
+        await closer.__anext__()
+        state = _loop_clients[loop] = {"client": client, "closer": closer}
+    return state["client"]
+
+
+async def open_chat_stream(question):
+    """Start a streaming generation and return an async iterator of NDJSON lines.
+
+    Cached answers are replayed without contacting Ollama. Otherwise this waits
+    up to ``OLLAMA_QUEUE_TIMEOUT_SECONDS`` for one of the
+    ``OLLAMA_MAX_CONCURRENCY`` slots toward Ollama. The slot and the upstream
+    connection are released when the stream ends or the client goes away, and
+    complete answers are added to the cache. Cache reads and writes, which
+    may touch the filesystem, run in a thread off the event loop.
+    """
+    payload = chat_payload(question)
+    cache = chat_cache()
+    store = None
+    if cache is not None:
+        key = cache_key(question, payload, PROMPT_TEMPLATE)
+        chunks = await asyncio.to_thread(cache.get, key)
+        if chunks is not None:
+            return replay(chunks)
+        store = partial(cache.set, key)
+
+    slots = chat_slots()
+    started = time.perf_counter()
+    queue_timeout = getattr(settings, "OLLAMA_QUEUE_TIMEOUT_SECONDS", 10)
+    try:
+        await slots.acquire(queue_timeout)
+    except asyncio.TimeoutError:
+        chat_seconds.observe(time.perf_counter() - started, outcome="busy")
+        raise ChatUnavailable("AI model is busy, try again shortly", 503, queue_timeout)
+
+    try:
+        client = await _client()
+        request = client.build_request("POST", ollama_url(), json=payload)
+        response = await client.send(request, stream=True)
+    except httpx.TimeoutException as e:
+        slots.release()
+        chat_seconds.observe(time.perf_counter() - started, outcome="timeout")
+        raise ChatUnavailable("AI model request timed out", 504) from e
+    except httpx.HTTPError as e:
+        slots.release()
+        chat_seconds.observe(time.perf_counter() - started, outcome="unavailable")
+        raise ChatUnavailable(f"AI model connection failed: {str(e)}", 503) from e
+
+    if response.status_code != 200:
+        await response.aclose()
+        slots.release()
+        chat_seconds.observe(time.perf_counter() - started, outcome="error")
+        raise ChatUnavailable("Failed to get response from AI model", 500)
+
+    return relay(response, slots, started, store)
+
+
+async def replay(chunks):
+    """Stream a cached answer in the same format as a live one"""
+    for chunk in chunks:
+        yield json.dumps({"chunk": chunk}) + "\n"
+
+
+async def relay(response, slots, started, store=None):
+    """Forward each generated fragment as soon as Ollama sends it.
+
+    ``store`` is called with all fragments once the answer is complete.
+    """
+    outcome = "ok"
+    first_chunk = True
+    chunks = []
+    try:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            if first_chunk:
+                chat_first_chunk_seconds.observe(time.perf_counter() - started)
+                first_chunk = False
+
+            try:
+                chunk = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if chunk.get("response"):
+                chunks.append(chunk["response"])
+                yield json.dumps({"chunk": chunk["response"]}) + "\n"
+            if chunk.get("done", False):
+                if store is not None:
+                    await asyncio.to_thread(store, chunks)
+                break
+    except asyncio.CancelledError:
+        # The client disconnected, closing the response below aborts generation
+        outcome = "cancelled"
+        raise
+    except Exception as stream_error:
+        outcome = "error"
+        yield json.dumps({"error": f"Streaming error: {str(stream_error)}"}) + "\n"
+    finally:
+        await response.aclose()
+        slots.release()
+        chat_seconds.observe(time.perf_counter() - started, outcome=outcome)
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+from inference.metrics import metrics
+
+DEFAULT_CHAT_CACHE = {
+    "backend": "memory",
+    "ttl_seconds": 24 * 60 * 60,
+    "max_entries": 1000,
+    "path": "chat_cache",
+}
+
+chat_cache_lookups = metrics.counter(
+    "pixelvision_chat_cache_lookups_total", "Chat cache lookups, by result."
+)
+
+
+def normalize_question(question):
+    """Fold case, unicode forms, whitespace and trailing punctuation"""
+    question = unicodedata.normalize("NFKC", question).casefold()
+    question = re.sub(r"\s+", " ", question)
+    return question.strip(" ?!.")
+
+
+def cache_key(question, payload, template):
+    """Key for an answer to ``question`` with the model and prompt template used"""
+    identity = {
+        "question": normalize_question(question),
+        "template": template,
+        "model": payload["model"],
+        "options": {k: v for k, v in payload.items() if k not in ("prompt", "stream")},
+    }
+    encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ChatCache:
+    """Answers stored as the list of chunks they were streamed as.
+
+    Entries expire ``ttl_seconds`` after they were stored, and the least
+    recently used ones are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        chunks = self.load(key)
+        with self._stats_lock:
+            if chunks is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        chat_cache_lookups.inc(result="miss" if chunks is None else "hit")
+        return chunks
+
+    def expired(self, created):
+        return time.time() - created > self.ttl_seconds
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "entries": self.entries(),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryChatCache(ChatCache):
+    backend = "memory"
+
+    def __init__(self, ttl_seconds, max_entries):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.expired(entry["created"]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["chunks"]
+
+    def set(self, key, chunks):
+        with self._lock:
+            self._entries[key] = {"created": time.time(), "chunks": list(chunks)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def entries(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class FileChatCache(ChatCache):
+    """One JSON file per answer, shared by every worker on the host.
+
+    A file's modification time is refreshed on each hit and serves as its
+    last use for LRU eviction.
+    """
+
+    backend = "file"
+
+    def __init__(self, ttl_seconds, max_entries, path):
+        super().__init__(ttl_seconds, max_entries)
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def load(self, key):
+        try:
+            with open(self._file(key)) as cache_file:
+                entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+        if self.expired(entry["created"]):
+            self._remove(key)
+            return None
+        try:
+            os.utime(self._file(key))
+        except OSError:
+            pass
+        return entry["chunks"]
+
+    def set(self, key, chunks):
+        # Write to a temporary file first so readers never see a partial entry
+        temporary = f"{self._file(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w") as cache_file:
+            json.dump({"created": time.time(), "chunks": list(chunks)}, cache_file)
+        os.replace(temporary, self._file(key))
+        self._prune()
+
+    def entries(self):
+        return sum(1 for name in os.listdir(self.path) if name.endswith(".json"))
+
+    def _remove(self, key):
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def _prune(self):
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".json"):
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[: len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def chat_cache():
+    """The configured cache, or None when ``CHAT_CACHE`` is disabled"""
+    global _cache
+    config = getattr(settings, "CHAT_CACHE", DEFAULT_CHAT_CACHE)
+    if not config:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            config = dict(DEFAULT_CHAT_CACHE, **config)
+            if config["backend"] == "file":
+                _cache = FileChatCache(
+                    config["ttl_seconds"], config["max_entries"], config["path"]
+                )
+            else:
+                _cache = MemoryChatCache(config["ttl_seconds"], config["max_entries"])
+        return _cache
+
+
+metrics.gauge(
+    "pixelvision_chat_cache_entries",
+    "Answers held in the chat cache.",
+    lambda: [({}, chat_cache().entries())] if chat_cache() else [],
+)
@@ -0,0 +1,104 @@
+import os
+import shutil
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image as PILImage
+
+from inference.dicom import DicomInstance, is_dicom_file
+from inference.metrics import metrics
+
+from .dicom import DICOM_FORMAT
+
+# Longest side in pixels of each derivative, by name
+DEFAULT_DERIVATIVE_SIZES = {"thumbnail": 256, "preview": 1024}
+DERIVATIVES_DIR = "derivatives"
+
+derivative_requests = metrics.counter(
+    "pixelvision_derivative_requests_total",
+    "Thumbnail and preview requests, by size and whether they were cached.",
+)
+
+
+def derivative_sizes():
+    return getattr(settings, "IMAGE_DERIVATIVE_SIZES", DEFAULT_DERIVATIVE_SIZES)
+
+
+def derivative_path(image_id, size):
+    """Cache file of a derivative, MEDIA_ROOT/derivatives/<id>/<size>.webp"""
+    return os.path.join(
+        settings.MEDIA_ROOT, DERIVATIVES_DIR, str(image_id), f"{size}.webp"
+    )
+
+
+def source_image(image, max_side):
+    """PIL image of an upload, decoded at no more than what ``max_side`` needs.
+
+    JPEG decoding is reduced by the decoder itself through ``draft``, and
+    DICOM series show their middle frame read from the memory-mapped pixels.
+    """
+    path = image.ImageFile.path
+    if image.ImageFormat == DICOM_FORMAT or is_dicom_file(path):
+        instance = DicomInstance(path)
+        return instance.frame(instance.frames // 2, max_side).pil
+    pil_image = PILImage.open(path)
+    pil_image.draft("RGB", (max_side, max_side))
+    return pil_image
+
+
+def render_derivative(pil_image, max_side):
+    """WebP bytes of ``pil_image`` shrunk to fit in ``max_side``"""
+    thumbnail = pil_image.copy()
+    thumbnail.thumbnail((max_side, max_side), PILImage.Resampling.LANCZOS)
+    if thumbnail.mode not in ("RGB", "RGBA", "L"):
+        thumbnail = thumbnail.convert("RGB")
+    buffer = BytesIO()
+    thumbnail.save(
+        buffer,
+        format="WEBP",
+        quality=getattr(settings, "IMAGE_DERIVATIVE_QUALITY", 80),
+        method=4,
+    )
+    return buffer.getvalue()
+
+
+def write_derivative(path, data):
+    # Write to a temporary file first so readers never see a partial image
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as derivative_file:
+        derivative_file.write(data)
+    os.replace(temporary, path)
+
+
+def ensure_derivative(image, size, pil_image=None):
+    """Path of the ``size`` derivative of ``image``, created on first use.
+
+    ``pil_image`` is an already decoded copy of the upload, otherwise the
+    original is read from storage. Raises KeyError for unknown sizes.
+    """
+    max_side = derivative_sizes()[size]
+    path = derivative_path(image.ImageID, size)
+    if os.path.exists(path):
+        derivative_requests.inc(size=size, cached="true")
+        return path
+
+    derivative_requests.inc(size=size, cached="false")
+    if pil_image is None:
+        pil_image = source_image(image, max_side)
+    write_derivative(path, render_derivative(pil_image, max_side))
+    return path
+
+
+def create_derivatives(image, pil_image):
+    """Build every derivative at upload time from the decoded upload"""
+    for size in derivative_sizes():
+        ensure_derivative(image, size, pil_image)
+
+
+def delete_derivatives(image_id):
+    shutil.rmtree(
+        os.path.join(settings.MEDIA_ROOT, DERIVATIVES_DIR, str(image_id)),
+        ignore_errors=True,
+    )
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import uuid
+
+from inference.dicom import read_header
+
+from .models import Image
+
+DICOM_FORMAT = "DICOM"
+
+
+def series_hash(file_hashes):
+    """Identity of a series, whatever order its files were uploaded in"""
+    return hashlib.sha256("".join(sorted(file_hashes)).encode("ascii")).hexdigest()
+
+
+def spool_dicom(directory, index, data):
+    """Write one DICOM file to ``directory`` until its series is known.
+
+    Returns the file's path and SeriesInstanceUID, read from the header of
+    the written file, so its bytes need not be kept. Raises for files whose
+    headers cannot be read.
+    """
+    path = os.path.join(directory, f"{index}.dcm")
+    with open(path, "wb") as dicom_file:
+        dicom_file.write(data)
+    return path, str(read_header(path).get("SeriesInstanceUID", ""))
+
+
+def group_series(files):
+    """Group spooled ``(name, path, file_hash, uid)`` DICOM files by series.
+
+    Returns a dict mapping each SeriesInstanceUID to the ``(name, path,
+    file_hash)`` of its files. Files without a UID are a series of their own.
+    """
+    series = {}
+    for name, path, file_hash, uid in files:
+        series.setdefault(uid or name, []).append((name, path, file_hash))
+    return series
+
+
+def save_series(user, files, content_hash):
+    """Store the files of one series in a directory of their own.
+
+    ``files`` holds ``(name, content)`` pairs of Django files, which are
+    streamed to storage. Returns the unsaved Image standing for the whole
+    series, whose file is the first one given.
+    """
+    directory = f"dicom/{uuid.uuid4().hex}"
+    image = Image(
+        UserID=user,
+        FileName=files[0][0],
+        FileSize=sum(content.size for _, content in files),
+        ImageFormat=DICOM_FORMAT,
+        ContentHash=content_hash,
+    )
+    storage = image.ImageFile.storage
+    stored = [
+        storage.save(f"{directory}/{os.path.basename(name)}", content)
+        for name, content in files
+    ]
+    image.ImageFile.name = stored[0]
+    image.FilePath = image.ImageFile.url
+    return image
+
@@ -0,0 +1,207 @@
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F
+from django.utils import timezone
+
+from inference.metrics import metrics
+
+from .models import InferenceJob
+from .recognition import recognition_payload, run_batch_recognition, run_recognition
+
+
+def enqueue(image):
+    """Queue an image for background classification, reusing a pending job"""
+    pending = InferenceJob.objects.filter(
+        ImageID=image, Status__in=[InferenceJob.QUEUED, InferenceJob.RUNNING]
+    ).first()
+    return pending or InferenceJob.objects.create(ImageID=image)
+
+
+def enqueue_batch(images):
+    """Queue images as one batch, returns the batch id and the jobs in order"""
+    batch_id = uuid.uuid4()
+    jobs = InferenceJob.objects.bulk_create(
+        [InferenceJob(ImageID=image, BatchID=batch_id) for image in images]
+    )
+    return batch_id, jobs
+
+
+def claim_next_job():
+    """Atomically claim the oldest queued job, or return None if the queue is empty"""
+    while True:
+        job = (
+            InferenceJob.objects.filter(Status=InferenceJob.QUEUED)
+            .order_by("CreatedDateTime")
+            .first()
+        )
+        if job is None:
+            return None
+
+        # Another worker may have claimed the job since we read it
+        claimed = InferenceJob.objects.filter(
+            pk=job.pk, Status=InferenceJob.QUEUED
+        ).update(
+            Status=InferenceJob.RUNNING,
+            StartedDateTime=timezone.now(),
+            Attempts=F("Attempts") + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def claim_jobs(limit):
+    """Claim up to ``limit`` queued jobs, oldest first"""
+    jobs = []
+    while len(jobs) < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        jobs.append(job)
+    return jobs
+
+
+def run_job(job):
+    try:
+        recognition_result, _ = run_recognition(job.ImageID)
+    except Exception as e:
+        job.Status = InferenceJob.FAILED
+        job.Error = str(e)
+    else:
+        job.Status = InferenceJob.DONE
+        job.ResultID = recognition_result
+    job.FinishedDateTime = timezone.now()
+    job.save(update_fields=["Status", "Error", "ResultID", "FinishedDateTime"])
+    return job
+
+
+def run_jobs(jobs):
+    """Run claimed jobs as one inference batch.
+
+    If the batch fails the jobs are retried one by one, so a single bad
+    image only fails its own job.
+    """
+    if len(jobs) == 1:
+        return [run_job(jobs[0])]
+    try:
+        results = run_batch_recognition([job.ImageID for job in jobs])
+    except Exception:
+        return [run_job(job) for job in jobs]
+
+    finished = timezone.now()
+    for job, recognition_result in zip(jobs, results):
+        job.Status = InferenceJob.DONE
+        job.ResultID = recognition_result
+        job.FinishedDateTime = finished
+    InferenceJob.objects.bulk_update(jobs, ["Status", "ResultID", "FinishedDateTime"])
+    return jobs
+
+
+def requeue_stale_jobs():
+    """Put back jobs whose worker died while running them"""
+    timeout = getattr(settings, "INFERENCE_JOB_TIMEOUT_SECONDS", 600)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return InferenceJob.objects.filter(
+        Status=InferenceJob.RUNNING, StartedDateTime__lt=cutoff
+    ).update(Status=InferenceJob.QUEUED)
+
+
+def queue_depth():
+    """Number of queued and running jobs"""
+    counts = dict.fromkeys([InferenceJob.QUEUED, InferenceJob.RUNNING], 0)
+    rows = (
+        InferenceJob.objects.filter(Status__in=list(counts))
+        .values("Status")
+        .annotate(jobs=Count("pk"))
+    )
+    for row in rows:
+        counts[row["Status"]] = row["jobs"]
+    return counts
+
+
+metrics.gauge(
+    "pixelvision_job_queue_depth",
+    "Inference jobs waiting or running, by status.",
+    lambda: [({"status": status}, jobs) for status, jobs in queue_depth().items()],
+)
+
+
+def job_payload(job, include_mask_base64=False):
+    data = {
+        "success": True,
+        "job_id": str(job.JobID),
+        "image_id": job.ImageID_id,
+        "status": job.Status,
+        "created": job.CreatedDateTime.isoformat(),
+        "started": job.StartedDateTime.isoformat() if job.StartedDateTime else None,
+        "finished": (
+            job.FinishedDateTime.isoformat() if job.FinishedDateTime else None
+        ),
+    }
+    if job.Status == InferenceJob.DONE and job.ResultID is not None:
+        data["result"] = recognition_payload(
+            job.ImageID, job.ResultID, include_mask_base64
+        )
+    elif job.Status == InferenceJob.FAILED:
+        data["error"] = job.Error
+    return data
+
+
+def batch_payload(batch_id, jobs, include_mask_base64=False):
+    counts = {
+        status: sum(1 for job in jobs if job.Status == status)
+        for status, _ in InferenceJob.STATUS_CHOICES
+    }
+    finished = counts[InferenceJob.DONE] + counts[InferenceJob.FAILED]
+    return {
+        "success": True,
+        "batch_id": str(batch_id),
+        "status": "done" if finished == len(jobs) else "running",
+        "total": len(jobs),
+        "counts": counts,
+        "jobs": [job_payload(job, include_mask_base64) for job in jobs],
+    }
+
+
+class WorkerPool:
+    """Threads that drain the job queue until stopped.
+
+    Each worker claims up to ``batch_size`` queued jobs at a time and runs
+    them as one batch. Workers in one process share the loaded models, so
+    their concurrent predictions are batched together by the per-model batch
+    schedulers as well.
+    """
+
+    def __init__(self, workers=2, poll_interval=0.5, batch_size=1):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        requeue_stale_jobs()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"inference-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while not self._stop.is_set():
+            close_old_connections()
+            jobs = claim_jobs(self.batch_size)
+            if not jobs:
+                self._stop.wait(self.poll_interval)
+                continue
+            run_jobs(jobs)
@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inference.benchmark import find_regressions, pipeline_stages, run_benchmark
+from inference.onnx_export import TEST_IMAGES_DIR
+
+BENCHMARKS_DIR = "benchmarks"
+
+
+def int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark classify_image and each pipeline stage on the test images "
+        "and compare the results with a stored baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "stages", nargs="*", help="Stages to benchmark, all of them by default"
+        )
+        parser.add_argument("--images", default=TEST_IMAGES_DIR)
+        parser.add_argument(
+            "--iterations", type=int, default=5, help="Warm passes over the images"
+        )
+        parser.add_argument("--concurrency", type=int_list, default=[1, 2, 4, 8])
+        parser.add_argument("--batch-sizes", type=int_list, default=[1, 4, 8, 16])
+        parser.add_argument(
+            "--output", default=os.path.join(BENCHMARKS_DIR, "latest.json")
+        )
+        parser.add_argument(
+            "--baseline", default=os.path.join(BENCHMARKS_DIR, "baseline.json")
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Relative slowdown reported as a regression",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store this run as the new baseline",
+        )
+
+    def handle(self, *args, **options):
+        available = pipeline_stages()
+        unknown = [name for name in options["stages"] if name not in available]
+        if unknown:
+            raise CommandError(
+                f"Unknown stages: {', '.join(unknown)}. "
+                f"Available: {', '.join(available)}"
+            )
+
+        report = run_benchmark(
+            images_dir=options["images"],
+            stages=options["stages"],
+            iterations=options["iterations"],
+            concurrency_levels=options["concurrency"],
+            batch_sizes=options["batch_sizes"],
+            log=lambda message: self.stderr.write(f"Benchmarking {message}"),
+        )
+
+        for name, stage in report["stages"].items():
+            warm = stage["warm"]
+            self.stdout.write(
+                f"{name}: cold {stage['cold_ms']:.1f} ms, "
+                f"p50 {warm['p50_ms']:.1f} ms, p95 {warm['p95_ms']:.1f} ms, "
+                f"p99 {warm['p99_ms']:.1f} ms"
+            )
+        for run in report["concurrency"]:
+            self.stdout.write(
+                f"classify_image x{run['concurrency']}: "
+                f"{run['images_per_second']:.2f} images/s"
+            )
+        for name, runs in report["batch_sizes"].items():
+            throughput = ", ".join(
+                f"{run['batch_size']}: {run['images_per_second']:.1f}" for run in runs
+            )
+            self.stdout.write(f"{name} images/s by batch size: {throughput}")
+        self.stdout.write(f"Peak RSS: {report['peak_rss_mb']} MB")
+
+        os.makedirs(os.path.dirname(options["output"]) or ".", exist_ok=True)
+        with open(options["output"], "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options["save_baseline"]:
+            shutil.copyfile(options["output"], options["baseline"])
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+            return
+
+        if not os.path.exists(options["baseline"]):
+            return
+        with open(options["baseline"]) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(report, baseline, options["threshold"])
+        for regression in regressions:
+            self.stderr.write(
+                f"{regression['metric']}: {regression['baseline']} -> "
+                f"{regression['current']} ({regression['change']:+.0%})"
+            )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) against {options['baseline']}"
+            )
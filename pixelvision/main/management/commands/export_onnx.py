@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inference.onnx_export import (
+    TEST_IMAGES_DIR,
+    compare_outputs,
+    export_model,
+    load_all_specs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Export models to ONNX and check their outputs against the original "
+        "framework on the test images"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models", nargs="*", help="Models to export, all of them by default"
+        )
+        parser.add_argument("--opset", type=int, default=17)
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=1e-3,
+            help="Largest allowed absolute difference between outputs",
+        )
+        parser.add_argument("--images", default=TEST_IMAGES_DIR)
+
+    def handle(self, *args, **options):
+        specs = load_all_specs()
+        names = options["models"] or sorted(specs)
+        unknown = [name for name in names if name not in specs]
+        if unknown:
+            raise CommandError(
+                f"Unknown models: {', '.join(unknown)}. "
+                f"Available: {', '.join(sorted(specs))}"
+            )
+
+        failed = []
+        for name in names:
+            spec = specs[name]
+            try:
+                native_model = export_model(spec, opset=options["opset"])
+                difference = compare_outputs(
+                    spec, native_model, spec.onnx_path, options["images"]
+                )
+            except Exception as e:
+                failed.append(name)
+                self.stderr.write(f"{name}: export failed: {e}")
+                continue
+
+            if difference > options["tolerance"]:
+                failed.append(name)
+                self.stderr.write(
+                    f"{name}: max difference {difference:.2e} exceeds "
+                    f"{options['tolerance']:.0e}"
+                )
+            else:
+                self.stdout.write(
+                    f"{name}: exported to {spec.onnx_path}, "
+                    f"max difference {difference:.2e}"
+                )
+
+        if failed:
+            raise CommandError(f"Export failed for: {', '.join(failed)}")
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inference.server import serve
+from inference.warmup import run_warmup
+
+DEFAULT_SOCKET = "/tmp/pixelvision-inference.sock"
+
+
+class Command(BaseCommand):
+    help = "Serve classify_image requests to the web workers over a UNIX socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=settings.INFERENCE_SERVER_SOCKET or DEFAULT_SOCKET,
+            help="Path of the UNIX socket to listen on",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of inference processes sharing the socket",
+        )
+        parser.add_argument(
+            "--pin-cpus",
+            action="store_true",
+            help="Pin each inference process to its own share of the CPUs",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Serving inference on {options['socket']} "
+            f"with {options['processes']} process(es)"
+        )
+        serve(
+            options["socket"],
+            processes=options["processes"],
+            pin_cpus=options["pin_cpus"],
+            warmup=run_warmup,
+        )
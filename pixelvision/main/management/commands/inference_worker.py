@@ -0,0 +1,65 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from inference.metrics import serve_metrics
+from inference.warmup import run_warmup
+from main.jobs import WorkerPool
+
+
+class Command(BaseCommand):
+    help = "Run a pool of background workers that drain the inference job queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "INFERENCE_WORKERS", 2),
+            help="Number of worker threads in this process",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "INFERENCE_WORKER_BATCH_SIZE", 8),
+            help="Queued jobs each worker claims and classifies as one batch",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.5,
+            help="Seconds to wait before polling an empty queue again",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=None,
+            help="Serve Prometheus metrics of this process on this port",
+        )
+
+    def handle(self, *args, **options):
+        if options["metrics_port"]:
+            serve_metrics(options["metrics_port"])
+            self.stdout.write(f"Serving metrics on port {options['metrics_port']}")
+
+        if not settings.INFERENCE_SERVER_SOCKET:
+            self.stdout.write("Loading models")
+            run_warmup()
+
+        pool = WorkerPool(
+            workers=options["workers"],
+            poll_interval=options["poll_interval"],
+            batch_size=options["batch_size"],
+        )
+        pool.start()
+        self.stdout.write(f"Started {options['workers']} inference workers")
+
+        stopped = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: stopped.set())
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+        while not stopped.wait(1):
+            pass
+
+        self.stdout.write("Stopping inference workers")
+        pool.stop()
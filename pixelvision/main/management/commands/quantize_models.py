@@ -0,0 +1,69 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inference.onnx_export import TEST_IMAGES_DIR, export_model, load_all_specs
+from inference.quantization import (
+    DYNAMIC,
+    STATIC,
+    quantization_report,
+    quantize_model,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Quantize models to INT8 with ONNX Runtime, calibrated on the test "
+        "images, and report the accuracy delta against the speedup"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models", nargs="*", help="Models to quantize, all of them by default"
+        )
+        parser.add_argument("--mode", choices=[STATIC, DYNAMIC], default=STATIC)
+        parser.add_argument("--images", default=TEST_IMAGES_DIR)
+        parser.add_argument(
+            "--runs", type=int, default=20, help="Timed runs per model and precision"
+        )
+        parser.add_argument(
+            "--report",
+            default="models/onnx/quantization_report.json",
+            help="Where to write the JSON report",
+        )
+
+    def handle(self, *args, **options):
+        specs = load_all_specs()
+        names = options["models"] or sorted(specs)
+        unknown = [name for name in names if name not in specs]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}")
+
+        reports = []
+        for name in names:
+            spec = specs[name]
+            try:
+                if not os.path.exists(spec.onnx_path):
+                    export_model(spec)
+                quantize_model(spec, options["mode"], options["images"])
+                report = quantization_report(
+                    spec, options["mode"], options["images"], options["runs"]
+                )
+            except Exception as e:
+                self.stderr.write(f"{name}: quantization failed: {e}")
+                continue
+
+            reports.append(report)
+            self.stdout.write(
+                f"{name}: agreement {report['agreement']:.3f}, "
+                f"max diff {report['max_abs_diff']:.2e}, "
+                f"{report['fp32_ms']:.1f} ms -> {report['int8_ms']:.1f} ms "
+                f"(x{report['speedup']}), "
+                f"{report['fp32_mb']} MB -> {report['int8_mb']} MB"
+            )
+
+        os.makedirs(os.path.dirname(options["report"]) or ".", exist_ok=True)
+        with open(options["report"], "w") as report_file:
+            json.dump(reports, report_file, indent=2)
+        self.stdout.write(f"Report written to {options['report']}")
@@ -0,0 +1,28 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InferenceJob',
+            fields=[
+                ('JobID', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('Status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('Error', models.TextField(blank=True, null=True)),
+                ('Attempts', models.PositiveIntegerField(default=0)),
+                ('CreatedDateTime', models.DateTimeField(auto_now_add=True)),
+                ('StartedDateTime', models.DateTimeField(blank=True, null=True)),
+                ('FinishedDateTime', models.DateTimeField(blank=True, null=True)),
+                ('ImageID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='main.image')),
+                ('ResultID', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='main.recognitionresult')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_inferencejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='ContentHash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='recognitionresult',
+            name='ModelVersion',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['UserID', 'ContentHash'], name='image_user_hash_idx'),
+        ),
+    ]
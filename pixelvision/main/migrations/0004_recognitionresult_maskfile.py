@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_image_contenthash_recognitionresult_modelversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recognitionresult',
+            name='MaskFile',
+            field=models.FileField(blank=True, null=True, upload_to='masks/'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+import base64
+import binascii
+
+from django.core.files.base import ContentFile
+from django.db import migrations
+
+
+def masks_to_files(apps, schema_editor):
+    RecognitionResult = apps.get_model('main', 'RecognitionResult')
+    results = RecognitionResult.objects.exclude(MaskImageBase64__isnull=True).exclude(
+        MaskImageBase64=''
+    )
+    for result in results.iterator(chunk_size=100):
+        try:
+            data = base64.b64decode(result.MaskImageBase64)
+        except (binascii.Error, ValueError):
+            continue
+        # Older rows stored the original upload when there was no mask
+        extension = '.jpg' if data.startswith(b'\xff\xd8') else '.png'
+        result.MaskFile.save(
+            f'{result.ImageID_id}_mask{extension}', ContentFile(data), save=False
+        )
+        result.MaskImageBase64 = None
+        result.save(update_fields=['MaskFile', 'MaskImageBase64'])
+
+
+def files_to_masks(apps, schema_editor):
+    RecognitionResult = apps.get_model('main', 'RecognitionResult')
+    for result in RecognitionResult.objects.exclude(MaskFile='').iterator(chunk_size=100):
+        if not result.MaskFile:
+            continue
+        with result.MaskFile.open('rb') as mask_file:
+            result.MaskImageBase64 = base64.b64encode(mask_file.read()).decode('utf-8')
+        result.MaskFile.delete(save=False)
+        result.save(update_fields=['MaskFile', 'MaskImageBase64'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_recognitionresult_maskfile'),
+    ]
+
+    operations = [
+        migrations.RunPython(masks_to_files, files_to_masks),
+    ]
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_user_stats(apps, schema_editor):
+    Image = apps.get_model('main', 'Image')
+    RecognitionResult = apps.get_model('main', 'RecognitionResult')
+    UserStats = apps.get_model('main', 'UserStats')
+
+    images = Image.objects.values('UserID').annotate(
+        total=Count('ImageID'), size=Sum('FileSize')
+    )
+    results = {
+        row['ImageID__UserID']: row
+        for row in RecognitionResult.objects.values('ImageID__UserID').annotate(
+            total=Count('ResultID'),
+            timed=Count('ProcessingTime'),
+            time=Sum('ProcessingTime'),
+        )
+    }
+    UserStats.objects.bulk_create(
+        [
+            UserStats(
+                UserID_id=row['UserID'],
+                TotalImages=row['total'],
+                TotalFileSize=row['size'] or 0,
+                ProcessedImages=results.get(row['UserID'], {}).get('total', 0),
+                TimedResults=results.get(row['UserID'], {}).get('timed', 0),
+                TotalProcessingTime=(
+                    results.get(row['UserID'], {}).get('time') or Decimal('0')
+                ),
+            )
+            for row in images
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0005_move_masks_to_files'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('UserID', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('TotalImages', models.PositiveIntegerField(default=0)),
+                ('ProcessedImages', models.PositiveIntegerField(default=0)),
+                ('TotalFileSize', models.BigIntegerField(default=0)),
+                ('TimedResults', models.PositiveIntegerField(default=0)),
+                ('TotalProcessingTime', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
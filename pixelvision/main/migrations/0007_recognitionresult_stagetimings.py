@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_userstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recognitionresult',
+            name='StageTimings',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_recognitionresult_stagetimings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inferencejob',
+            name='BatchID',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
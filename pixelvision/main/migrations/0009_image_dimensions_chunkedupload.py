@@ -0,0 +1,41 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0008_inferencejob_batchid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='Width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='Height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('UploadID', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('FileName', models.CharField(max_length=255)),
+                ('FileSize', models.BigIntegerField()),
+                ('Offset', models.BigIntegerField(default=0)),
+                ('ImageFormat', models.CharField(blank=True, max_length=10, null=True)),
+                ('Width', models.PositiveIntegerField(blank=True, null=True)),
+                ('Height', models.PositiveIntegerField(blank=True, null=True)),
+                ('CreatedDateTime', models.DateTimeField(auto_now_add=True)),
+                ('UpdatedDateTime', models.DateTimeField(auto_now=True)),
+                ('UserID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
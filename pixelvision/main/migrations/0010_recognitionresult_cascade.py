@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_image_dimensions_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recognitionresult',
+            name='Cascade',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import base64
+import uuid
+
 from django.contrib.auth.models import User
 from django.db import models
 
@@ -13,6 +16,16 @@ class Image(models.Model):
     ImageFormat = models.CharField(
         max_length=10, null=True, blank=True
     )  # JPEG, PNG, etc.
+    ContentHash = models.CharField(
+        max_length=64, null=True, blank=True
+    )  # SHA-256 of the uploaded bytes
+    Width = models.PositiveIntegerField(null=True, blank=True)  # in pixels
+    Height = models.PositiveIntegerField(null=True, blank=True)  # in pixels
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["UserID", "ContentHash"], name="image_user_hash_idx")
+        ]
 
     def __str__(self):
         return self.FileName
@@ -27,7 +40,99 @@ class RecognitionResult(models.Model):
     ProcessingTime = models.DecimalField(
         max_digits=8, decimal_places=4, null=True, blank=True
     )  # in seconds
-    MaskImageBase64 = models.TextField(null=True, blank=True)  # Base64 encoded mask
+    MaskImageBase64 = models.TextField(
+        null=True, blank=True
+    )  # legacy inline mask, superseded by MaskFile
+    MaskFile = models.FileField(upload_to="masks/", null=True, blank=True)  # PNG mask
+    ModelVersion = models.CharField(
+        max_length=64, null=True, blank=True
+    )  # pipeline version that produced the result
+    StageTimings = models.JSONField(
+        null=True, blank=True
+    )  # seconds spent in each pipeline stage
+    Cascade = models.JSONField(
+        null=True, blank=True
+    )  # cascade policy applied and the stages it ran or skipped
 
     def __str__(self):
         return f"{self.Labels} - {self.ConfidenceScores}"
+
+    @property
+    def mask_url(self):
+        return self.MaskFile.url if self.MaskFile else None
+
+    def mask_base64(self):
+        """Base64 form of the mask, only built when a client asks for it"""
+        if self.MaskFile:
+            with self.MaskFile.open("rb") as mask_file:
+                return base64.b64encode(mask_file.read()).decode("utf-8")
+        return self.MaskImageBase64 or None
+
+
+class InferenceJob(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    JobID = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ImageID = models.ForeignKey(Image, on_delete=models.CASCADE)
+    Status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True
+    )
+    ResultID = models.ForeignKey(
+        RecognitionResult, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    BatchID = models.UUIDField(
+        null=True, blank=True, db_index=True
+    )  # shared by the jobs of one bulk upload
+    Error = models.TextField(null=True, blank=True)
+    Attempts = models.PositiveIntegerField(default=0)
+    CreatedDateTime = models.DateTimeField(auto_now_add=True)
+    StartedDateTime = models.DateTimeField(null=True, blank=True)
+    FinishedDateTime = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.JobID} - {self.Status}"
+
+
+class UserStats(models.Model):
+    """Per-user counters kept up to date as images and results change"""
+
+    UserID = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    TotalImages = models.PositiveIntegerField(default=0)
+    ProcessedImages = models.PositiveIntegerField(default=0)  # recognition results
+    TotalFileSize = models.BigIntegerField(default=0)  # in bytes
+    TimedResults = models.PositiveIntegerField(default=0)  # results with a ProcessingTime
+    TotalProcessingTime = models.DecimalField(
+        max_digits=14, decimal_places=4, default=0
+    )  # in seconds
+
+    def __str__(self):
+        return f"{self.UserID} - {self.TotalImages} images"
+
+
+class ChunkedUpload(models.Model):
+    """A large file uploaded in resumable chunks, assembled on disk"""
+
+    UploadID = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    UserID = models.ForeignKey(User, on_delete=models.CASCADE)
+    FileName = models.CharField(max_length=255)
+    FileSize = models.BigIntegerField()  # in bytes, announced when starting
+    Offset = models.BigIntegerField(default=0)  # bytes received so far
+    ImageFormat = models.CharField(
+        max_length=10, null=True, blank=True
+    )  # read from the headers once they arrive
+    Width = models.PositiveIntegerField(null=True, blank=True)
+    Height = models.PositiveIntegerField(null=True, blank=True)
+    CreatedDateTime = models.DateTimeField(auto_now_add=True)
+    UpdatedDateTime = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.FileName} - {self.Offset}/{self.FileSize}"
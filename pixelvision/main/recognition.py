@@ -0,0 +1,212 @@
+import base64
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from inference.cascade import made_mask
+from inference.client import InferenceClient
+from inference.metrics import collect_timings, observe_recognition
+from inference.versions import pipeline_version
+
+from .models import RecognitionResult
+from .stats import refresh_user_stats
+
+
+def classify(image_url, decoded=None):
+    """Classify through the shared inference server when one is configured.
+
+    Without ``INFERENCE_SERVER_SOCKET`` the models are loaded in this process
+    and an already decoded image is used as is instead of reading the file.
+    Returns the predicted class, score, mask, cascade report and per-stage
+    timings.
+    """
+    socket_path = getattr(settings, "INFERENCE_SERVER_SOCKET", None)
+    if socket_path:
+        return InferenceClient(socket_path).classify_image(image_url)
+
+    from image_classification import classify_image
+
+    with collect_timings() as timings:
+        predicted_class, result, mask_img, cascade = classify_image(
+            decoded if decoded is not None else image_url
+        )
+    return predicted_class, result, mask_img, cascade, timings
+
+
+def classify_many(image_urls, decoded_images=None):
+    """Batched ``classify``, returns one output per image and the batch's timings.
+
+    ``decoded_images`` may hold ``None`` for images that are read from storage.
+    """
+    socket_path = getattr(settings, "INFERENCE_SERVER_SOCKET", None)
+    if socket_path:
+        return InferenceClient(socket_path).classify_batch(image_urls)
+
+    from image_classification import classify_batch
+
+    if decoded_images is not None:
+        image_urls = [
+            decoded if decoded is not None else url
+            for url, decoded in zip(image_urls, decoded_images)
+        ]
+    with collect_timings() as timings:
+        outputs = classify_batch(image_urls)
+    return outputs, timings
+
+
+def result_fields(image, output, processing_time, timings):
+    """RecognitionResult fields for one pipeline output"""
+    predicted_class, result, mask_img, cascade = output
+    observe_recognition(predicted_class, processing_time, timings)
+    return {
+        "Labels": predicted_class,
+        "ConfidenceScores": Decimal(str(float(result))),
+        "ProcessingTime": Decimal(str(round(processing_time, 4))),
+        "MaskImageBase64": None,
+        "MaskFile": mask_file(image, mask_img, cascade),
+        "ModelVersion": pipeline_version(),
+        "StageTimings": timings,
+        "Cascade": cascade,
+    }
+
+
+def store_result(image, fields):
+    """Save ``fields`` as the RecognitionResult of ``image``.
+
+    An image keeps a single result. Reprocessing, or a re-upload whose result
+    came from older models, updates the latest result in place and removes
+    its old mask file, any older results are deleted along with theirs.
+    Returns the result row and whether it was newly created.
+    """
+    results = RecognitionResult.objects.filter(ImageID=image)
+    latest = results.order_by("-ResultID").first()
+    if latest is None:
+        return RecognitionResult.objects.create(ImageID=image, **fields), True
+
+    # Deleted one by one, so the signals remove their masks and counters
+    for older in results.exclude(ResultID=latest.ResultID):
+        older.delete()
+    if latest.MaskFile:
+        latest.MaskFile.delete(save=False)
+    for field, value in fields.items():
+        setattr(latest, field, value)
+    latest.save()
+    return latest, False
+
+
+def run_recognition(image, decoded=None):
+    """Classify an image and persist its RecognitionResult.
+
+    Returns the result row and whether it was newly created, see
+    ``store_result``.
+    """
+    start_time = time.time()
+    predicted_class, result, mask_img, cascade, timings = classify(
+        image.ImageFile.url, decoded
+    )
+    processing_time = time.time() - start_time
+
+    output = (predicted_class, result, mask_img, cascade)
+    return store_result(image, result_fields(image, output, processing_time, timings))
+
+
+def run_batch_recognition(images, decoded_images=None):
+    """Classify images as one batch and bulk create their RecognitionResults.
+
+    The batch's processing time and stage timings are split evenly between
+    its images. Images that already have a result, from older models, have
+    it replaced through ``store_result``, the others are bulk created. Bulk
+    creation skips the stats signals, so the counters of the affected users
+    are rebuilt afterwards.
+    """
+    start_time = time.time()
+    outputs, timings = classify_many(
+        [image.ImageFile.url for image in images], decoded_images
+    )
+    processing_time = (time.time() - start_time) / len(images)
+    shared_timings = {
+        stage: {
+            "model": entry.get("model"),
+            "seconds": round(entry["seconds"] / len(images), 6),
+        }
+        for stage, entry in timings.items()
+    }
+
+    fields = [
+        result_fields(image, output, processing_time, shared_timings)
+        for image, output in zip(images, outputs)
+    ]
+    replaced = set(
+        RecognitionResult.objects.filter(ImageID__in=images).values_list(
+            "ImageID_id", flat=True
+        )
+    )
+    created = iter(
+        RecognitionResult.objects.bulk_create(
+            [
+                RecognitionResult(ImageID=image, **image_fields)
+                for image, image_fields in zip(images, fields)
+                if image.ImageID not in replaced
+            ]
+        )
+    )
+    results = [
+        store_result(image, image_fields)[0]
+        if image.ImageID in replaced
+        else next(created)
+        for image, image_fields in zip(images, fields)
+    ]
+    for user_id in {image.UserID_id for image in images}:
+        refresh_user_stats(user_id)
+    return results
+
+
+def mask_file(image, mask_img, cascade):
+    """Binary PNG for the base64 mask returned by the pipeline.
+
+    When the cascade made no mask the pipeline may hand back the input image
+    instead, that copy is not stored.
+    """
+    if not mask_img or not made_mask(cascade):
+        return None
+    return ContentFile(base64.b64decode(mask_img), name=f"{image.ImageID}_mask.png")
+
+
+def find_cached_result(image):
+    """Latest result for ``image`` produced by the current models, if any"""
+    return (
+        RecognitionResult.objects.filter(ImageID=image, ModelVersion=pipeline_version())
+        .order_by("-ResultID")
+        .first()
+    )
+
+
+def wants_mask_base64(request):
+    """Clients opt in to inline masks with ``include_mask=base64``"""
+    value = request.GET.get("include_mask") or request.POST.get("include_mask")
+    return value == "base64"
+
+
+def recognition_payload(image, recognition_result, include_mask_base64=False):
+    """Response body shared by synchronous uploads and finished jobs"""
+    result = float(recognition_result.ConfidenceScores)
+    payload = {
+        "success": True,
+        "image_id": image.ImageID,
+        "predicted_class": recognition_result.Labels,
+        "result": result,
+        "confidence_score": result,
+        "mask_url": recognition_result.mask_url,
+        "has_mask": bool(recognition_result.MaskFile),
+        "recognition_result_id": recognition_result.ResultID,
+        "processing_time": float(recognition_result.ProcessingTime),
+        "stage_timings": recognition_result.StageTimings,
+        "cascade": recognition_result.Cascade,
+        "file_size": image.FileSize,
+        "image_format": image.ImageFormat,
+    }
+    if include_mask_base64:
+        payload["mask_img"] = recognition_result.mask_base64()
+    return payload
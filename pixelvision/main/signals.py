@@ -0,0 +1,74 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .derivatives import delete_derivatives
+from .models import Image, RecognitionResult
+from .stats import adjust_user_stats, refresh_user_stats
+
+
+@receiver(post_delete, sender=RecognitionResult)
+def delete_mask_file(sender, instance, **kwargs):
+    """Remove the stored mask along with its result, including cascaded deletes"""
+    if instance.MaskFile:
+        instance.MaskFile.delete(save=False)
+
+
+def result_user_id(result):
+    return (
+        Image.objects.filter(ImageID=result.ImageID_id)
+        .values_list("UserID_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Image)
+def count_image(sender, instance, created, **kwargs):
+    if created:
+        adjust_user_stats(
+            instance.UserID_id, TotalImages=1, TotalFileSize=instance.FileSize or 0
+        )
+
+
+@receiver(post_delete, sender=Image)
+def remove_derivatives(sender, instance, **kwargs):
+    delete_derivatives(instance.ImageID)
+
+
+@receiver(post_delete, sender=Image)
+def uncount_image(sender, instance, **kwargs):
+    adjust_user_stats(
+        instance.UserID_id, TotalImages=-1, TotalFileSize=-(instance.FileSize or 0)
+    )
+
+
+@receiver(post_save, sender=RecognitionResult)
+def count_result(sender, instance, created, **kwargs):
+    user_id = result_user_id(instance)
+    if user_id is None:
+        return
+    if not created:
+        # Reprocessing replaces the timing of an existing result
+        refresh_user_stats(user_id)
+        return
+    timed = instance.ProcessingTime is not None
+    adjust_user_stats(
+        user_id,
+        ProcessedImages=1,
+        TimedResults=1 if timed else 0,
+        TotalProcessingTime=instance.ProcessingTime if timed else 0,
+    )
+
+
+@receiver(post_delete, sender=RecognitionResult)
+def uncount_result(sender, instance, **kwargs):
+    # Cascaded deletes remove results before their image, so it can still be read
+    user_id = result_user_id(instance)
+    if user_id is None:
+        return
+    timed = instance.ProcessingTime is not None
+    adjust_user_stats(
+        user_id,
+        ProcessedImages=-1,
+        TimedResults=-1 if timed else 0,
+        TotalProcessingTime=-instance.ProcessingTime if timed else 0,
+    )
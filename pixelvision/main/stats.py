@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from django.db.models import Count, F, Sum
+
+from .models import Image, RecognitionResult, UserStats
+
+
+def aggregate_stats(user_id):
+    """Compute a user's counters from scratch with database aggregates"""
+    images = Image.objects.filter(UserID_id=user_id).aggregate(
+        total=Count("ImageID"), size=Sum("FileSize")
+    )
+    results = RecognitionResult.objects.filter(ImageID__UserID_id=user_id).aggregate(
+        total=Count("ResultID"),
+        timed=Count("ProcessingTime"),
+        time=Sum("ProcessingTime"),
+    )
+    return {
+        "TotalImages": images["total"],
+        "TotalFileSize": images["size"] or 0,
+        "ProcessedImages": results["total"],
+        "TimedResults": results["timed"],
+        "TotalProcessingTime": results["time"] or Decimal("0"),
+    }
+
+
+def refresh_user_stats(user_id):
+    stats, _ = UserStats.objects.update_or_create(
+        UserID_id=user_id, defaults=aggregate_stats(user_id)
+    )
+    return stats
+
+
+def get_user_stats(user):
+    """The user's counters row, built from aggregates the first time it is needed"""
+    try:
+        return UserStats.objects.get(UserID=user)
+    except UserStats.DoesNotExist:
+        return refresh_user_stats(user.id)
+
+
+def adjust_user_stats(user_id, **deltas):
+    """Apply incremental changes to an existing counters row.
+
+    A missing row is left alone, it is rebuilt from aggregates on next read.
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if updates:
+        UserStats.objects.filter(UserID_id=user_id).update(**updates)
@@ -0,0 +1,35 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from inference.admission import AdmissionController
+from main.models import Image, RecognitionResult
+
+
+class OverloadedResponseTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+        self.image = Image.objects.create(
+            UserID=self.user,
+            FileName="a.png",
+            FilePath="/media/a.png",
+            ImageFile="a.png",
+        )
+        self.controller = AdmissionController(max_in_flight=1, max_queue=0)
+        patcher = mock.patch("main.views.inference_admission", self.controller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shed_request_gets_503_with_retry_after(self):
+        with self.controller.admit("someone else"):
+            response = self.client.post(
+                reverse("api_process_image", args=[self.image.ImageID])
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["reason"], "queue_full")
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertFalse(RecognitionResult.objects.exists())
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image as PILImage
+
+from inference.image import DecodedImage
+from main.models import Image, InferenceJob, RecognitionResult
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png_file(name, color):
+    buffer = BytesIO()
+    PILImage.new("RGB", (32, 32), color).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+def classify_many(image_urls, decoded_images=None):
+    return [("Bone Fracture", 0.8, None, None)] * len(image_urls), {}
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, INFERENCE_PIPELINE_VERSION="test")
+class BulkUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+        self.decodes = mock.patch(
+            "main.views.DecodedImage.from_bytes", side_effect=DecodedImage.from_bytes
+        )
+
+    def upload(self, files):
+        with self.decodes as decodes:
+            response = self.client.post(reverse("api_bulk_upload"), {"files": files})
+        return response, decodes.call_count
+
+    @override_settings(BULK_UPLOAD_SYNC_LIMIT=16)
+    @mock.patch("main.recognition.classify_many", classify_many)
+    def test_small_set_is_classified_inline(self):
+        files = [png_file("a.png", (255, 0, 0)), png_file("b.png", (0, 255, 0))]
+
+        response, decodes = self.upload(files)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(
+            [entry["predicted_class"] for entry in data["files"]],
+            ["Bone Fracture", "Bone Fracture"],
+        )
+        self.assertEqual(decodes, 2)
+        self.assertEqual(RecognitionResult.objects.count(), 2)
+
+    @override_settings(BULK_UPLOAD_SYNC_LIMIT=1)
+    def test_large_set_is_queued_without_decoding(self):
+        files = [
+            png_file("a.png", (255, 0, 0)),
+            png_file("b.png", (0, 255, 0)),
+            png_file("c.png", (0, 0, 255)),
+            png_file("copy.png", (255, 0, 0)),
+        ]
+
+        response, decodes = self.upload(files)
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        # Only files that could still have run inline were decoded
+        self.assertLessEqual(decodes, 1)
+        self.assertEqual(Image.objects.count(), 3)
+        self.assertEqual(
+            InferenceJob.objects.filter(BatchID=data["batch_id"]).count(), 3
+        )
+        jobs = {entry["file_name"]: entry["job_id"] for entry in data["files"]}
+        self.assertEqual(jobs["copy.png"], jobs["a.png"])
+
+    def test_invalid_files_are_reported_per_file(self):
+        files = [
+            png_file("a.png", (255, 0, 0)),
+            SimpleUploadedFile("notes.txt", b"not an image"),
+        ]
+
+        with mock.patch("main.recognition.classify_many", classify_many):
+            response, _ = self.upload(files)
+
+        data = response.json()
+        self.assertEqual(data["failed"], 1)
+        self.assertEqual(data["files"][1]["file_name"], "notes.txt")
+        self.assertIn("error", data["files"][1])
@@ -0,0 +1,33 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from main.chat import ChatSlots, _client
+
+
+class ChatSlotsTests(SimpleTestCase):
+    def test_limit_holds_across_event_loops(self):
+        slots = ChatSlots(1)
+        # Every asyncio.run is a new loop, as for requests under WSGI
+        asyncio.run(slots.acquire(timeout=1))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(slots.acquire(timeout=0.05))
+
+        slots.release()
+        asyncio.run(slots.acquire(timeout=1))
+        slots.release()
+
+
+class ChatClientTests(SimpleTestCase):
+    def test_client_is_reused_on_its_loop(self):
+        async def twice():
+            return await _client(), await _client()
+
+        first, second = asyncio.run(twice())
+        self.assertIs(first, second)
+
+    def test_client_is_closed_when_its_loop_shuts_down(self):
+        client = asyncio.run(_client())
+
+        self.assertTrue(client.is_closed)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from main.chat import PROMPT_TEMPLATE, chat_payload
+from main.chat_cache import (
+    FileChatCache,
+    MemoryChatCache,
+    cache_key,
+    normalize_question,
+)
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_equivalent_questions_share_a_key(self):
+        for question in ("What is a  glioma?", "what is a glioma", "WHAT IS A GLIOMA!"):
+            with self.subTest(question=question):
+                self.assertEqual(normalize_question(question), "what is a glioma")
+                self.assertEqual(
+                    cache_key(question, chat_payload(question), PROMPT_TEMPLATE),
+                    cache_key("what is a glioma", chat_payload("x"), PROMPT_TEMPLATE),
+                )
+
+    def test_prompt_and_model_are_part_of_the_key(self):
+        payload = chat_payload("glioma")
+        key = cache_key("glioma", payload, PROMPT_TEMPLATE)
+        self.assertNotEqual(key, cache_key("glioma", payload, "other {question}"))
+        self.assertNotEqual(
+            key, cache_key("glioma", dict(payload, model="other"), PROMPT_TEMPLATE)
+        )
+
+
+class ChatCacheBehaviour:
+    """Tests run against every backend, ``make_cache`` builds one"""
+
+    def test_round_trip_and_stats(self):
+        cache = self.make_cache(ttl_seconds=60, max_entries=10)
+        self.assertIsNone(cache.get("key"))
+
+        cache.set("key", ["A glioma ", "is a tumor."])
+
+        self.assertEqual(cache.get("key"), ["A glioma ", "is a tumor."])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["entries"], 1)
+
+    def test_entries_expire(self):
+        cache = self.make_cache(ttl_seconds=60, max_entries=10)
+        cache.set("key", ["answer"])
+
+        with mock.patch("main.chat_cache.time.time", return_value=10**12):
+            self.assertIsNone(cache.get("key"))
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = self.make_cache(ttl_seconds=60, max_entries=2)
+        cache.set("a", ["1"])
+        cache.set("b", ["2"])
+        self.touch(cache, "a")
+        cache.set("c", ["3"])
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ["1"])
+        self.assertEqual(cache.get("c"), ["3"])
+
+    def touch(self, cache, key):
+        cache.get(key)
+
+
+class MemoryChatCacheTests(ChatCacheBehaviour, SimpleTestCase):
+    def make_cache(self, ttl_seconds, max_entries):
+        return MemoryChatCache(ttl_seconds, max_entries)
+
+
+class FileChatCacheTests(ChatCacheBehaviour, SimpleTestCase):
+    def make_cache(self, ttl_seconds, max_entries):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        return FileChatCache(ttl_seconds, max_entries, path)
+
+    def touch(self, cache, key):
+        # File modification times are the LRU order, make the use unambiguous
+        os.utime(cache._file(key), (2**31, 2**31))
+
+    def test_unreadable_entries_are_misses(self):
+        cache = self.make_cache(ttl_seconds=60, max_entries=10)
+        with open(cache._file("key"), "w") as cache_file:
+            cache_file.write("{not json")
+
+        self.assertIsNone(cache.get("key"))
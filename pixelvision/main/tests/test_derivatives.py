@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image as PILImage
+
+from main.derivatives import derivative_path
+from main.models import Image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    IMAGE_DERIVATIVE_SIZES={"thumbnail": 64, "preview": 256},
+)
+class ImageDerivativeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+        buffer = BytesIO()
+        PILImage.new("RGB", (400, 200), (0, 128, 255)).save(buffer, format="PNG")
+        self.image = Image(UserID=self.user, FileName="scan.png", FilePath="")
+        self.image.ImageFile.save("scan.png", ContentFile(buffer.getvalue()))
+
+    def get(self, size):
+        return self.client.get(
+            reverse("api_image_derivative", args=[self.image.ImageID, size])
+        )
+
+    def test_derivative_is_rendered_once_and_cached(self):
+        response = self.get("thumbnail")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        with PILImage.open(BytesIO(b"".join(response.streaming_content))) as webp:
+            self.assertEqual((webp.format, webp.size), ("WEBP", (64, 32)))
+        response.close()
+
+        path = derivative_path(self.image.ImageID, "thumbnail")
+        rendered = os.path.getmtime(path)
+        self.get("thumbnail").close()
+        self.assertEqual(os.path.getmtime(path), rendered)
+
+    def test_unknown_size(self):
+        self.assertEqual(self.get("poster").status_code, 404)
+
+    def test_other_users_cannot_read_derivatives(self):
+        other = User.objects.create_user("bob", password="secret")
+        self.client.force_login(other)
+
+        self.assertEqual(self.get("thumbnail").status_code, 403)
+
+    def test_derivatives_are_removed_with_their_image(self):
+        self.get("preview").close()
+        path = derivative_path(self.image.ImageID, "preview")
+        self.assertTrue(os.path.exists(path))
+
+        self.image.delete()
+
+        self.assertFalse(os.path.exists(path))
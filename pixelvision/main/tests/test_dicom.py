@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import (
+    ExplicitVRLittleEndian,
+    SecondaryCaptureImageStorage,
+    generate_uid,
+)
+
+from main.dicom import group_series, series_hash, spool_dicom
+
+
+def dicom_bytes(series_uid=None):
+    meta = FileMetaDataset()
+    meta.MediaStorageSOPClassUID = SecondaryCaptureImageStorage
+    meta.MediaStorageSOPInstanceUID = generate_uid()
+    meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    dataset = Dataset()
+    dataset.file_meta = meta
+    dataset.SOPClassUID = meta.MediaStorageSOPClassUID
+    dataset.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    if series_uid:
+        dataset.SeriesInstanceUID = series_uid
+    dataset.Rows = dataset.Columns = 4
+    dataset.SamplesPerPixel = 1
+    dataset.PhotometricInterpretation = "MONOCHROME2"
+    dataset.BitsAllocated = dataset.BitsStored = 8
+    dataset.HighBit = 7
+    dataset.PixelRepresentation = 0
+    dataset.PixelData = bytes(16)
+    buffer = BytesIO()
+    dataset.save_as(buffer, enforce_file_format=True)
+    return buffer.getvalue()
+
+
+class SeriesGroupingTests(SimpleTestCase):
+    def setUp(self):
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool)
+
+    def spool_files(self, files):
+        spooled = []
+        for index, (name, data) in enumerate(files):
+            path, uid = spool_dicom(self.spool, index, data)
+            spooled.append((name, path, f"hash-{index}", uid))
+        return spooled
+
+    def test_files_are_grouped_by_series(self):
+        first, second = generate_uid(), generate_uid()
+        spooled = self.spool_files(
+            [
+                ("1.dcm", dicom_bytes(first)),
+                ("2.dcm", dicom_bytes(second)),
+                ("3.dcm", dicom_bytes(first)),
+                ("lone.dcm", dicom_bytes()),
+            ]
+        )
+
+        series = group_series(spooled)
+
+        self.assertEqual(
+            {uid: [name for name, _, _ in files] for uid, files in series.items()},
+            {first: ["1.dcm", "3.dcm"], second: ["2.dcm"], "lone.dcm": ["lone.dcm"]},
+        )
+
+    def test_only_paths_are_kept(self):
+        data = dicom_bytes(generate_uid())
+        path, _ = spool_dicom(self.spool, 0, data)
+
+        self.assertEqual(os.path.dirname(path), self.spool)
+        with open(path, "rb") as spooled:
+            self.assertEqual(spooled.read(), data)
+
+    def test_series_hash_ignores_file_order(self):
+        self.assertEqual(series_hash(["a", "b", "c"]), series_hash(["c", "a", "b"]))
+        self.assertNotEqual(series_hash(["a", "b"]), series_hash(["a", "c"]))
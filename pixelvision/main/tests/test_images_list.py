@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from main.models import Image, RecognitionResult
+
+
+def create_image(user, name):
+    return Image.objects.create(
+        UserID=user, FileName=name, FilePath=f"/media/{name}", ImageFile=name
+    )
+
+
+class ImagesListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+        self.images = [create_image(self.user, f"{index}.png") for index in range(7)]
+        # Several uploads in the same instant are ordered by id
+        now = timezone.now()
+        for index, image in enumerate(self.images):
+            Image.objects.filter(pk=image.pk).update(
+                UploadDateTime=now - timedelta(seconds=index // 3)
+            )
+
+    def fetch_all(self, limit):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(reverse("api_images_list"), params)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(data["count"], limit)
+            seen.extend(item["image"]["ImageID"] for item in data["combined_data"])
+            cursor = data["next_cursor"]
+            self.assertEqual(data["has_more"], cursor is not None)
+            if cursor is None:
+                return seen
+
+    def test_pages_have_no_duplicates_or_gaps(self):
+        expected = list(
+            Image.objects.filter(UserID=self.user)
+            .order_by("-UploadDateTime", "-ImageID")
+            .values_list("ImageID", flat=True)
+        )
+        for limit in (1, 2, 3, 7, 20):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.fetch_all(limit), expected)
+
+    def test_uploads_after_the_first_page_do_not_shift_it(self):
+        first = self.client.get(reverse("api_images_list"), {"limit": 3}).json()
+        create_image(self.user, "new.png")
+        second = self.client.get(
+            reverse("api_images_list"), {"limit": 3, "cursor": first["next_cursor"]}
+        ).json()
+
+        first_ids = {item["image"]["ImageID"] for item in first["combined_data"]}
+        second_ids = {item["image"]["ImageID"] for item in second["combined_data"]}
+        self.assertFalse(first_ids & second_ids)
+
+    def test_latest_result_of_each_image(self):
+        image = self.images[0]
+        RecognitionResult.objects.create(
+            ImageID=image, Labels="Old", ConfidenceScores="0.5"
+        )
+        latest = RecognitionResult.objects.create(
+            ImageID=image, Labels="New", ConfidenceScores="0.9"
+        )
+
+        data = self.client.get(reverse("api_images_list"), {"limit": 20}).json()
+        results = {
+            item["image"]["ImageID"]: item["recognition_result"]
+            for item in data["combined_data"]
+        }
+        self.assertEqual(results[image.ImageID]["ResultID"], latest.ResultID)
+        self.assertIsNone(results[self.images[1].ImageID])
+
+    def test_other_users_images_are_not_listed(self):
+        other = User.objects.create_user("bob", password="secret")
+        create_image(other, "other.png")
+
+        self.assertEqual(len(self.fetch_all(20)), len(self.images))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("api_images_list"), {"cursor": "%%%"})
+        self.assertEqual(response.status_code, 400)
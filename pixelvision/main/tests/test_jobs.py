@@ -0,0 +1,99 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from main.jobs import claim_jobs, enqueue, enqueue_batch, run_jobs
+from main.models import Image, InferenceJob, RecognitionResult
+
+OUTPUT = ("Lung Cancer", 0.91, None, None)
+
+
+def classify(image_url, decoded=None):
+    return OUTPUT + ({},)
+
+
+def classify_many(image_urls, decoded_images=None):
+    return [OUTPUT] * len(image_urls), {}
+
+
+@override_settings(INFERENCE_PIPELINE_VERSION="test")
+@mock.patch("main.recognition.classify_many", classify_many)
+@mock.patch("main.recognition.classify", classify)
+class InferenceJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.images = [
+            Image.objects.create(
+                UserID=self.user,
+                FileName=f"{index}.png",
+                FilePath=f"/media/{index}.png",
+                ImageFile=f"{index}.png",
+            )
+            for index in range(3)
+        ]
+
+    def test_enqueue_reuses_a_pending_job(self):
+        job = enqueue(self.images[0])
+
+        self.assertEqual(enqueue(self.images[0]), job)
+        self.assertEqual(InferenceJob.objects.count(), 1)
+
+    def test_claim_marks_jobs_running(self):
+        _, jobs = enqueue_batch(self.images)
+
+        claimed = claim_jobs(2)
+
+        self.assertEqual(len(claimed), 2)
+        for job in claimed:
+            self.assertEqual(job.Status, InferenceJob.RUNNING)
+            self.assertEqual(job.Attempts, 1)
+        self.assertEqual(len(claim_jobs(5)), 1)
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_batch_of_jobs(self):
+        enqueue_batch(self.images)
+
+        finished = run_jobs(claim_jobs(3))
+
+        for job in finished:
+            job.refresh_from_db()
+            self.assertEqual(job.Status, InferenceJob.DONE)
+            self.assertEqual(job.ResultID.Labels, "Lung Cancer")
+            self.assertEqual(job.ResultID.ModelVersion, "test")
+
+    def test_failed_batch_is_retried_job_by_job(self):
+        enqueue_batch(self.images[:2])
+
+        def fail_on_second(image_url, decoded=None):
+            if image_url.endswith("1.png"):
+                raise RuntimeError("unreadable image")
+            return classify(image_url)
+
+        with mock.patch(
+            "main.jobs.run_batch_recognition", side_effect=RuntimeError
+        ), mock.patch("main.recognition.classify", fail_on_second):
+            finished = run_jobs(claim_jobs(2))
+
+        statuses = {job.ImageID.FileName: (job.Status, job.Error) for job in finished}
+        self.assertEqual(statuses["0.png"], (InferenceJob.DONE, None))
+        self.assertEqual(statuses["1.png"], (InferenceJob.FAILED, "unreadable image"))
+
+    def test_stale_result_is_replaced_not_duplicated(self):
+        stale = RecognitionResult.objects.create(
+            ImageID=self.images[0],
+            Labels="Bone Fracture",
+            ConfidenceScores=Decimal("0.4"),
+            ModelVersion="old",
+        )
+        enqueue(self.images[0])
+        enqueue_batch(self.images[1:])
+
+        run_jobs(claim_jobs(1))
+        run_jobs(claim_jobs(2))
+
+        results = RecognitionResult.objects.filter(ImageID=self.images[0])
+        self.assertEqual([result.ResultID for result in results], [stale.ResultID])
+        self.assertEqual(results[0].ModelVersion, "test")
+        self.assertEqual(RecognitionResult.objects.count(), 3)
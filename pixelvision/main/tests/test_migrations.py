@@ -0,0 +1,92 @@
+import base64
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+BEFORE = [("main", "0004_recognitionresult_maskfile")]
+AFTER = [("main", "0005_move_masks_to_files")]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class MoveMasksToFilesTests(TransactionTestCase):
+    """0005 moves base64 masks into files and clears the column"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes("main")
+        executor.migrate(BEFORE)
+        apps = executor.loader.project_state(BEFORE).apps
+
+        User = apps.get_model("auth", "User")
+        Image = apps.get_model("main", "Image")
+        RecognitionResult = apps.get_model("main", "RecognitionResult")
+        user = User.objects.create(username="alice")
+        image = Image.objects.create(
+            UserID=user, FileName="a.png", FilePath="/media/a.png", ImageFile="a.png"
+        )
+        self.image_id = image.ImageID
+
+        def create(mask):
+            return RecognitionResult.objects.create(
+                ImageID=image,
+                Labels="Lung Cancer",
+                ConfidenceScores=0.9,
+                MaskImageBase64=mask,
+            ).ResultID
+
+        self.png = create(base64.b64encode(b"\x89PNG mask").decode("utf-8"))
+        self.jpeg = create(base64.b64encode(b"\xff\xd8 original").decode("utf-8"))
+        self.empty = create(None)
+        self.broken = create("not base64!")
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(self.latest)
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def results(self, apps):
+        RecognitionResult = apps.get_model("main", "RecognitionResult")
+        return {result.ResultID: result for result in RecognitionResult.objects.all()}
+
+    def test_masks_move_to_files(self):
+        results = self.results(self.migrate(AFTER))
+
+        png = results[self.png]
+        self.assertIsNone(png.MaskImageBase64)
+        self.assertEqual(png.MaskFile.name, f"masks/{self.image_id}_mask.png")
+        with png.MaskFile.open("rb") as mask_file:
+            self.assertEqual(mask_file.read(), b"\x89PNG mask")
+        self.assertTrue(results[self.jpeg].MaskFile.name.endswith("_mask.jpg"))
+
+        self.assertFalse(results[self.empty].MaskFile)
+        # Undecodable masks are left in place rather than lost
+        self.assertEqual(results[self.broken].MaskImageBase64, "not base64!")
+        self.assertFalse(results[self.broken].MaskFile)
+
+    def test_reverse_restores_base64_masks(self):
+        self.migrate(AFTER)
+        mask_path = os.path.join(MEDIA_ROOT, "masks", f"{self.image_id}_mask.png")
+        self.assertTrue(os.path.exists(mask_path))
+
+        results = self.results(self.migrate(BEFORE))
+
+        self.assertEqual(
+            base64.b64decode(results[self.png].MaskImageBase64), b"\x89PNG mask"
+        )
+        self.assertFalse(results[self.png].MaskFile)
+        self.assertFalse(os.path.exists(mask_path))
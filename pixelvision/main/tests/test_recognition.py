@@ -0,0 +1,136 @@
+import base64
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+
+from inference.cascade import cascade_policy, cascade_report
+from inference.image import DecodedImage
+from main.models import Image, RecognitionResult
+from main.recognition import find_cached_result, mask_file, store_result
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, INFERENCE_PIPELINE_VERSION="v2")
+class StoreResultTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        user = User.objects.create_user("alice", password="secret")
+        self.image = Image.objects.create(
+            UserID=user, FileName="a.png", FilePath="/media/a.png", ImageFile="a.png"
+        )
+
+    def create_result(self, version, label):
+        return RecognitionResult.objects.create(
+            ImageID=self.image,
+            Labels=label,
+            ConfidenceScores=Decimal("0.5"),
+            ModelVersion=version,
+            MaskFile=ContentFile(b"mask", name=f"{label}_mask.png"),
+        )
+
+    def fields(self, label):
+        return {
+            "Labels": label,
+            "ConfidenceScores": Decimal("0.9"),
+            "ModelVersion": "v2",
+            "MaskFile": ContentFile(b"new mask", name="new_mask.png"),
+        }
+
+    def test_first_result_is_created(self):
+        result, created = store_result(self.image, self.fields("New"))
+
+        self.assertTrue(created)
+        self.assertEqual(find_cached_result(self.image), result)
+
+    def test_stale_result_is_replaced_in_place(self):
+        stale = self.create_result("v1", "Old")
+        old_mask = stale.MaskFile.path
+        self.assertIsNone(find_cached_result(self.image))
+
+        result, created = store_result(self.image, self.fields("New"))
+
+        self.assertFalse(created)
+        self.assertEqual(result.ResultID, stale.ResultID)
+        results = RecognitionResult.objects.filter(ImageID=self.image)
+        self.assertEqual(list(results), [result])
+        self.assertFalse(os.path.exists(old_mask))
+        self.assertEqual(find_cached_result(self.image), result)
+
+    def test_duplicate_results_are_collapsed_into_the_latest(self):
+        older = self.create_result("v1", "Older")
+        latest = self.create_result("v1", "Latest")
+        older_mask = older.MaskFile.path
+
+        result, created = store_result(self.image, self.fields("New"))
+
+        self.assertFalse(created)
+        self.assertEqual(result.ResultID, latest.ResultID)
+        self.assertEqual(
+            list(RecognitionResult.objects.filter(ImageID=self.image)), [result]
+        )
+        self.assertFalse(os.path.exists(older_mask))
+
+
+class MaskFileTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("alice", password="secret")
+        self.image = Image.objects.create(
+            UserID=user,
+            FileName="series.dcm",
+            FilePath="/media/series.dcm",
+            ImageFile="series.dcm",
+            ContentHash="series-hash",
+        )
+        self.frame = base64.b64encode(b"frame png").decode("utf-8")
+
+    def cascade(self, segmented):
+        return cascade_report(cascade_policy("lung_cancer"), True, segmented)
+
+    def test_segmentation_mask_is_stored(self):
+        mask = mask_file(self.image, self.frame, self.cascade(True))
+
+        self.assertEqual(mask.read(), b"frame png")
+        self.assertEqual(mask.name, f"{self.image.ImageID}_mask.png")
+
+    def test_series_frame_is_not_stored_when_segmentation_is_skipped(self):
+        self.assertIsNone(mask_file(self.image, self.frame, self.cascade(False)))
+
+    def test_invalid_series_frame_is_not_stored(self):
+        self.assertIsNone(mask_file(self.image, self.frame, None))
+
+
+@override_settings(
+    INFERENCE_CASCADE={"lung_cancer": {"segment": "gated", "min_score": 0.5}}
+)
+class SkippedMaskTests(TestCase):
+    """The upload handed back in place of a skipped mask is not stored again"""
+
+    def setUp(self):
+        buffer = BytesIO()
+        PILImage.new("RGB", (8, 8)).save(buffer, format="PNG")
+        self.data = buffer.getvalue()
+        user = User.objects.create_user("alice", password="secret")
+        self.image = Image.objects.create(
+            UserID=user, FileName="a.png", FilePath="/media/a.png", ImageFile="a.png"
+        )
+
+    def test_original_upload_is_not_stored(self):
+        from image_classification import finish_classification
+
+        decoded = DecodedImage.from_bytes(self.data)
+        _, _, mask_img, cascade = finish_classification(decoded, "lung_cancer", 0.2)
+
+        self.assertEqual(base64.b64decode(mask_img), self.data)
+        self.assertIsNone(mask_file(self.image, mask_img, cascade))
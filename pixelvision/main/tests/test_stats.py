@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from main.models import Image, RecognitionResult
+from main.recognition import store_result
+from main.stats import aggregate_stats, get_user_stats, refresh_user_stats
+
+
+class UserStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        # Counters are only adjusted once the row exists
+        refresh_user_stats(self.user.id)
+
+    def create_image(self, name, size):
+        return Image.objects.create(
+            UserID=self.user,
+            FileName=name,
+            FilePath=f"/media/{name}",
+            ImageFile=name,
+            FileSize=size,
+        )
+
+    def create_result(self, image, seconds):
+        return RecognitionResult.objects.create(
+            ImageID=image,
+            Labels="Lung Cancer",
+            ConfidenceScores=Decimal("0.9"),
+            ProcessingTime=seconds,
+        )
+
+    def assertCountersMatchAggregates(self):
+        stats = get_user_stats(self.user)
+        expected = aggregate_stats(self.user.id)
+        for field, value in expected.items():
+            self.assertEqual(getattr(stats, field), value, field)
+
+    def test_create_and_delete(self):
+        first = self.create_image("a.png", 1000)
+        second = self.create_image("b.png", 500)
+        self.create_result(first, Decimal("1.5"))
+        self.create_result(second, None)
+        self.assertCountersMatchAggregates()
+        stats = get_user_stats(self.user)
+        self.assertEqual(stats.TotalImages, 2)
+        self.assertEqual(stats.TotalFileSize, 1500)
+        self.assertEqual(stats.ProcessedImages, 2)
+        self.assertEqual(stats.TimedResults, 1)
+
+        first.delete()
+        self.assertCountersMatchAggregates()
+        stats = get_user_stats(self.user)
+        self.assertEqual(stats.TotalImages, 1)
+        self.assertEqual(stats.ProcessedImages, 1)
+        self.assertEqual(stats.TimedResults, 0)
+
+    def test_reprocess_replaces_the_timing(self):
+        image = self.create_image("a.png", 1000)
+        self.create_result(image, Decimal("2.0"))
+
+        store_result(image, {"ProcessingTime": Decimal("0.5")})
+
+        self.assertCountersMatchAggregates()
+        stats = get_user_stats(self.user)
+        self.assertEqual(stats.ProcessedImages, 1)
+        self.assertEqual(stats.TotalProcessingTime, Decimal("0.5"))
+
+    def test_user_stats_endpoint(self):
+        image = self.create_image("a.png", 2 * 1024 * 1024)
+        self.create_result(image, Decimal("1.0"))
+        self.create_image("b.png", 0)
+        self.client.force_login(self.user)
+
+        data = self.client.get(reverse("api_user_stats")).json()
+
+        self.assertEqual(data["total_images"], 2)
+        self.assertEqual(data["processed_images"], 1)
+        self.assertEqual(data["unprocessed_images"], 1)
+        self.assertEqual(data["total_file_size_mb"], 2.0)
+        self.assertEqual(data["average_processing_time"], 1.0)
@@ -0,0 +1,188 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image as PILImage
+
+from main.models import ChunkedUpload, Image, InferenceJob
+from main.stats import get_user_stats
+from main.uploads import (
+    UploadRejected,
+    append_chunk,
+    inspect_upload,
+    parse_content_range,
+    part_path,
+)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+CHUNKED_UPLOAD_DIR = os.path.join(MEDIA_ROOT, "chunked_uploads")
+
+
+def png_bytes(size=(64, 48)):
+    buffer = BytesIO()
+    PILImage.new("RGB", size, (120, 30, 200)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class ContentRangeTests(SimpleTestCase):
+    def test_valid_range(self):
+        self.assertEqual(parse_content_range("bytes 0-99/1000", 1000), (0, 99))
+
+    def test_missing_or_malformed(self):
+        for header in (None, "", "bytes 0-99", "items 0-99/1000"):
+            with self.subTest(header=header):
+                with self.assertRaises(UploadRejected) as raised:
+                    parse_content_range(header, 1000)
+                self.assertEqual(raised.exception.status, 400)
+
+    def test_range_outside_the_upload(self):
+        for header in ("bytes 0-99/2000", "bytes 99-0/1000", "bytes 900-1000/1000"):
+            with self.subTest(header=header):
+                with self.assertRaises(UploadRejected) as raised:
+                    parse_content_range(header, 1000)
+                self.assertEqual(raised.exception.status, 416)
+
+
+class InspectUploadTests(SimpleTestCase):
+    def test_reads_format_and_size_from_headers(self):
+        info = inspect_upload(BytesIO(png_bytes((64, 48))))
+        self.assertEqual(
+            (info["format"], info["width"], info["height"]), ("PNG", 64, 48)
+        )
+
+    @override_settings(UPLOAD_MAX_IMAGE_PIXELS=1000)
+    def test_refuses_images_over_the_pixel_limit(self):
+        with self.assertRaises(UploadRejected) as raised:
+            inspect_upload(BytesIO(png_bytes((64, 48))))
+        self.assertEqual(raised.exception.status, 413)
+
+    def test_refuses_files_that_are_not_images(self):
+        with self.assertRaises(UploadRejected):
+            inspect_upload(BytesIO(b"not an image at all"))
+
+
+@override_settings(CHUNKED_UPLOAD_DIR=CHUNKED_UPLOAD_DIR)
+class AppendChunkTests(SimpleTestCase):
+    def setUp(self):
+        self.upload = ChunkedUpload(FileName="a.png", FileSize=10)
+        self.addCleanup(shutil.rmtree, CHUNKED_UPLOAD_DIR, True)
+
+    def read_part(self):
+        with open(part_path(self.upload), "rb") as part:
+            return part.read()
+
+    def test_chunks_are_appended_in_order(self):
+        append_chunk(self.upload, BytesIO(b"01234"), 0, 4)
+        append_chunk(self.upload, BytesIO(b"56789"), 5, 9)
+
+        self.assertEqual(self.read_part(), b"0123456789")
+        self.assertEqual(self.upload.Offset, 10)
+
+    def test_resume_truncates_an_interrupted_chunk(self):
+        append_chunk(self.upload, BytesIO(b"01234"), 0, 4)
+        # A chunk cut off mid-way left bytes past the recorded offset
+        with open(part_path(self.upload), "ab") as part:
+            part.write(b"xyz")
+
+        append_chunk(self.upload, BytesIO(b"56789"), 5, 9)
+
+        self.assertEqual(self.read_part(), b"0123456789")
+
+    def test_short_chunk_is_rejected(self):
+        with self.assertRaises(UploadRejected):
+            append_chunk(self.upload, BytesIO(b"012"), 0, 4)
+        self.assertEqual(self.upload.Offset, 0)
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CHUNKED_UPLOAD_DIR=CHUNKED_UPLOAD_DIR,
+    INFERENCE_ASYNC_UPLOADS=True,
+)
+class ChunkedUploadViewTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+        self.data = png_bytes()
+
+    def start(self):
+        response = self.client.post(
+            reverse("api_start_chunked_upload"),
+            {"file_name": "scan.png", "file_size": len(self.data)},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["upload_url"]
+
+    def put(self, url, start, end):
+        return self.client.put(
+            url,
+            self.data[start : end + 1],
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{len(self.data)}",
+        )
+
+    def test_interrupted_upload_resumes_from_the_reported_offset(self):
+        url = self.start()
+        middle = len(self.data) // 2
+
+        self.assertEqual(self.put(url, 0, middle - 1).json()["offset"], middle)
+        offset = self.client.get(url).json()["offset"]
+        self.assertEqual(offset, middle)
+
+        response = self.put(url, offset, len(self.data) - 1)
+
+        self.assertEqual(response.status_code, 202)
+        image = Image.objects.get(ImageID=response.json()["image_id"])
+        with image.ImageFile.open("rb") as stored:
+            self.assertEqual(stored.read(), self.data)
+        self.assertTrue(InferenceJob.objects.filter(ImageID=image).exists())
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_chunk_not_at_the_offset_is_refused(self):
+        url = self.start()
+        self.put(url, 0, 9)
+
+        response = self.put(url, 20, 29)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 10)
+
+    def test_aborted_upload_is_removed(self):
+        url = self.start()
+        self.put(url, 0, 9)
+        upload = ChunkedUpload.objects.get()
+        self.assertTrue(os.path.exists(part_path(upload)))
+
+        self.assertEqual(self.client.delete(url).status_code, 200)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertFalse(os.path.exists(part_path(upload)))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, INFERENCE_ASYNC_UPLOADS=False)
+class UploadImageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="secret")
+        self.client.force_login(self.user)
+
+    def test_undecodable_upload_leaves_nothing_behind(self):
+        # A valid header followed by truncated pixel data
+        corrupt = png_bytes((256, 256))[:120]
+        upload = SimpleUploadedFile("scan.png", corrupt, content_type="image/png")
+
+        response = self.client.post(reverse("api_upload_image"), {"ImageFile": upload})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Image.objects.exists())
+        self.assertEqual(get_user_stats(self.user).TotalImages, 0)
+        self.assertFalse(os.path.exists(os.path.join(MEDIA_ROOT, "scan.png")))
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from inference.dicom import dataset_metadata, is_dicom, read_header
+
+from .dicom import DICOM_FORMAT
+from .models import ChunkedUpload
+
+# Chunked uploads are inspected once this much of the file has arrived,
+# image headers are well within it
+SNIFF_BYTES = 1024 * 1024
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadRejected(Exception):
+    """An upload refused before decoding, ``status`` is the HTTP status to use"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def max_upload_bytes():
+    return getattr(settings, "UPLOAD_MAX_FILE_MB", 200) * 1024 * 1024
+
+
+def max_image_pixels():
+    return getattr(settings, "UPLOAD_MAX_IMAGE_PIXELS", 64_000_000)
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Streams uploaded files to temporary files, hashing them on the way.
+
+    Nothing is kept in memory beyond the chunk being written. Uploads that
+    grow past ``UPLOAD_MAX_FILE_MB`` are cut off as soon as they do, and
+    ``request.upload_too_large`` is set. The files handed to the view carry
+    their SHA-256 as ``sha256``.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > max_upload_bytes():
+            self.file.close()
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+
+def inspect_upload(source):
+    """Format and dimensions of an upload, read from its headers only.
+
+    ``source`` is a path or a file object. Returns ``{"format", "width",
+    "height", "dicom"}``, with the DICOM header summary for DICOM files.
+    Raises ``UploadRejected`` for files that are not readable images and for
+    images over ``UPLOAD_MAX_IMAGE_PIXELS``, which would be decompression
+    bombs, before their pixels are decoded.
+    """
+    is_path = isinstance(source, (str, os.PathLike))
+    if is_path:
+        with open(source, "rb") as upload:
+            head = upload.read(132)
+    else:
+        head = source.read(132)
+        source.seek(0)
+
+    dicom = None
+    try:
+        if is_dicom(head):
+            try:
+                dicom = dataset_metadata(read_header(source))
+            except Exception:
+                raise UploadRejected("Could not read DICOM headers")
+            image_format, width, height = DICOM_FORMAT, dicom["columns"], dicom["rows"]
+        else:
+            try:
+                # Opening parses the header, pixels are only decoded on load()
+                with PILImage.open(source) as img:
+                    image_format, (width, height) = img.format, img.size
+            except PILImage.DecompressionBombError:
+                raise UploadRejected("Image has too many pixels", 413)
+            except Exception:
+                raise UploadRejected("Could not read image header")
+    finally:
+        if not is_path:
+            source.seek(0)
+
+    if width * height > max_image_pixels():
+        raise UploadRejected(
+            f"Image of {width}x{height} pixels exceeds the limit of "
+            f"{max_image_pixels()} pixels",
+            413,
+        )
+    return {
+        "format": image_format or "UNKNOWN",
+        "width": width,
+        "height": height,
+        "dicom": dicom,
+    }
+
+
+# Resumable chunked uploads
+
+
+class PartialFile(File):
+    """A file on local disk, such as an assembled chunked upload, moved into
+    storage rather than copied"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def chunked_upload_dir():
+    return getattr(settings, "CHUNKED_UPLOAD_DIR", "chunked_uploads")
+
+
+def part_path(upload):
+    return os.path.join(chunked_upload_dir(), f"{upload.UploadID}.part")
+
+
+def parse_content_range(header, file_size):
+    """``(start, end)`` of a chunk from ``Content-Range: bytes start-end/total``"""
+    match = CONTENT_RANGE.match(header or "")
+    if not match:
+        raise UploadRejected("Content-Range header required")
+    start, end, total = (int(value) for value in match.groups())
+    if total != file_size or end < start or end >= file_size:
+        raise UploadRejected("Content-Range does not match the upload", 416)
+    return start, end
+
+
+def append_chunk(upload, stream, start, end):
+    """Write bytes ``start``-``end`` read from ``stream`` at the upload's offset.
+
+    Anything past the recorded offset, left by an interrupted chunk, is
+    truncated first. The body is copied in pieces, never read whole.
+    """
+    os.makedirs(chunked_upload_dir(), exist_ok=True)
+    remaining = end - start + 1
+    mode = "r+b" if os.path.exists(part_path(upload)) else "wb"
+    with open(part_path(upload), mode) as part:
+        part.truncate(upload.Offset)
+        part.seek(upload.Offset)
+        while remaining:
+            piece = stream.read(min(remaining, 64 * 1024))
+            if not piece:
+                break
+            part.write(piece)
+            remaining -= len(piece)
+    if remaining:
+        raise UploadRejected("Chunk shorter than its Content-Range")
+    upload.Offset = end + 1
+
+
+def sniff_chunked_upload(upload):
+    """Inspect the headers as soon as enough has arrived, once per upload"""
+    if upload.ImageFormat or upload.Offset < min(upload.FileSize, SNIFF_BYTES):
+        return
+    info = inspect_upload(part_path(upload))
+    upload.ImageFormat = info["format"]
+    upload.Width = info["width"]
+    upload.Height = info["height"]
+
+
+def assembled_file(upload):
+    """The complete upload and its SHA-256, hashed in a single read"""
+    digest = hashlib.sha256()
+    with open(part_path(upload), "rb") as part:
+        for block in iter(lambda: part.read(1024 * 1024), b""):
+            digest.update(block)
+    uploaded_file = PartialFile(open(part_path(upload), "rb"), name=upload.FileName)
+    return uploaded_file, digest.hexdigest()
+
+
+def discard_chunked_upload(upload):
+    try:
+        os.remove(part_path(upload))
+    except OSError:
+        pass
+    upload.delete()
+
+
+def expire_chunked_uploads():
+    """Drop chunked uploads left untouched for ``CHUNKED_UPLOAD_EXPIRY_HOURS``"""
+    hours = getattr(settings, "CHUNKED_UPLOAD_EXPIRY_HOURS", 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    for upload in ChunkedUpload.objects.filter(UpdatedDateTime__lt=cutoff):
+        discard_chunked_upload(upload)
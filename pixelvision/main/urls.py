@@ -13,13 +13,32 @@ urlpatterns = [
     path("profile/", views.profile, name="api_profile"),
     # Image management endpoints
     path("upload/", views.upload_image, name="api_upload_image"),
+    path("upload/bulk/", views.bulk_upload, name="api_bulk_upload"),
+    path(
+        "upload/chunked/", views.start_chunked_upload, name="api_start_chunked_upload"
+    ),
+    path(
+        "upload/chunked/<uuid:upload_id>/",
+        views.chunked_upload,
+        name="api_chunked_upload",
+    ),
     path("images/", views.images_list, name="api_images_list"),
     path("images/delete/<int:image_id>/", views.delete_image, name="api_delete_image"),
+    path(
+        "images/<int:image_id>/<str:size>/",
+        views.image_derivative,
+        name="api_image_derivative",
+    ),
     path("process/<int:image_id>/", views.process_image, name="api_process_image"),
+    path("jobs/<uuid:job_id>/", views.job_status, name="api_job_status"),
+    path("batches/<uuid:batch_id>/", views.batch_status, name="api_batch_status"),
     # Chat endpoint
     path("chat/", views.chat_with_phi, name="api_chat_with_phi"),
     # Utility endpoints
     path("health/", views.health_check, name="api_health_check"),
+    path("health/ready/", views.readiness_check, name="api_readiness_check"),
+    path("inference/status/", views.inference_status, name="api_inference_status"),
+    path("metrics", views.metrics_view, name="api_metrics"),
     path("stats/", views.user_stats, name="api_user_stats"),
     # Password change endpoints (keeping Django's built-in views but returning JSON)
     path(
@@ -1,38 +1,123 @@
+import base64
+import hashlib
 import json
-import re
-import time
-from decimal import Decimal
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from io import BytesIO
 
-import requests
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-from django.core.serializers import serialize
-from django.forms.models import model_to_dict
-from django.http import JsonResponse, StreamingHttpResponse
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
-from django.utils.html import escape
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from PIL import Image as PILImage
 
-from image_classification import classify_image
-
-from .forms import ImageUploadForm, RegisterForm, UpdateProfileForm
-from .models import Image, RecognitionResult
-
-OLLAMA_URL = "http://localhost:11434/api/generate"
-
-
-def get_image_metadata(image_file):
-    """Extract basic metadata from uploaded image"""
-    try:
-        with PILImage.open(image_file) as img:
-            format_name = img.format
-        file_size = image_file.size if hasattr(image_file, "size") else 0
-        return {"file_size": file_size, "format": format_name or "UNKNOWN"}
-    except Exception:
-        return {"file_size": 0, "format": "UNKNOWN"}
+from inference.admission import Overloaded, inference_admission
+from inference.batching import batching_stats
+from inference.client import InferenceClient, InferenceServerError
+from inference.dicom import is_dicom
+from inference.image import DecodedImage
+from inference.metrics import metrics
+from inference.registry import registry
+from inference.warmup import readiness, web_warmup_enabled
+
+from .chat import ChatUnavailable, open_chat_stream
+from .chat_cache import chat_cache
+from .derivatives import create_derivatives, derivative_sizes, ensure_derivative
+from .dicom import DICOM_FORMAT, group_series, save_series, series_hash, spool_dicom
+from .forms import RegisterForm, UpdateProfileForm
+from .jobs import batch_payload, enqueue, enqueue_batch, job_payload
+from .models import ChunkedUpload, Image, InferenceJob, RecognitionResult
+from .recognition import (
+    find_cached_result,
+    recognition_payload,
+    run_batch_recognition,
+    run_recognition,
+    wants_mask_base64,
+)
+from .stats import get_user_stats, refresh_user_stats
+from .uploads import (
+    HashingUploadHandler,
+    PartialFile,
+    UploadRejected,
+    append_chunk,
+    assembled_file,
+    discard_chunked_upload,
+    expire_chunked_uploads,
+    inspect_upload,
+    max_upload_bytes,
+    parse_content_range,
+    sniff_chunked_upload,
+)
+
+IMAGES_PAGE_SIZE = 20
+IMAGES_MAX_PAGE_SIZE = 100
+
+
+def read_upload(image_file):
+    """Read the uploaded bytes once and rewind the file for saving"""
+    data = b"".join(image_file.chunks())
+    image_file.seek(0)
+    return data
+
+
+def admission_key(request):
+    """Fairness key for admission control, the user or else the client address"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"addr:{request.META.get('REMOTE_ADDR')}"
+
+
+def overloaded_response(error):
+    response = JsonResponse({"error": str(error), "reason": error.reason}, status=503)
+    response["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def iter_bulk_files(uploaded_files, max_file_bytes):
+    """Yield ``(name, data, error)`` for each uploaded image, one file at a time.
+
+    ZIP archives are read member by member from the spooled upload, so only
+    the current image is held in memory. Folders, hidden files and macOS
+    metadata inside archives are skipped.
+    """
+    for uploaded_file in uploaded_files:
+        if not zipfile.is_zipfile(uploaded_file):
+            uploaded_file.seek(0)
+            if uploaded_file.size > max_file_bytes:
+                yield uploaded_file.name, None, "File too large"
+            else:
+                yield uploaded_file.name, read_upload(uploaded_file), None
+            continue
+
+        uploaded_file.seek(0)
+        with zipfile.ZipFile(uploaded_file) as archive:
+            for member in archive.infolist():
+                name = os.path.basename(member.filename)
+                if (
+                    member.is_dir()
+                    or not name
+                    or name.startswith(".")
+                    or member.filename.startswith("__MACOSX/")
+                ):
+                    continue
+                if member.file_size > max_file_bytes:
+                    yield name, None, "File too large"
+                    continue
+                with archive.open(member) as member_file:
+                    yield name, member_file.read(), None
 
 
 # Authentication Views
@@ -158,92 +243,566 @@ def profile(request):
             return JsonResponse({"error": str(e)}, status=500)
 
 
+def ingest_upload(request, uploaded_file, file_hash, info):
+    """Store a validated upload and classify it, or reuse an identical earlier one
+
+    ``info`` is the header summary from ``inspect_upload``, the only metadata
+    pass over the file. Pixels are decoded at most once, for synchronous
+    inference.
+    """
+    dicom = info["format"] == DICOM_FORMAT
+    content_hash = series_hash([file_hash]) if dicom else file_hash
+    asynchronous = getattr(settings, "INFERENCE_ASYNC_UPLOADS", False)
+    decoded = None
+
+    # Re-uploads of the same study reuse the stored image, and its result
+    # when the current models produced it
+    image = (
+        Image.objects.filter(UserID=request.user, ContentHash=content_hash)
+        .order_by("-ImageID")
+        .first()
+    )
+    if image is not None:
+        recognition_result = find_cached_result(image)
+        if recognition_result is not None:
+            return JsonResponse(
+                dict(
+                    recognition_payload(
+                        image, recognition_result, wants_mask_base64(request)
+                    ),
+                    cached=True,
+                )
+            )
+    else:
+        if not dicom and not asynchronous:
+            # Decoded before anything is stored or counted, so an upload that
+            # fails to decode leaves nothing behind
+            try:
+                decoded = DecodedImage.from_bytes(
+                    uploaded_file.read(), name=uploaded_file.name
+                )
+            except Exception:
+                return JsonResponse(
+                    {
+                        "error": "Invalid image upload",
+                        "errors": "Could not decode image",
+                    },
+                    status=400,
+                )
+            finally:
+                uploaded_file.seek(0)
+
+        if dicom:
+            image = save_series(
+                request.user, [(uploaded_file.name, uploaded_file)], content_hash
+            )
+        else:
+            image = Image(
+                UserID=request.user,
+                FileName=uploaded_file.name,
+                FileSize=uploaded_file.size,
+                ImageFormat=info["format"],
+                ContentHash=content_hash,
+            )
+            # Temporary files are moved into storage, not copied
+            image.ImageFile.save(uploaded_file.name, uploaded_file, save=False)
+            image.FilePath = image.ImageFile.url
+        image.Width = info["width"]
+        image.Height = info["height"]
+        image.save()
+
+    if asynchronous:
+        job = enqueue(image)
+        return JsonResponse(
+            {
+                "success": True,
+                "image_id": image.ImageID,
+                "job_id": str(job.JobID),
+                "status": job.Status,
+                "status_url": reverse("api_job_status", args=[job.JobID]),
+                "file_size": image.FileSize,
+                "image_format": image.ImageFormat,
+                "width": image.Width,
+                "height": image.Height,
+                "dicom": info["dicom"],
+            },
+            status=202,
+        )
+
+    # Images stored by an earlier upload are read back by the pipeline
+    if decoded is not None:
+        try:
+            create_derivatives(image, decoded.pil)
+        except OSError:
+            pass  # created on first request instead
+
+    try:
+        with inference_admission.admit(admission_key(request)):
+            recognition_result, _ = run_recognition(image, decoded=decoded)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        return JsonResponse(
+            {"error": f"Classification failed: {str(e)}", "image_id": image.ImageID},
+            status=500,
+        )
+
+    return JsonResponse(
+        recognition_payload(image, recognition_result, wants_mask_base64(request))
+    )
+
+
+def upload_too_large():
+    return JsonResponse(
+        {
+            "error": "Invalid image upload",
+            "errors": f"Files are limited to {max_upload_bytes()} bytes",
+        },
+        status=413,
+    )
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 @login_required
 def upload_image(request):
+    """Upload one image or DICOM file
+
+    The file is streamed to disk and hashed on the way, then its format and
+    dimensions are read from its headers. Oversized files and images, and
+    files that are not images, are refused before any pixel is decoded.
+    """
     if request.method != "POST":
         return JsonResponse({"error": "Only POST method allowed"}, status=405)
 
-    form = ImageUploadForm(request.POST, request.FILES)
-    if not form.is_valid():
+    # Refuse announced oversized bodies before reading them, the upload
+    # handler cuts off the others once they cross the limit
+    if int(request.META.get("CONTENT_LENGTH") or 0) > max_upload_bytes() + 64 * 1024:
+        return upload_too_large()
+    request.upload_handlers = [HashingUploadHandler(request)]
+
+    uploaded_file = request.FILES.get("ImageFile")
+    if uploaded_file is None:
+        if getattr(request, "upload_too_large", False):
+            return upload_too_large()
         return JsonResponse(
-            {"error": "Invalid image upload", "errors": form.errors}, status=400
+            {"error": "Invalid image upload", "errors": "No file uploaded"}, status=400
         )
 
-    # Extract image metadata
-    image_metadata = get_image_metadata(request.FILES["ImageFile"])
+    try:
+        info = inspect_upload(uploaded_file.temporary_file_path())
+    except UploadRejected as e:
+        return JsonResponse(
+            {"error": "Invalid image upload", "errors": str(e)}, status=e.status
+        )
+    return ingest_upload(request, uploaded_file, uploaded_file.sha256, info)
+
 
-    # Save image with metadata
-    image = form.save(commit=False)
-    image.FileName = request.FILES["ImageFile"].name
-    image.FilePath = image.ImageFile.url
-    image.UserID = request.user
-    image.FileSize = image_metadata["file_size"]
-    image.ImageFormat = image_metadata["format"]
-    image.save()
+def chunked_upload_payload(upload):
+    return {
+        "upload_id": str(upload.UploadID),
+        "file_name": upload.FileName,
+        "file_size": upload.FileSize,
+        "offset": upload.Offset,
+        "upload_url": reverse("api_chunked_upload", args=[upload.UploadID]),
+    }
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+def start_chunked_upload(request):
+    """Start a resumable upload of a large file
 
+    Expects ``{"file_name": ..., "file_size": ...}``. Chunks are then sent in
+    order with PUT to ``upload_url`` and a ``Content-Range`` header. A GET on
+    it reports the offset to resume from after an interruption.
+    """
     try:
-        start_time = time.time()
-        predicted_class, result, mask_img = classify_image(image.ImageFile.url)
-        result = float(result)
-        processing_time = time.time() - start_time
-
-        # Save RecognitionResult to database
-        recognition_result = RecognitionResult.objects.create(
-            ImageID=image,
-            Labels=predicted_class,
-            ConfidenceScores=Decimal(str(result)),
-            ProcessingTime=Decimal(str(round(processing_time, 4))),
-            MaskImageBase64=mask_img,
-        )
+        data = json.loads(request.body)
+        file_name = os.path.basename(str(data["file_name"]))
+        file_size = int(data["file_size"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "file_name and file_size required"}, status=400)
+    if not file_name or file_size <= 0:
+        return JsonResponse({"error": "file_name and file_size required"}, status=400)
+    if file_size > max_upload_bytes():
+        return upload_too_large()
+
+    expire_chunked_uploads()
+    upload = ChunkedUpload.objects.create(
+        UserID=request.user, FileName=file_name, FileSize=file_size
+    )
+    chunk_size = getattr(settings, "CHUNKED_UPLOAD_CHUNK_MB", 8) * 1024 * 1024
+    return JsonResponse(
+        dict(chunked_upload_payload(upload), chunk_size=chunk_size), status=201
+    )
 
-    except Exception as e:
-        return JsonResponse(
-            {"error": f"Classification failed: {str(e)}", "image_id": image.ImageID},
-            status=500,
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT", "DELETE"])
+@login_required
+def chunked_upload(request, upload_id):
+    """Report, continue or abort a resumable upload
+
+    Each PUT must start at the current offset. The headers are inspected as
+    soon as they have arrived, so oversized images are refused without
+    waiting for the rest of the file. The last chunk ingests the file like a
+    regular upload and answers the same way.
+    """
+    upload = get_object_or_404(ChunkedUpload, UploadID=upload_id)
+    if upload.UserID != request.user:
+        return JsonResponse({"error": "Permission denied"}, status=403)
+    if request.method == "GET":
+        return JsonResponse(chunked_upload_payload(upload))
+    if request.method == "DELETE":
+        discard_chunked_upload(upload)
+        return JsonResponse({"success": True})
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(UploadID=upload_id)
+        try:
+            start, end = parse_content_range(
+                request.headers.get("Content-Range"), upload.FileSize
+            )
+            if start != upload.Offset:
+                return JsonResponse(
+                    dict(
+                        chunked_upload_payload(upload),
+                        error="Chunk does not start at the current offset",
+                    ),
+                    status=409,
+                )
+            append_chunk(upload, request, start, end)
+            sniff_chunked_upload(upload)
+        except UploadRejected as e:
+            if e.status == 413:
+                discard_chunked_upload(upload)
+            return JsonResponse(
+                {"error": "Invalid image upload", "errors": str(e)}, status=e.status
+            )
+        upload.save()
+
+    if upload.Offset < upload.FileSize:
+        return JsonResponse(chunked_upload_payload(upload))
+
+    uploaded_file, file_hash = assembled_file(upload)
+    info = {
+        "format": upload.ImageFormat,
+        "width": upload.Width,
+        "height": upload.Height,
+        "dicom": None,
+    }
+    try:
+        response = ingest_upload(request, uploaded_file, file_hash, info)
+    finally:
+        uploaded_file.close()
+        discard_chunked_upload(upload)
+    return response
+
+
+@login_required
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """Report the status of a background inference job and its result when done"""
+    job = get_object_or_404(
+        InferenceJob.objects.select_related("ImageID", "ResultID"), JobID=job_id
+    )
+    if job.ImageID.UserID != request.user:
+        return JsonResponse({"error": "Permission denied"}, status=403)
+    return JsonResponse(job_payload(job, wants_mask_base64(request)))
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+def bulk_upload(request):
+    """Upload several images, or ZIP archives of them, in one request
+
+    Small sets are classified at once in a single batch and answered with
+    per-file results. Larger sets are queued as one batch of jobs whose
+    progress is reported at ``status_url``. DICOM files are grouped by series
+    and each series is classified as one image.
+    """
+    uploaded_files = request.FILES.getlist("files")
+    if not uploaded_files:
+        return JsonResponse({"error": "No files uploaded"}, status=400)
+
+    max_files = getattr(settings, "BULK_UPLOAD_MAX_FILES", 500)
+    max_file_bytes = getattr(settings, "BULK_UPLOAD_MAX_FILE_MB", 50) * 1024 * 1024
+    sync_limit = getattr(settings, "BULK_UPLOAD_SYNC_LIMIT", 16)
+    include_mask_base64 = wants_mask_base64(request)
+
+    entries = []  # one per file, in upload order
+    seen = {}  # content hash -> entry of its first occurrence
+    new_images = []
+    pending = []  # (image, decoded) still to classify
+    dicom_spool = None  # temporary directory holding DICOM files until grouped
+    dicom_files = []  # (name, path, file_hash, uid) grouped once all are read
+
+    for name, data, error in iter_bulk_files(uploaded_files, max_file_bytes):
+        if error is None and len(entries) + len(dicom_files) >= max_files:
+            error = f"More than {max_files} files in one upload"
+        if error is not None:
+            entries.append({"file_name": name, "error": error})
+            continue
+        if is_dicom(data[:132]):
+            if dicom_spool is None:
+                dicom_spool = tempfile.TemporaryDirectory()
+            try:
+                path, uid = spool_dicom(dicom_spool.name, len(dicom_files), data)
+            except Exception:
+                entries.append(
+                    {"file_name": name, "error": "Could not read DICOM headers"}
+                )
+                continue
+            dicom_files.append((name, path, hashlib.sha256(data).hexdigest(), uid))
+            continue
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        if content_hash in seen:
+            entries.append({"file_name": name, "same_as": seen[content_hash]})
+            continue
+
+        image = (
+            Image.objects.filter(UserID=request.user, ContentHash=content_hash)
+            .order_by("-ImageID")
+            .first()
         )
+        entry = {"file_name": name, "image": image}
+        if image is not None:
+            recognition_result = find_cached_result(image)
+            if recognition_result is not None:
+                entry["result"] = recognition_result
+            else:
+                pending.append((image, None))
+        else:
+            try:
+                info = inspect_upload(BytesIO(data))
+                # Only files that may still be classified inline are decoded,
+                # queued ones are decoded by the worker that runs them
+                decoded = None
+                if len(pending) < sync_limit:
+                    decoded = DecodedImage.from_bytes(data, name=name)
+            except UploadRejected as e:
+                entries.append({"file_name": name, "error": str(e)})
+                continue
+            except Exception:
+                entries.append({"file_name": name, "error": "Could not decode image"})
+                continue
+
+            image = Image(
+                UserID=request.user,
+                FileName=name,
+                FileSize=len(data),
+                ImageFormat=info["format"],
+                Width=info["width"],
+                Height=info["height"],
+                ContentHash=content_hash,
+            )
+            image.ImageFile.save(name, ContentFile(data), save=False)
+            image.FilePath = image.ImageFile.url
+            new_images.append(image)
+            pending.append((image, decoded))
+            entry["image"] = image
+
+        seen[content_hash] = entry
+        entries.append(entry)
+        if len(pending) == sync_limit + 1:
+            # The set will be queued, the images decoded so far are released
+            pending = [(queued, None) for queued, _ in pending]
 
-    return JsonResponse(
-        {
-            "success": True,
-            "image_id": image.ImageID,
-            "predicted_class": predicted_class,
-            "result": result,
-            "confidence_score": result,
-            "mask_img": mask_img,
-            "recognition_result_id": recognition_result.ResultID,
-            "processing_time": round(processing_time, 4),
-            "file_size": image_metadata["file_size"],
-            "image_format": image_metadata["format"],
-        }
+    try:
+        for files in group_series(dicom_files).values():
+            name = files[0][0]
+            content_hash = series_hash(file_hash for _, _, file_hash in files)
+            if content_hash in seen:
+                entries.append({"file_name": name, "same_as": seen[content_hash]})
+                continue
+
+            image = (
+                Image.objects.filter(UserID=request.user, ContentHash=content_hash)
+                .order_by("-ImageID")
+                .first()
+            )
+            entry = {"file_name": name, "image": image, "series_files": len(files)}
+            if image is not None:
+                recognition_result = find_cached_result(image)
+                if recognition_result is not None:
+                    entry["result"] = recognition_result
+                else:
+                    pending.append((image, None))
+            else:
+                # Spooled files are moved into storage, not copied
+                contents = [
+                    (file_name, PartialFile(open(path, "rb"), name=file_name))
+                    for file_name, path, _ in files
+                ]
+                try:
+                    image = save_series(request.user, contents, content_hash)
+                finally:
+                    for _, content in contents:
+                        content.close()
+                new_images.append(image)
+                pending.append((image, None))
+                entry["image"] = image
+
+            seen[content_hash] = entry
+            entries.append(entry)
+    finally:
+        if dicom_spool is not None:
+            dicom_spool.cleanup()
+
+    # Bulk creation skips the stats signals, the counters are rebuilt instead
+    if new_images:
+        Image.objects.bulk_create(new_images)
+        refresh_user_stats(request.user.id)
+
+    batch_id = None
+    if len(pending) > sync_limit:
+        batch_id, jobs = enqueue_batch([image for image, _ in pending])
+        jobs_by_image = {job.ImageID_id: job for job in jobs}
+    elif pending:
+        try:
+            with inference_admission.admit(admission_key(request)):
+                results = run_batch_recognition(
+                    [image for image, _ in pending],
+                    [decoded for _, decoded in pending],
+                )
+        except Overloaded as e:
+            return overloaded_response(e)
+        except Exception as e:
+            return JsonResponse(
+                {
+                    "error": f"Classification failed: {str(e)}",
+                    "image_ids": [image.ImageID for image, _ in pending],
+                },
+                status=500,
+            )
+        for (image, _), recognition_result in zip(pending, results):
+            seen[image.ContentHash]["result"] = recognition_result
+
+    files = []
+    for entry in entries:
+        if "error" in entry:
+            files.append(entry)
+            continue
+        source = entry.get("same_as", entry)
+        image = source["image"]
+        if "result" in source:
+            payload = recognition_payload(image, source["result"], include_mask_base64)
+        else:
+            job = jobs_by_image[image.ImageID]
+            payload = {"image_id": image.ImageID, "job_id": str(job.JobID)}
+        if "series_files" in source:
+            payload["series_files"] = source["series_files"]
+        files.append(dict(payload, file_name=entry["file_name"]))
+
+    response = {
+        "success": True,
+        "total": len(files),
+        "failed": sum(1 for entry in files if "error" in entry),
+        "files": files,
+    }
+    if batch_id is None:
+        return JsonResponse(response)
+    response["batch_id"] = str(batch_id)
+    response["status_url"] = reverse("api_batch_status", args=[batch_id])
+    return JsonResponse(response, status=202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def batch_status(request, batch_id):
+    """Report the progress of a bulk upload's jobs and the finished results"""
+    jobs = list(
+        InferenceJob.objects.filter(BatchID=batch_id, ImageID__UserID=request.user)
+        .select_related("ImageID", "ResultID")
+        .order_by("CreatedDateTime")
     )
+    if not jobs:
+        return JsonResponse({"error": "Batch not found"}, status=404)
+    return JsonResponse(batch_payload(batch_id, jobs, wants_mask_base64(request)))
+
+
+def encode_cursor(image):
+    value = f"{image.UploadDateTime.isoformat()}|{image.ImageID}"
+    return base64.urlsafe_b64encode(value.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    value = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    upload_datetime, image_id = value.rsplit("|", 1)
+    return datetime.fromisoformat(upload_datetime), int(image_id)
 
 
 @login_required
 @require_http_methods(["GET"])
 def images_list(request):
-    """Get list of user's uploaded images and their recognition results"""
+    """Get a page of the user's uploaded images and their latest recognition results
+
+    Pages are ordered newest first and continue from ``cursor``. Masks are
+    returned as URLs, ``include_mask=base64`` inlines them and
+    ``include_mask=none`` leaves them out.
+    """
+    include_mask = request.GET.get("include_mask", "url")
+    try:
+        limit = int(request.GET.get("limit", IMAGES_PAGE_SIZE))
+        limit = max(1, min(limit, IMAGES_MAX_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({"error": "Invalid limit"}, status=400)
+
     try:
-        user_images = Image.objects.filter(UserID=request.user).order_by(
-            "-UploadDateTime"
+        latest_result = RecognitionResult.objects.filter(
+            ImageID=OuterRef("pk")
+        ).order_by("-ResultID")
+        user_images = (
+            Image.objects.filter(UserID=request.user)
+            .annotate(LatestResultID=Subquery(latest_result.values("ResultID")[:1]))
+            .order_by("-UploadDateTime", "-ImageID")
         )
-        combined_data = []
 
-        for image in user_images:
-            recognition_result = (
-                RecognitionResult.objects.filter(ImageID=image)
-                .order_by("-ResultID")
-                .first()
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                upload_datetime, image_id = decode_cursor(cursor)
+            except (ValueError, UnicodeDecodeError):
+                return JsonResponse({"error": "Invalid cursor"}, status=400)
+            user_images = user_images.filter(
+                Q(UploadDateTime__lt=upload_datetime)
+                | Q(UploadDateTime=upload_datetime, ImageID__lt=image_id)
             )
 
+        page = list(user_images[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        # Latest result of every image on the page in a single query
+        result_ids = [image.LatestResultID for image in page if image.LatestResultID]
+        results = RecognitionResult.objects.filter(ResultID__in=result_ids)
+        if include_mask == "none":
+            results = results.defer("MaskFile", "MaskImageBase64")
+        elif include_mask != "base64":
+            results = results.defer("MaskImageBase64")
+        results = results.in_bulk()
+
+        combined_data = []
+        for image in page:
+            recognition_result = results.get(image.LatestResultID)
+
             image_data = {
                 "ImageID": image.ImageID,
                 "FileName": image.FileName,
                 "ImageFile": {"url": image.ImageFile.url},
+                "Derivatives": {
+                    size: reverse("api_image_derivative", args=[image.ImageID, size])
+                    for size in derivative_sizes()
+                },
                 "UploadDateTime": image.UploadDateTime.isoformat(),
                 "FileSize": image.FileSize,
                 "ImageFormat": image.ImageFormat,
+                "Width": image.Width,
+                "Height": image.Height,
             }
 
             recognition_data = None
@@ -266,13 +825,14 @@ def images_list(request):
                         if recognition_result.ProcessingTime is not None
                         else 0.0
                     ),
-                    "HasMask": bool(recognition_result.MaskImageBase64),
-                    "MaskImageBase64": (
-                        recognition_result.MaskImageBase64
-                        if recognition_result.MaskImageBase64
-                        else None
-                    ),
                 }
+                if include_mask != "none":
+                    recognition_data["HasMask"] = bool(recognition_result.MaskFile)
+                    recognition_data["MaskURL"] = recognition_result.mask_url
+                if include_mask == "base64":
+                    recognition_data["MaskImageBase64"] = (
+                        recognition_result.mask_base64()
+                    )
 
             combined_data.append(
                 {
@@ -286,12 +846,34 @@ def images_list(request):
                 "success": True,
                 "combined_data": combined_data,
                 "count": len(combined_data),
+                "has_more": has_more,
+                "next_cursor": encode_cursor(page[-1]) if has_more else None,
             }
         )
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@login_required
+@require_http_methods(["GET"])
+def image_derivative(request, image_id, size):
+    """Serve a cached WebP thumbnail or preview of an image, creating it if needed"""
+    image = get_object_or_404(Image, ImageID=image_id)
+    if image.UserID != request.user:
+        return JsonResponse({"error": "Permission denied"}, status=403)
+    if size not in derivative_sizes():
+        return JsonResponse({"error": "Unknown size"}, status=404)
+
+    try:
+        path = ensure_derivative(image, size)
+    except Exception:
+        return JsonResponse({"error": "Could not render image"}, status=500)
+    response = FileResponse(open(path, "rb"), content_type="image/webp")
+    # Derivatives never change for an image id
+    response["Cache-Control"] = "private, max-age=31536000, immutable"
+    return response
+
+
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -328,34 +910,27 @@ def process_image(request, image_id):
 
         # Classify the image
         try:
-            start_time = time.time()
-            predicted_class, result, mask_img = classify_image(image.ImageFile.url)
-            result = float(result)
-            processing_time = time.time() - start_time
-
-            # Save or update RecognitionResult to database
-            recognition_result, created = RecognitionResult.objects.update_or_create(
-                ImageID=image,
-                defaults={
-                    "Labels": predicted_class,
-                    "ConfidenceScores": Decimal(str(result)),
-                    "ProcessingTime": Decimal(str(round(processing_time, 4))),
-                    "MaskImageBase64": mask_img,
-                },
-            )
+            with inference_admission.admit(admission_key(request)):
+                recognition_result, created = run_recognition(image)
+            result = float(recognition_result.ConfidenceScores)
 
-            return JsonResponse(
-                {
-                    "success": True,
-                    "predicted_class": predicted_class,
-                    "result": result,
-                    "mask_img": mask_img,
-                    "confidence_score": result,
-                    "recognition_result_id": recognition_result.ResultID,
-                    "created_new": created,  # True if new result, False if updated existing
-                    "processing_time": round(processing_time, 4),
-                }
-            )
+            response = {
+                "success": True,
+                "predicted_class": recognition_result.Labels,
+                "result": result,
+                "mask_url": recognition_result.mask_url,
+                "confidence_score": result,
+                "recognition_result_id": recognition_result.ResultID,
+                "created_new": created,  # True if new result, False if updated existing
+                "processing_time": float(recognition_result.ProcessingTime),
+                "stage_timings": recognition_result.StageTimings,
+                "cascade": recognition_result.Cascade,
+            }
+            if wants_mask_base64(request):
+                response["mask_img"] = recognition_result.mask_base64()
+            return JsonResponse(response)
+        except Overloaded as e:
+            return overloaded_response(e)
         except Exception as classification_error:
             return JsonResponse(
                 {"error": f"Classification failed: {str(classification_error)}"},
@@ -367,99 +942,34 @@ def process_image(request, image_id):
         return JsonResponse({"error": str(e)}, status=500)
 
 
-# Alternative streaming function for even smoother word-by-word streaming
 @csrf_exempt
 @require_http_methods(["POST"])
-def chat_with_phi(request):
-    """Handle AI chat requests with character-level streaming for smoother effect"""
+async def chat_with_phi(request):
+    """Relay Ollama's answer as NDJSON chunks, pacing is left to the client"""
     try:
         data = json.loads(request.body)
-        question = data.get("question")
-
-        if not question:
-            return JsonResponse({"error": "Missing question"}, status=400)
-
-        # Enhanced prompt for medical context
-        prompt = f"""You are a helpful medical AI assistant. Provide clear, accurate, and supportive information about medical images and diagnoses. Always remind users to consult healthcare professionals for medical decisions.
-
-User question: {question}
-
-Response:"""
-
-        payload = {
-            "model": "phi",
-            "prompt": prompt,
-            "max_tokens": 150,
-            "stream": True,
-            "temperature": 0.7,
-        }
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON data"}, status=400)
 
-        # Make streaming request to Ollama
-        response = requests.post(OLLAMA_URL, json=payload, stream=True, timeout=30)
-        if response.status_code != 200:
-            return JsonResponse(
-                {"error": "Failed to get response from AI model"}, status=500
-            )
+    question = data.get("question")
+    if not question:
+        return JsonResponse({"error": "Missing question"}, status=400)
 
-        def stream_response():
-            word_buffer = ""
-            
-            try:
-                for line in response.iter_lines():
-                    if not line:
-                        continue
-
-                    try:
-                        chunk = json.loads(line.decode("utf-8"))
-                    except json.JSONDecodeError:
-                        continue
-
-                    if "response" in chunk and chunk["response"]:
-                        # Process each character
-                        for char in chunk["response"]:
-                            word_buffer += char
-                            
-                            # Send word when we hit a space or punctuation
-                            if char in [' ', '.', '!', '?', ',', ';', ':', '\n']:
-                                if word_buffer.strip():
-                                    yield json.dumps({"chunk": word_buffer}) + "\n"
-                                    word_buffer = ""
-                                    # Small delay for visual effect (optional)
-                                    time.sleep(0.1)
-
-                    if chunk.get("done", False):
-                        # Send any remaining buffer
-                        if word_buffer.strip():
-                            yield json.dumps({"chunk": word_buffer}) + "\n"
-                        break
-                        
-            except Exception as stream_error:
-                yield json.dumps(
-                    {"error": f"Streaming error: {str(stream_error)}"}
-                ) + "\n"
-
-        return StreamingHttpResponse(
-            stream_response(),
-            content_type="application/json",
-            status=200,
-        )
+    try:
+        stream = await open_chat_stream(question)
+    except ChatUnavailable as e:
+        response = JsonResponse({"error": str(e)}, status=e.status)
+        if e.retry_after:
+            response["Retry-After"] = str(e.retry_after)
+        return response
 
-    except json.JSONDecodeError:
-        return JsonResponse({"error": "Invalid JSON data"}, status=400)
-    except requests.exceptions.Timeout:
-        return JsonResponse({"error": "AI model request timed out"}, status=504)
-    except requests.exceptions.RequestException as e:
-        return JsonResponse(
-            {"error": f"AI model connection failed: {str(e)}"}, status=503
-        )
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    return StreamingHttpResponse(stream, content_type="application/json", status=200)
 
 
 # Utility endpoints
 @require_http_methods(["GET"])
 def health_check(request):
-    """Health check endpoint"""
+    """Liveness check, answers without touching the models"""
     return JsonResponse(
         {
             "status": "healthy",
@@ -471,35 +981,89 @@ def health_check(request):
     )
 
 
+@require_http_methods(["GET"])
+def readiness_check(request):
+    """Readiness check, 503 until the inference models are loaded and warmed"""
+    socket_path = getattr(settings, "INFERENCE_SERVER_SOCKET", None)
+    if socket_path:
+        try:
+            state = InferenceClient(socket_path, timeout=5).status()["readiness"]
+        except InferenceServerError as e:
+            state = {"ready": False, "error": str(e)}
+    elif web_warmup_enabled():
+        state = readiness()
+    else:
+        # Uploads are classified elsewhere, models load here on first use
+        state = dict(readiness(), ready=True)
+
+    return JsonResponse(
+        dict(state, status="ready" if state["ready"] else "not ready"),
+        status=200 if state["ready"] else 503,
+    )
+
+
+@require_http_methods(["GET"])
+def inference_status(request):
+    """Report resident models, their memory use, batching and chat cache statistics"""
+    cache = chat_cache()
+    cache_stats = cache.stats() if cache is not None else None
+    socket_path = getattr(settings, "INFERENCE_SERVER_SOCKET", None)
+    if socket_path:
+        try:
+            status = InferenceClient(socket_path).status()
+        except InferenceServerError as e:
+            return JsonResponse({"error": str(e)}, status=503)
+        return JsonResponse(
+            {
+                "server": socket_path,
+                "pid": status["pid"],
+                "models": status["models"],
+                "resident_mb": round(status["resident_bytes"] / (1024 * 1024), 2),
+                "batching": status["batching"],
+                "chat_cache": cache_stats,
+            }
+        )
+
+    return JsonResponse(
+        {
+            "models": registry.resident(),
+            "resident_mb": round(registry.resident_bytes() / (1024 * 1024), 2),
+            "memory_budget_mb": registry.memory_budget_mb,
+            "batching": batching_stats(),
+            "admission": inference_admission.stats(),
+            "chat_cache": cache_stats,
+        }
+    )
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Prometheus metrics of this process"""
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @login_required
 @require_http_methods(["GET"])
 def user_stats(request):
     """Get user statistics"""
     try:
-        total_images = Image.objects.filter(UserID=request.user).count()
-        processed_images = RecognitionResult.objects.filter(
-            ImageID__UserID=request.user
-        ).count()
-
-        # Calculate total file size
-        total_file_size = sum(
-            img.FileSize or 0 for img in Image.objects.filter(UserID=request.user)
-        )
+        stats = get_user_stats(request.user)
+        total_images = stats.TotalImages
+        processed_images = stats.ProcessedImages
+        total_file_size = stats.TotalFileSize
 
-        # Get average processing time
-        recent_results = RecognitionResult.objects.filter(
-            ImageID__UserID=request.user, ProcessingTime__isnull=False
-        )
         avg_processing_time = 0
-        if recent_results.exists():
-            total_time = sum(float(r.ProcessingTime) for r in recent_results)
-            avg_processing_time = total_time / len(recent_results)
+        if stats.TimedResults:
+            avg_processing_time = float(stats.TotalProcessingTime) / stats.TimedResults
 
         return JsonResponse(
             {
                 "total_images": total_images,
                 "processed_images": processed_images,
                 "unprocessed_images": total_images - processed_images,
+                "total_file_size": total_file_size,
                 "total_file_size_mb": round(total_file_size / (1024 * 1024), 2),
                 "average_processing_time": round(avg_processing_time, 4),
             }
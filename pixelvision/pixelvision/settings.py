@@ -171,3 +171,153 @@ LOGIN_REDIRECT_URL = "/"
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
+
+
+# Model registry
+# Least recently used models are evicted once resident models exceed this
+# budget. Set to None to keep every model loaded.
+MODEL_REGISTRY_MEMORY_BUDGET_MB = 4096
+
+# Lung segmentation U-Net, loaded and warmed once
+LUNG_SEGMENTATION_MODEL_PATH = "models/lung_cancer/ResUNet_model.keras"
+
+# Dynamic micro-batching in front of each model. Concurrent requests are
+# gathered until max_batch_size rows are queued or max_wait_ms has passed.
+# Per-model overrides are keyed by registry name, e.g. "router".
+INFERENCE_BATCHING = {
+    "default": {"max_batch_size": 8, "max_wait_ms": 5},
+    "router": {"max_batch_size": 16, "max_wait_ms": 10},
+}
+
+# Background inference jobs
+# When enabled, uploads return a job id at once and `manage.py inference_worker`
+# processes write the RecognitionResult. Off by default so a plain runserver
+# classifies uploads itself; turn it on only with workers running, otherwise
+# uploads stay queued.
+INFERENCE_ASYNC_UPLOADS = False
+INFERENCE_WORKERS = 2
+INFERENCE_JOB_TIMEOUT_SECONDS = 600
+
+# Shared inference server (`manage.py inference_server`). When set, web
+# workers send classification requests over this UNIX socket instead of
+# loading the models themselves.
+INFERENCE_SERVER_SOCKET = None
+
+# Results are reused for re-uploaded images only when produced by the same
+# models. The version is derived from the files in ./models unless pinned here.
+INFERENCE_PIPELINE_VERSION = None
+
+# "background" loads and warms the models in a thread when a web worker
+# starts, anything else defers loading to the first request that needs it.
+# Web workers only warm up when they classify uploads themselves, that is with
+# INFERENCE_ASYNC_UPLOADS off and no INFERENCE_SERVER_SOCKET. Inference
+# workers and the inference server always load their models at startup.
+INFERENCE_WARMUP = "background"
+
+# Inference backend per model: "native" runs the model in the framework it
+# was trained with, "onnx" runs the export from `manage.py export_onnx`
+# (models/onnx/<name>.onnx) on ONNX Runtime. Keys are model names such as
+# "router", "lung_cancer", "lung_segmentation" or "brain_tumor_classifier".
+INFERENCE_BACKENDS = {
+    "default": "native",
+}
+
+# ONNX Runtime threads per session, 0 lets ONNX Runtime decide
+ONNX_INTRA_OP_THREADS = 0
+
+# "int8" runs a model from its quantized export (models/onnx/<name>.int8.onnx,
+# built by `manage.py quantize_models`) on ONNX Runtime. Check the accuracy
+# delta in models/onnx/quantization_report.json before switching a model.
+INFERENCE_PRECISION = {
+    "default": "fp32",
+}
+
+# Bulk uploads (`upload/bulk/`): sets of up to BULK_UPLOAD_SYNC_LIMIT images
+# are classified in one batch during the request, larger sets are queued as a
+# batch of jobs. Inference workers claim up to INFERENCE_WORKER_BATCH_SIZE
+# queued jobs at a time and classify them together.
+BULK_UPLOAD_MAX_FILES = 500
+BULK_UPLOAD_MAX_FILE_MB = 50
+BULK_UPLOAD_SYNC_LIMIT = 16
+INFERENCE_WORKER_BATCH_SIZE = 8
+
+# Chat proxy to Ollama. Each ASGI worker keeps a pool of keep-alive
+# connections and sends at most OLLAMA_MAX_CONCURRENCY generations at once,
+# further requests wait up to OLLAMA_QUEUE_TIMEOUT_SECONDS before a 503.
+OLLAMA_URL = "http://localhost:11434/api/generate"
+OLLAMA_MAX_CONCURRENCY = 4
+OLLAMA_QUEUE_TIMEOUT_SECONDS = 10
+OLLAMA_TIMEOUT_SECONDS = 30
+
+# Cache of complete chat answers, keyed on the normalized question, model and
+# prompt template. "memory" keeps answers per worker, "file" stores them under
+# "path" for every worker on the host. Set to None to disable.
+CHAT_CACHE = {
+    "backend": "memory",
+    "ttl_seconds": 24 * 60 * 60,
+    "max_entries": 1000,
+    "path": "chat_cache",
+}
+
+# Admission control for inference run during a request (synchronous uploads,
+# bulk uploads and process/). Limits apply per process. Requests beyond them
+# get a 503 with Retry-After instead of queueing without bound.
+INFERENCE_ADMISSION = {
+    "max_in_flight": 4,
+    "max_queue": 32,
+    "max_per_user": 2,
+    "max_queued_per_user": 8,
+    "queue_timeout_seconds": 30,
+}
+
+# DICOM ingest. A series is classified from at most "max_slices" evenly spaced
+# slices or frames, read from memory-mapped pixel data and decimated so no
+# side exceeds "max_dimension" pixels.
+DICOM_INGEST = {
+    "max_slices": 16,
+    "max_dimension": 1024,
+}
+
+# Tiled inference for high resolution radiographs. With mode "on" (or "auto"
+# for images larger than min_dimension) the fracture detector and the lung
+# segmenter run on overlapping tile_size tiles, batch_size tiles at a time.
+# Detections are merged across tiles with NMS, masks are stitched.
+TILED_INFERENCE = {
+    "default": {"mode": "off", "tile_size": 1024, "overlap": 128},
+    "bone_fracture_yolo": {"mode": "auto", "min_dimension": 2048},
+}
+
+# WebP thumbnails and previews shown instead of the original uploads, longest
+# side in pixels by name. They are cached under MEDIA_ROOT/derivatives/<id>/,
+# created at upload time or on the first request.
+IMAGE_DERIVATIVE_SIZES = {"thumbnail": 256, "preview": 1024}
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Upload ingestion. Files are streamed to disk and refused past
+# UPLOAD_MAX_FILE_MB, images whose headers declare more than
+# UPLOAD_MAX_IMAGE_PIXELS pixels are refused before decoding. Large files can
+# be sent in resumable chunks (`upload/chunked/`), assembled in
+# CHUNKED_UPLOAD_DIR and dropped after CHUNKED_UPLOAD_EXPIRY_HOURS idle.
+UPLOAD_MAX_FILE_MB = 200
+UPLOAD_MAX_IMAGE_PIXELS = 64_000_000
+CHUNKED_UPLOAD_DIR = "chunked_uploads"
+CHUNKED_UPLOAD_CHUNK_MB = 8
+CHUNKED_UPLOAD_EXPIRY_HOURS = 24
+
+# Intra-op threads of each framework, 0 for half the cores. Brain studies run
+# the Torch classifier and the TensorFlow segmentation at the same time, on up
+# to BRAIN_TUMOR_SEGMENTATION_THREADS studies at once.
+FRAMEWORK_THREADS = {"keras": 0, "torch": 0}
+BRAIN_TUMOR_SEGMENTATION_THREADS = 2
+
+# Cascade policy per routed class: whether the specialist runs, and when
+# segmentation runs ("always", "never" or "gated" on the score being above
+# min_score and the label not in skip_labels). skipped_mask is "original" to
+# return the input image when no mask is made, or "none". Entries override
+# "default". The policy applied is returned with each result.
+INFERENCE_CASCADE = {
+    "default": {"specialist": True, "segment": "gated", "skipped_mask": "original"},
+    "lung_cancer": {"min_score": 0.5},
+    "bone_fracture": {"min_score": 0.6},
+    "brain_tumor": {"min_score": 0.0, "skip_labels": ["No Tumor"]},
+}
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pixelvision.settings')
 
 application = get_wsgi_application()
+
+# Workers that classify uploads themselves load the models in the background,
+# so they answer liveness probes immediately and report readiness once warm
+from inference.warmup import start_background_warmup  # noqa: E402
+
+start_background_warmup()